@@ -0,0 +1,138 @@
+"""Non-blocking access to the Gemini model.
+
+generate_content() is a blocking network call, so it runs on a bounded
+thread pool rather than the event loop. Calls are limited to a configurable
+concurrency and timeout. A call that times out keeps its concurrency slot
+until its thread actually returns, so abandoned calls cannot pile up behind
+the pool; while every slot is held, new calls wait and time out. Identical
+in-flight prompts share one model call (single-flight), and answers are
+kept in a TTL-bounded LRU cache.
+"""
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+CallObserver = Callable[[str, float], None]  # (outcome: ok | timeout | error, seconds)
+
+
+class AITimeoutError(Exception):
+    """The model did not answer within the configured timeout"""
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form used for cache keys"""
+    return " ".join((text or "").lower().split())
+
+
+class AIClient:
+    def __init__(
+        self,
+        model: Any,
+        max_concurrency: int = 4,
+        timeout: float = 20.0,
+        cache_size: int = 512,
+        cache_ttl: float = 600.0,
+    ):
+        self.model = model
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="gemini")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache: TTLCache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._call_observers: List[CallObserver] = []
+        self.hits = 0
+        self.misses = 0
+
+    def observe_calls(self, observer: CallObserver) -> None:
+        """Call observer(outcome, seconds) after every model call"""
+        self._call_observers.append(observer)
+
+    def cached(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    async def generate(self, prompt: str, cache_key: Optional[str] = None) -> str:
+        """Return the model's text for prompt, served from cache or a shared in-flight call"""
+        key = cache_key or normalize_text(prompt)
+        text = self._cache.get(key)
+        if text is not None:
+            self.hits += 1
+            return text
+        self.misses += 1
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(prompt, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # A cancelled waiter (e.g. client disconnect) must not cancel the shared call
+        return await asyncio.shield(task)
+
+    async def _call(self, prompt: str, key: str) -> str:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            text = await asyncio.wait_for(self._generate(prompt), self.timeout)
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise AITimeoutError(f"AI call exceeded {self.timeout}s")
+        finally:
+            elapsed = time.perf_counter() - started
+            for observer in self._call_observers:
+                observer(outcome, elapsed)
+        self._cache[key] = text
+        return text
+
+    async def _generate(self, prompt: str) -> str:
+        await self._semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(self.model.generate_content, prompt)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        # Released when the thread is done, not when a timeout stops waiting for it
+        future.add_done_callback(lambda _: self._release(loop))
+        response = await asyncio.wrap_future(future)
+        return response.text
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self._semaphore.release)
+        except RuntimeError:
+            pass  # loop already closed at shutdown
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Offline stand-in for genai.GenerativeModel with a fixed, blocking latency"""
+
+    def __init__(self, latency: float = 0.5):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, prompt: str) -> FakeResponse:
+        self.calls += 1
+        time.sleep(self.latency)
+        if "JSON array" in prompt:
+            return FakeResponse(json.dumps([
+                {"type": "weather", "message": "Carry rain protection; showers are likely later today.", "priority": "medium"},
+                {"type": "aqi", "message": "Sensitive groups should limit prolonged outdoor exertion.", "priority": "medium"},
+                {"type": "safety", "message": "Keep your emergency kit and phone charged.", "priority": "low"},
+            ]))
+        query = prompt.rsplit("User Query:", 1)[-1].split("\n\n", 1)[0].strip()
+        return FakeResponse(f"(offline model) Guidance for: {query}. Follow official advisories and call 1070 in an emergency.")
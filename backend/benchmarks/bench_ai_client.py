@@ -0,0 +1,66 @@
+"""Event-loop impact, coalescing and caching of AIClient against the offline fake model.
+
+Run from backend/:  python benchmarks/bench_ai_client.py [--requests 200 --distinct 10 --latency 0.2]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai_client import AIClient, FakeGenerativeModel  # noqa: E402
+
+
+async def loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Worst delay of a periodic timer while the workload runs, in ms"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst * 1000
+
+
+async def run(label: str, call, prompts):
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(loop_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(call(p) for p in prompts))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lag = await lag_task
+    print(f"{label:<28} {elapsed * 1000:>10.1f} {lag:>14.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    prompts = [f"User Query: how do I prepare for a cyclone? variant {i % args.distinct}" for i in range(args.requests)]
+    print(f"{'mode':<28} {'wall ms':>10} {'max loop lag ms':>14}")
+
+    blocking = FakeGenerativeModel(latency=args.latency)
+
+    async def blocking_call(prompt):
+        return blocking.generate_content(prompt).text
+
+    # The old handler behaviour, on a small sample so it finishes in reasonable time
+    await run("blocking (10 requests)", blocking_call, prompts[:10])
+
+    model = FakeGenerativeModel(latency=args.latency)
+    client = AIClient(model, max_concurrency=args.concurrency, timeout=30)
+    await run(f"AIClient cold ({args.requests} req)", client.generate, prompts)
+    cold_calls = model.calls
+    await run(f"AIClient warm ({args.requests} req)", client.generate, prompts)
+    client.close()
+    print(f"model calls: cold={cold_calls} warm={model.calls - cold_calls} (distinct prompts={args.distinct})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,346 @@
+"""Load test of the whole API in-process, with per-route latency percentiles as JSON.
+
+Builds a synthetic data directory (see synthetic_data.py) and starts the
+FastAPI app in this process, with its startup hooks, against mongomock or a
+throwaway database on a real server, and the offline fake Gemini model. It then
+drives it through httpx's ASGI transport with N virtual users running a
+weighted mix of scenarios:
+
+    dashboard  poll /dashboard/summary with If-None-Match
+    lookup     alerts / disasters / evacuation centers / knowledge cards by id
+    list       filtered alerts, disasters, earthquakes, nearest shelters, flood risk, search
+    reports    a burst of community report submissions
+    ai         AI assistant questions
+    current    current weather and AQI
+
+Prints a table to stderr and writes a JSON document of the count, errors,
+status codes, throughput and p50/p95/p99/max/mean latency per route, plus the
+git commit, so runs can be compared across commits (--baseline prints deltas).
+
+Run from backend/:
+    python benchmarks/bench_api.py --mongomock --records 100000 --duration 30 --output bench.json
+    python benchmarks/bench_api.py --mongo-url mongodb://localhost:27017 --records 1000000 --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.synthetic_data import generate  # noqa: E402
+
+DEFAULT_MIX = "dashboard=25,lookup=20,list=30,reports=15,ai=5,current=5"
+REPORT_TYPES = ["flood", "cyclone", "fire", "landslide", "heatwave", "road_block"]
+SEVERITIES = ["red", "orange", "yellow"]
+DISASTER_TYPES = ["Cyclone", "Flood", "Earthquake", "Heatwave", "Landslide"]
+SEARCH_TERMS = ["cyclone", "flood safety", "evacuation", "heat", "earthquake drill", "first aid"]
+QUESTIONS = [
+    "What should I do during a cyclone?",
+    "How do I prepare an emergency kit?",
+    "Is it safe to travel during heavy rain?",
+    "Where is the nearest shelter?",
+    "How can I protect my crops from flooding?",
+]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return head + ("-dirty" if dirty else "")
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"unknown scenario {name.strip()!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+
+    async def call(self, client, label: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception as e:
+            self.latencies[label].append(time.perf_counter() - start)
+            self.statuses[label][type(e).__name__] += 1
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - start)
+        self.statuses[label][str(response.status_code)] += 1
+        if response.status_code >= 400:
+            self.errors[label] += 1
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        routes = {label: self._stats(samples, self.statuses[label], self.errors[label], elapsed)
+                  for label, samples in sorted(self.latencies.items())}
+        everything = [s for samples in self.latencies.values() for s in samples]
+        total = self._stats(everything, sum(self.statuses.values(), Counter()), sum(self.errors.values()), elapsed)
+        return {"routes": routes, "total": total}
+
+    @staticmethod
+    def _stats(samples: List[float], statuses: Counter, errors: int, elapsed: float) -> Dict[str, Any]:
+        ms = np.asarray(samples) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (0.0, 0.0, 0.0)
+        return {
+            "count": len(ms),
+            "errors": errors,
+            "status": dict(sorted(statuses.items())),
+            "rps": round(len(ms) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+                "max": round(float(ms.max()), 3) if len(ms) else 0.0,
+                "mean": round(float(ms.mean()), 3) if len(ms) else 0.0,
+            },
+        }
+
+
+class VirtualUser:
+    """One client: its own RNG and the dashboard ETag it last saw"""
+
+    def __init__(self, client, recorder: Recorder, ids: Dict[str, List[str]], rng: random.Random, report_burst: int):
+        self.client = client
+        self.recorder = recorder
+        self.ids = ids
+        self.rng = rng
+        self.report_burst = report_burst
+        self.dashboard_etag: Optional[str] = None
+
+    def call(self, label: str, method: str, url: str, **kwargs):
+        return self.recorder.call(self.client, label, method, url, **kwargs)
+
+    def point(self):
+        return round(self.rng.uniform(8, 28), 4), round(self.rng.uniform(70, 90), 4)
+
+    async def dashboard(self):
+        headers = {"If-None-Match": self.dashboard_etag} if self.dashboard_etag else {}
+        response = await self.call("GET /api/dashboard/summary", "GET", "/api/dashboard/summary", headers=headers)
+        if response is not None and response.headers.get("etag"):
+            self.dashboard_etag = response.headers["etag"]
+
+    async def lookup(self):
+        kind, path = self.rng.choice([
+            ("alerts", "/api/alerts/{}"),
+            ("disasters", "/api/disasters/{}"),
+            ("evacuation_centers", "/api/evacuation-centers/{}"),
+            ("knowledge_cards", "/api/knowledge-cards/{}"),
+        ])
+        if self.ids[kind]:
+            record_id = self.rng.choice(self.ids[kind])
+            await self.call("GET " + path.format("{id}"), "GET", path.format(record_id))
+
+    async def list(self):
+        rng = self.rng
+        lat, lon = self.point()
+        choice = rng.randrange(6)
+        if choice == 0:
+            await self.call("GET /api/alerts", "GET", "/api/alerts", params={"severity": rng.choice(SEVERITIES)})
+        elif choice == 1:
+            await self.call("GET /api/disasters", "GET", "/api/disasters", params={"disaster_type": rng.choice(DISASTER_TYPES)})
+        elif choice == 2:
+            await self.call("GET /api/earthquakes", "GET", "/api/earthquakes",
+                            params={"min_magnitude": rng.choice([2.5, 3.5, 4.5]), "limit": 50})
+        elif choice == 3:
+            await self.call("GET /api/evacuation-centers/nearest", "GET", "/api/evacuation-centers/nearest",
+                            params={"lat": lat, "lon": lon, "k": 5})
+        elif choice == 4:
+            await self.call("GET /api/flood-zones/at", "GET", "/api/flood-zones/at", params={"lat": lat, "lon": lon})
+        else:
+            await self.call("GET /api/search", "GET", "/api/search", params={"q": rng.choice(SEARCH_TERMS)})
+
+    async def reports(self):
+        async def submit(i):
+            lat, lon = self.point()
+            await self.call("POST /api/community-reports", "POST", "/api/community-reports", json={
+                "reporter_name": f"bench {i}",
+                "location": f"Ward {self.rng.randrange(500)}",
+                "report_type": self.rng.choice(REPORT_TYPES),
+                "description": f"Water logging near block {self.rng.randrange(10_000)}",
+                "severity": self.rng.choice(["low", "medium", "high"]),
+                "coordinates": {"lat": lat, "lon": lon},
+            })
+        await asyncio.gather(*(submit(i) for i in range(self.report_burst)))
+
+    async def ai(self):
+        await self.call("POST /api/ai-assistant", "POST", "/api/ai-assistant", json={"query": self.rng.choice(QUESTIONS)})
+
+    async def current(self):
+        path = self.rng.choice(["/api/weather/current", "/api/aqi/current"])
+        await self.call("GET " + path, "GET", path)
+
+
+SCENARIOS = ("dashboard", "lookup", "list", "reports", "ai", "current")
+
+
+async def run_users(client, recorder: Recorder, ids, mix: Dict[str, float], args) -> float:
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + args.duration
+    remaining = [args.scenarios] if args.scenarios else None
+
+    async def user(n: int):
+        vu = VirtualUser(client, recorder, ids, random.Random(args.seed + n), args.report_burst)
+        while True:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            elif time.perf_counter() >= deadline:
+                return
+            await getattr(vu, vu.rng.choices(names, weights)[0])()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(n) for n in range(args.concurrency)))
+    return time.perf_counter() - start
+
+
+def dataset_ids(server) -> Dict[str, List[str]]:
+    ids = {}
+    for kind in ("alerts", "disasters", "evacuation_centers", "knowledge_cards"):
+        snapshot = server.dataset_store.get(f"{kind}.json")
+        ids[kind] = [record["id"] for record in (snapshot.data if snapshot else ()) if record.get("id")]
+    return ids
+
+
+def print_table(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    header = f"{'route':<42} {'count':>7} {'err':>5} {'rps':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    if baseline:
+        header += f" {'p95 vs base':>12}"
+    print(header, file=sys.stderr)
+    rows = list(result["routes"].items()) + [("TOTAL", result["total"])]
+    for label, stats in rows:
+        latency = stats["latency_ms"]
+        line = (f"{label:<42} {stats['count']:>7} {stats['errors']:>5} {stats['rps']:>9.1f} "
+                f"{latency['p50']:>8.2f} {latency['p95']:>8.2f} {latency['p99']:>8.2f} {latency['max']:>8.2f}")
+        if baseline:
+            base = baseline["total"] if label == "TOTAL" else baseline["routes"].get(label)
+            if base and base["latency_ms"]["p95"]:
+                line += f" {(latency['p95'] / base['latency_ms']['p95'] - 1) * 100:>+11.1f}%"
+        print(line, file=sys.stderr)
+
+
+async def bench(args, data_dir: Path, db_name: str, spool_dir: str) -> Dict[str, Any]:
+    # server reads its configuration at import time
+    os.environ.update({
+        "MOCK_DATA_DIR": str(data_dir),
+        "REPORT_SPOOL_DIR": spool_dir,
+        "DATA_RELOAD_INTERVAL": "0",
+        "GEMINI_API_KEY": "",
+        "GEMINI_FAKE_MODEL": "1",
+        "GEMINI_FAKE_LATENCY": str(args.ai_latency),
+        "MONGO_URL": args.mongo_url,
+        "DB_NAME": db_name,
+    })
+    import httpx
+    import server
+
+    if args.mongomock:
+        from mongomock_motor import AsyncMongoMockClient
+        server.db = AsyncMongoMockClient(tz_aware=True)[db_name]
+        server.report_queue.collection = server.db.community_reports
+
+    start = time.perf_counter()
+    await server.app.router.startup()
+    load_seconds = time.perf_counter() - start
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            ids = dataset_ids(server)
+            if args.warmup:
+                await run_users(client, Recorder(), ids, parse_mix(args.mix),
+                                argparse.Namespace(**{**vars(args), "duration": args.warmup, "scenarios": 0}))
+            recorder = Recorder()
+            elapsed = await run_users(client, recorder, ids, parse_mix(args.mix), args)
+    finally:
+        await server.app.router.shutdown()
+        if not args.mongomock:
+            from pymongo import MongoClient
+            MongoClient(args.mongo_url).drop_database(db_name)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mongo": "mongomock" if args.mongomock else "server",
+            "records": args.records,
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 3),
+            "mix": args.mix,
+            "report_burst": args.report_burst,
+            "ai_latency_s": args.ai_latency,
+            "seed": args.seed,
+            "startup_s": round(load_seconds, 3),
+        },
+        **recorder.summary(elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--mongomock", action="store_true", help="use mongomock instead of a server")
+    parser.add_argument("--records", type=int, default=10_000, help="records per list dataset")
+    parser.add_argument("--data-dir", type=Path, help="reuse a directory written by synthetic_data.py")
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds, unless --scenarios is given")
+    parser.add_argument("--scenarios", type=int, default=0, help="stop after this many scenarios instead")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unrecorded load first")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--report-burst", type=int, default=50, help="reports per ingestion burst")
+    parser.add_argument("--ai-latency", type=float, default=0.2, help="fake model latency in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="write the JSON result here instead of stdout")
+    parser.add_argument("--baseline", type=Path, help="earlier JSON result to compare p95 against")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+
+    with tempfile.TemporaryDirectory(prefix="bench-api-") as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = Path(tmp) / "data"
+            start = time.perf_counter()
+            generate(data_dir, args.records, seed=args.seed)
+            print(f"generated {args.records} records per dataset in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        db_name = f"bench_api_{uuid.uuid4().hex[:8]}"
+        result = asyncio.run(bench(args, data_dir, db_name, str(Path(tmp) / "spool")))
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_table(result, baseline)
+    document = json.dumps(result, indent=2)
+    if args.output:
+        args.output.write_text(document + "\n")
+    else:
+        print(document)
+
+
+if __name__ == "__main__":
+    main()
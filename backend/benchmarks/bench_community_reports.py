@@ -0,0 +1,119 @@
+"""Offset vs. keyset pagination of community reports on a large collection.
+
+Seeds a throwaway database with synthetic reports, creates the listing
+indexes, then times first/deep pages with skip() and with the (timestamp, id)
+cursor, plus filtered and time-range queries.
+
+Run from backend/:
+    python benchmarks/bench_community_reports.py --mongo-url mongodb://localhost:27017 --count 1000000
+    python benchmarks/bench_community_reports.py --mongomock --count 20000   # no server needed, no real indexes
+"""
+import argparse
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from community_reports import INDEXES, SORT, build_query  # noqa: E402
+from cursors import encode_cursor  # noqa: E402
+
+REPORT_TYPES = ["flood", "cyclone", "fire", "landslide", "heatwave", "road_block"]
+STATUSES = ["pending", "verified", "resolved"]
+
+
+def seed(collection, count: int, batch: int = 10_000) -> None:
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for offset in range(0, count, batch):
+        collection.insert_many([
+            {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "reporter_name": f"reporter {i}",
+                "location": f"Ward {i % 500}",
+                "report_type": rng.choice(REPORT_TYPES),
+                "description": "Water logging on the main road",
+                "severity": rng.choice(["low", "medium", "high"]),
+                "coordinates": {"lat": 19 + rng.random() * 3, "lon": 84 + rng.random() * 3},
+                # Many reports share a second, so the id tie-breaker matters
+                "timestamp": start + timedelta(seconds=i // 3),
+                "status": rng.choice(STATUSES),
+            }
+            for i in range(offset, min(count, offset + batch))
+        ], ordered=False)
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def offset_page(collection, query, page: int, limit: int):
+    return list(collection.find(query, {"_id": 0}).sort(SORT).skip(page * limit).limit(limit))
+
+
+def keyset_page(collection, query, limit: int):
+    return list(collection.find(query, {"_id": 0}).sort(SORT).limit(limit))
+
+
+def cursor_at(collection, query, position: int) -> str:
+    doc = collection.find(query, {"_id": 0, "id": 1, "timestamp": 1}).sort(SORT).skip(position).limit(1).next()
+    return encode_cursor(doc["timestamp"], doc["id"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--mongomock", action="store_true", help="use mongomock instead of a server")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient(tz_aware=True)
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_url, tz_aware=True)
+    db_name = f"bench_reports_{uuid.uuid4().hex[:8]}"
+    collection = client[db_name].community_reports
+
+    try:
+        start = time.perf_counter()
+        seed(collection, args.count)
+        collection.create_indexes(INDEXES)
+        print(f"seeded {args.count} reports + indexes in {time.perf_counter() - start:.1f}s")
+
+        everything = build_query()
+        flooded = build_query(status="verified", report_type="flood")
+        recent = build_query(since=datetime(2024, 1, 2, tzinfo=timezone.utc), until=datetime(2024, 1, 3, tzinfo=timezone.utc))
+
+        print(f"{'query':<42} {'ms':>9}")
+        rows = [("first page", lambda: keyset_page(collection, everything, args.limit))]
+        for depth in (0.1, 0.5, 0.9):
+            position = int(args.count * depth)
+            page = position // args.limit
+            cursor_query = build_query(cursor=cursor_at(collection, everything, position - 1))
+            rows.append((f"offset page at {depth:.0%} (skip {page * args.limit})",
+                         lambda page=page: offset_page(collection, everything, page, args.limit)))
+            rows.append((f"keyset page at {depth:.0%}",
+                         lambda q=cursor_query: keyset_page(collection, q, args.limit)))
+        rows.append(("status + report_type filter", lambda: keyset_page(collection, flooded, args.limit)))
+        rows.append(("since/until one-day window", lambda: keyset_page(collection, recent, args.limit)))
+        rows.append(("by id (unique index)", lambda: collection.find_one({"id": "missing"})))
+
+        for label, fn in rows:
+            print(f"{label:<42} {timed(fn):>9.2f}")
+    finally:
+        client.drop_database(db_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Worker startup time and memory with and without the shared data plane.
+
+Scales mock_data up with synthetic_data.py and publishes it once with
+data_plane_loader.py. It then starts fresh worker processes that import the
+server and run its startup hooks, first parsing the files themselves and then
+mapping the loader's snapshot, and each encodes every dataset response once.
+Reported per worker:
+- startup time
+- private memory (RssAnon), which every extra worker pays again
+- file-backed memory (RssFile), page cache that the workers share
+
+Run from backend/:
+    python benchmarks/bench_data_plane.py --records 50000 --workers 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.synthetic_data import generate  # noqa: E402
+
+
+def memory_mb() -> dict:
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                fields[key] = round(int(value.split()[0]) / 1024, 1)
+    return fields
+
+
+async def probe() -> dict:
+    """Runs inside a worker process: start the app, warm every dataset response, report"""
+    started = time.perf_counter()
+    import server
+    imported = time.perf_counter()
+    await server.app.router.startup()
+    ready = time.perf_counter()
+    for snapshot in server.dataset_store.snapshots():
+        server.response_cache.get(snapshot.name)
+    result = {
+        "store": type(server.dataset_store).__name__,
+        "datasets": len(server.dataset_store.snapshots()),
+        "import_s": round(imported - started, 3),
+        "startup_s": round(ready - imported, 3),
+        **memory_mb(),
+    }
+    await server.app.router.shutdown()
+    return result
+
+
+def run_worker(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--probe"], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20_000, help="records per list dataset")
+    parser.add_argument("--data-dir", type=Path, help="reuse a directory written by synthetic_data.py")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes started per mode")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(asyncio.run(probe())))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="bench-plane-") as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = Path(tmp) / "data"
+            generate(data_dir, args.records)
+        env = {
+            **os.environ,
+            "MOCK_DATA_DIR": str(data_dir),
+            "REPORT_SPOOL_DIR": str(Path(tmp) / "spool"),
+            "DATA_RELOAD_INTERVAL": "0",
+            "MONGO_URL": os.environ.get("MONGO_URL", "mongodb://localhost:1"),
+            "DB_NAME": os.environ.get("DB_NAME", "bench_data_plane"),
+        }
+        env.pop("DATA_PLANE_DIR", None)
+        plane = Path(tmp) / "plane"
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "data_plane_loader.py", "--dir", str(plane), "--once"],
+                       cwd=BACKEND_DIR, env=env, capture_output=True, check=True)
+        snapshot_mb = sum(p.stat().st_size for p in plane.glob("snapshot-*.bin")) / 2**20
+        print(f"loader published {snapshot_mb:.1f} MB in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'mode':<8} {'worker':>6} {'import s':>9} {'startup s':>10} {'RSS MB':>8} {'anon MB':>8} {'file MB':>8}")
+        for mode, extra in (("files", {}), ("mapped", {"DATA_PLANE_DIR": str(plane)})):
+            for worker in range(args.workers):
+                r = run_worker({**env, **extra})
+                print(f"{mode:<8} {worker:>6} {r['import_s']:>9.2f} {r['startup_s']:>10.2f} "
+                      f"{r.get('VmRSS', 0):>8.1f} {r.get('RssAnon', 0):>8.1f} {r.get('RssFile', 0):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
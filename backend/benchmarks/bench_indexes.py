@@ -0,0 +1,73 @@
+"""Lookup latency of RecordIndex vs. the old linear scans as record count grows.
+
+Run from backend/:  python benchmarks/bench_indexes.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_store import freeze  # noqa: E402
+from indexes import RecordIndex  # noqa: E402
+
+TYPES = ["Cyclone Shelter", "School Building", "Community Hall", "Relief Camp", "Hospital"]
+STATUSES = ["Active", "Standby", "Full", "Closed"]
+
+
+def make_centers(count: int):
+    rng = random.Random(count)
+    return freeze([
+        {
+            "id": f"center-{i:07d}",
+            "name": f"Shelter {i}",
+            "type": rng.choice(TYPES),
+            "status": rng.choice(STATUSES),
+            "capacity": rng.randint(100, 5000),
+        }
+        for i in range(count)
+    ])
+
+
+def linear_get(data, record_id):
+    return next((c for c in data if c.get('id') == record_id), None)
+
+
+def linear_filter(data, shelter_type, status):
+    data = [c for c in data if c.get('type', '').lower() == shelter_type.lower()]
+    return [c for c in data if c.get('status', '').lower() == status.lower()]
+
+
+def best_of(fn, number: int) -> float:
+    """Best per-call time in microseconds over 5 repeats"""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    header = f"{'records':>9} {'build ms':>9} {'id scan us':>11} {'id index us':>12} {'filter scan us':>15} {'filter index us':>16}"
+    print(header)
+    print("-" * len(header))
+    for size in args.sizes:
+        data = make_centers(size)
+        build = best_of(lambda: RecordIndex(data, ("type", "status")), 1) / 1000
+        index = RecordIndex(data, ("type", "status"))
+        target = data[-1]["id"]  # worst case for the scan
+        scan_number = max(1, 100_000 // size)
+
+        id_scan = best_of(lambda: linear_get(data, target), scan_number)
+        id_index = best_of(lambda: index.get(target), 100_000)
+        filter_scan = best_of(lambda: linear_filter(data, "relief camp", "full"), scan_number)
+        filter_index = best_of(lambda: index.filter(type="relief camp", status="full"), scan_number)
+
+        assert index.filter(type="relief camp", status="full") == linear_filter(data, "relief camp", "full")
+        print(f"{size:>9} {build:>9.1f} {id_scan:>11.1f} {id_index:>12.3f} {filter_scan:>15.1f} {filter_index:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
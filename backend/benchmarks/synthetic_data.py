@@ -0,0 +1,154 @@
+"""Scale the mock_data files up to a synthetic data directory.
+
+Each list dataset is grown to N records by cloning the real records with:
+- fresh ids
+- jittered coordinates
+- timestamps spread over the past year
+- varied severities and magnitudes
+
+Object datasets (weather, AQI, cyclone, agriculture) are copied as they
+are, apart from the AQI station list, which is scaled like a list.
+Output is deterministic for a given seed.
+
+Run from backend/:
+    python benchmarks/synthetic_data.py --out /tmp/suraksha-data --records 100000
+"""
+import argparse
+import copy
+import json
+import random
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+SOURCE_DIR = Path(__file__).resolve().parent.parent / 'mock_data'
+
+LIST_DATASETS = (
+    'alerts.json',
+    'disasters.json',
+    'earthquake_data.json',
+    'evacuation_centers.json',
+    'flood_zones.json',
+    'knowledge_cards.json',
+)
+
+EPOCH = datetime(2024, 8, 15, 14, 30, tzinfo=timezone.utc)
+SEVERITIES = ('red', 'orange', 'yellow', 'green')
+RISK_LEVELS = ('Low', 'Moderate', 'High', 'Very High')
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _jitter(rng: random.Random, point: Dict[str, Any], degrees: float = 1.5) -> Dict[str, Any]:
+    return {'lat': round(point['lat'] + rng.uniform(-degrees, degrees), 4),
+            'lon': round(point['lon'] + rng.uniform(-degrees, degrees), 4)}
+
+
+def _alert(record, i, rng):
+    record['severity'] = rng.choice(SEVERITIES)
+    issued = EPOCH - timedelta(minutes=rng.randrange(365 * 24 * 60))
+    record['issued_at'] = _iso(issued)
+    record['valid_until'] = _iso(issued + timedelta(hours=rng.choice((6, 12, 24, 48))))
+
+
+def _disaster(record, i, rng):
+    record['name'] = f"{record.get('name', 'Event')} #{i}"
+    record['date'] = (EPOCH - timedelta(days=rng.randrange(30 * 365))).strftime('%Y-%m-%d')
+    record['casualties'] = rng.randrange(0, 2000)
+    record['affected_population'] = rng.randrange(1000, 5_000_000)
+
+
+def _earthquake(record, i, rng):
+    record['magnitude'] = round(rng.uniform(1.5, 6.5), 1)
+    record['depth'] = rng.randrange(2, 120)
+    record['time'] = _iso(EPOCH - timedelta(seconds=rng.randrange(365 * 86400)))
+
+
+def _center(record, i, rng):
+    record['name'] = f"{record.get('name', 'Shelter')} #{i}"
+    record['capacity'] = rng.randrange(200, 8000)
+    record['current_occupancy'] = rng.randrange(0, record['capacity'] + 1)
+    record['status'] = rng.choice(('Active', 'Active', 'Standby', 'Full'))
+
+
+def _flood_zone(record, i, rng):
+    dlat, dlon = rng.uniform(-1.5, 1.5), rng.uniform(-1.5, 1.5)
+    record['coordinates'] = [[round(lat + dlat, 4), round(lon + dlon, 4)] for lat, lon in record['coordinates']]
+    record['risk_level'] = rng.choice(RISK_LEVELS)
+    record['current_water_level'] = round(record.get('danger_level', 20) - rng.uniform(-1.0, 4.0), 2)
+
+
+def _card(record, i, rng):
+    record['title'] = f"{record.get('title', 'Card')} ({i})"
+
+
+MUTATORS: Dict[str, Callable[[Dict[str, Any], int, random.Random], None]] = {
+    'alerts.json': _alert,
+    'disasters.json': _disaster,
+    'earthquake_data.json': _earthquake,
+    'evacuation_centers.json': _center,
+    'flood_zones.json': _flood_zone,
+    'knowledge_cards.json': _card,
+}
+
+
+def scale_records(templates: Sequence[Dict[str, Any]], count: int, rng: random.Random,
+                  mutate: Optional[Callable[[Dict[str, Any], int, random.Random], None]] = None) -> List[Dict[str, Any]]:
+    records = []
+    for i in range(count):
+        record = copy.deepcopy(templates[i % len(templates)])
+        prefix = str(record.get('id', 'rec')).rsplit('-', 1)[0]
+        record['id'] = f"{prefix}-{i + 1:07d}"
+        if isinstance(record.get('coordinates'), dict):
+            record['coordinates'] = _jitter(rng, record['coordinates'])
+        if mutate:
+            mutate(record, i, rng)
+        records.append(record)
+    return records
+
+
+def generate(out_dir: Path, records: int, datasets: Sequence[str] = LIST_DATASETS, seed: int = 42,
+             source_dir: Path = SOURCE_DIR) -> Dict[str, int]:
+    """Write the scaled data set; returns record counts per file"""
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts = {}
+    for path in sorted(source_dir.glob('*.json')):
+        if path.name in datasets:
+            templates = json.loads(path.read_text(encoding='utf-8'))
+            data = scale_records(templates, records, rng, MUTATORS.get(path.name))
+            counts[path.name] = len(data)
+        elif path.name == 'aqi_data.json':
+            data = json.loads(path.read_text(encoding='utf-8'))
+            data['stations'] = scale_records(data['stations'], min(records, 10_000), rng)
+            counts[path.name] = len(data['stations'])
+        else:
+            shutil.copyfile(path, out_dir / path.name)
+            continue
+        with open(out_dir / path.name, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--datasets", default=",".join(LIST_DATASETS), help="comma-separated list datasets to scale")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = generate(args.out, args.records, [d.strip() for d in args.datasets.split(",") if d.strip()], args.seed)
+    for name, count in counts.items():
+        print(f"{name:<28} {count:>9}", file=sys.stderr)
+    print(f"wrote {args.out} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Several API resources in one response, for high-latency clients.
+
+Each part of a bundle is resolved concurrently to an EncodedResponse, i.e.
+bytes already encoded and cached per data version. The bundle body is
+assembled by splicing those bytes, so nothing is re-encoded per request.
+Every part carries its own ETag. The client sends the ETags it holds in
+If-None-Match, and parts it already has are listed as unchanged and left
+out of the body.
+"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from cachetools import LRUCache
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+from data_store import DatasetStore
+from response_cache import EncodedResponse, ResponseCache, encode_json, etag_matches, make_etag
+
+logger = logging.getLogger(__name__)
+
+Resolver = Callable[[Dict[str, Any]], Awaitable[Optional[EncodedResponse]]]
+
+
+@dataclass(frozen=True)
+class BundlePart:
+    resolve: Resolver
+    # filter name -> converter for its query-string value, e.g. {"severity": str, "limit": int}
+    params: Dict[str, Callable[[str], Any]] = field(default_factory=dict)
+
+
+def int_between(low: int, high: int) -> Callable[[str], int]:
+    """Query-string converter enforcing the same bounds as the endpoint"""
+    def convert(value: str) -> int:
+        number = int(value)
+        if not low <= number <= high:
+            raise ValueError(value)
+        return number
+    return convert
+
+
+def dataset_part(cache: ResponseCache, name: str, path: str = "", default: Any = None) -> BundlePart:
+    """A dataset sub-path, served from the shared response cache"""
+    async def resolve(filters: Dict[str, Any]) -> Optional[EncodedResponse]:
+        return cache.get(name, path, default)
+    return BundlePart(resolve)
+
+
+def handler_part(
+    store: DatasetStore,
+    name: str,
+    handler: Callable[..., Awaitable[Any]],
+    params: Dict[str, Callable[[str], Any]],
+    cache_size: int = 256,
+) -> BundlePart:
+    """An endpoint handler called with the part's filters; results are cached per (version, filters)"""
+    encoded_cache: LRUCache = LRUCache(maxsize=cache_size)
+
+    async def resolve(filters: Dict[str, Any]) -> Optional[EncodedResponse]:
+        snapshot = store.get(name)
+        if snapshot is None:
+            return None
+        key = (snapshot.version, tuple(sorted(filters.items())))
+        encoded = encoded_cache.get(key)
+        if encoded is None:
+            body = encode_json(await handler(**filters))
+            encoded = EncodedResponse(body=body, etag=make_etag(body), version=snapshot.version)
+            encoded_cache[key] = encoded
+        return encoded
+    return BundlePart(resolve, params)
+
+
+def encoded_part(source: Callable[[], EncodedResponse]) -> BundlePart:
+    """A view that already keeps its own encoded response (e.g. the dashboard summary)"""
+    async def resolve(filters: Dict[str, Any]) -> Optional[EncodedResponse]:
+        return source()
+    return BundlePart(resolve)
+
+
+def value_part(source: Callable[[], Awaitable[Any]]) -> BundlePart:
+    """A value produced per request; encoded each time"""
+    async def resolve(filters: Dict[str, Any]) -> Optional[EncodedResponse]:
+        body = encode_json(await source())
+        return EncodedResponse(body=body, etag=make_etag(body), version=0)
+    return BundlePart(resolve)
+
+
+class Bundle:
+    def __init__(self, parts: Dict[str, BundlePart]):
+        self.parts = parts
+
+    def parse(self, include: Optional[str], query: Sequence[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """Requested parts and their filters ('alerts.severity=red'); raises 400 on unknown names"""
+        names = [n.strip() for n in (include or "").split(",") if n.strip()]
+        if not names:
+            raise HTTPException(status_code=400, detail=f"include is required (available: {', '.join(self.parts)})")
+        unknown = [n for n in names if n not in self.parts]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown bundle parts: {', '.join(unknown)}")
+
+        requested: Dict[str, Dict[str, Any]] = {name: {} for name in dict.fromkeys(names)}
+        for key, value in query:
+            part_name, _, param = key.rpartition(".")
+            if part_name not in requested:
+                continue
+            converter = self.parts[part_name].params.get(param)
+            if converter is None:
+                raise HTTPException(status_code=400, detail=f"Unknown filter '{key}'")
+            try:
+                requested[part_name][param] = converter(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid value for '{key}'")
+        return requested
+
+    async def _resolve(self, name: str, filters: Dict[str, Any]) -> Tuple[Optional[EncodedResponse], Optional[Dict[str, Any]]]:
+        try:
+            encoded = await self.parts[name].resolve(filters)
+        except HTTPException as e:
+            return None, {"status": e.status_code, "detail": e.detail}
+        except Exception as e:
+            logger.error(f"Bundle part {name} error: {str(e)}")
+            return None, {"status": 500, "detail": f"Unable to load {name}"}
+        if encoded is None:
+            return None, {"status": 500, "detail": f"Unable to load {name}"}
+        return encoded, None
+
+    async def respond(self, request: Request, include: Optional[str]) -> Response:
+        requested = self.parse(include, request.query_params.multi_items())
+        names = list(requested)
+        results = await asyncio.gather(*(self._resolve(name, requested[name]) for name in names))
+
+        if_none_match = request.headers.get("if-none-match")
+        chunks: List[bytes] = []
+        unchanged: List[str] = []
+        errors: Dict[str, Any] = {}
+        etags: List[str] = []
+        for name, (encoded, error) in zip(names, results):
+            if error is not None:
+                errors[name] = error
+                continue
+            etags.append(encoded.etag)
+            if if_none_match and encoded.etag in if_none_match:
+                unchanged.append(name)
+                continue
+            chunks.append(
+                json.dumps(name).encode("utf-8")
+                + b':{"etag":' + json.dumps(encoded.etag).encode("utf-8")
+                + b',"data":' + encoded.body + b"}"
+            )
+
+        etag = make_etag("\n".join(etags).encode("utf-8"))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag) or (not chunks and not errors):
+            # The whole bundle, or every part of it, is what the client already holds
+            return Response(status_code=304, headers=headers)
+        body = (
+            b'{"parts":{' + b",".join(chunks) + b'},"unchanged":' + encode_json(unchanged)
+            + b',"errors":' + encode_json(errors) + b"}"
+        )
+        return Response(content=body, media_type="application/json", headers=headers)
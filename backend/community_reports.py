@@ -0,0 +1,100 @@
+"""Query helpers and indexes for the community_reports collection.
+
+Reports are listed newest first with keyset (cursor) pagination on
+(timestamp, id), backed by compound indexes, so deep pages cost the same
+as the first one. Timestamps are stored as native BSON dates.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from cursors import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+REPORT_FIELDS = (
+    'id', 'reporter_name', 'location', 'report_type', 'description',
+    'severity', 'coordinates', 'timestamp', 'status',
+    'corroboration_count', 'last_corroborated_at',
+)
+
+# corroborated_by only makes corroboration_count idempotent; clients get the count
+DEFAULT_PROJECTION = {"_id": 0, "corroborated_by": 0}
+
+SORT = [("timestamp", DESCENDING), ("id", DESCENDING)]
+
+INDEXES = [
+    IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+    IndexModel(SORT, name="timestamp_id"),
+    IndexModel([("status", ASCENDING)] + SORT, name="status_timestamp_id"),
+    IndexModel([("report_type", ASCENDING)] + SORT, name="report_type_timestamp_id"),
+    IndexModel([("status", ASCENDING), ("report_type", ASCENDING)] + SORT, name="status_report_type_timestamp_id"),
+]
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Dict[str, int]]:
+    """Projection for a comma-separated field list; id and timestamp are always kept for the cursor"""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in REPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    projection = {"_id": 0, "id": 1, "timestamp": 1}
+    projection.update({f: 1 for f in requested})
+    return projection
+
+
+def build_query(
+    status: Optional[str] = None,
+    report_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if status:
+        query['status'] = status
+    if report_type:
+        query['report_type'] = report_type
+    if since or until:
+        query['timestamp'] = {}
+        if since:
+            query['timestamp']['$gte'] = since
+        if until:
+            query['timestamp']['$lt'] = until
+    if cursor:
+        timestamp, report_id = decode_cursor(cursor)
+        # Strictly after the cursor in (timestamp desc, id desc) order
+        query['$or'] = [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "id": {"$lt": report_id}},
+        ]
+    return query
+
+
+async def find_page(collection, query: Dict[str, Any], projection: Optional[Dict[str, int]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of reports plus the cursor for the next page (None on the last page)"""
+    docs = await collection.find(query, projection or DEFAULT_PROJECTION).sort(SORT).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last['timestamp'], last['id'])
+    return docs, next_cursor
+
+
+async def ensure_indexes(collection) -> None:
+    """Convert legacy ISO-string timestamps to dates and create the listing indexes"""
+    try:
+        migrated = await collection.update_many(
+            {"timestamp": {"$type": "string"}},
+            [{"$set": {"timestamp": {"$toDate": "$timestamp"}}}],
+        )
+        if migrated.modified_count:
+            logger.info(f"Converted {migrated.modified_count} community report timestamps to dates")
+        await collection.create_indexes(INDEXES)
+    except Exception as e:
+        logger.error(f"Unable to prepare community_reports indexes: {str(e)}")
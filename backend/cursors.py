@@ -0,0 +1,31 @@
+"""Opaque keyset cursors on (timestamp, id), shared by every newest-first listing.
+
+A cursor is the position of the last item of a page, as url-safe base64
+JSON. The next page starts strictly after it in (timestamp desc, id desc)
+order, so pages stay stable while new items arrive.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import Tuple
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp: datetime, item_id: str) -> str:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    raw = json.dumps([timestamp.isoformat(), item_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, item_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), str(item_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor(str(e))
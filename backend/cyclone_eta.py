@@ -0,0 +1,317 @@
+"""Closest approach and wind impact of the active cyclone at given points.
+
+The forecast track is interpolated once per cyclone_data.json version into
+a dense path at fixed time steps:
+- Positions are interpolated along great circles (slerp of unit vectors).
+- Wind speeds are interpolated linearly in time.
+
+The current position is the first point of the path. Its time is worked
+back from the storm's speed and its distance to the first forecast point.
+
+A batch of points is scored against the whole path in one pass:
+- Angular distances come from a dot product of unit vectors.
+- Winds at each point use a modified Rankine vortex around the centre.
+- Gale, storm and hurricane-force radii follow from that profile.
+
+Each point gets the time of closest approach, the peak wind it can expect
+and the window during which it is inside each wind radius.
+"""
+import math
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+
+from spatial import EARTH_RADIUS_KM
+
+STEP_MINUTES = 15
+RADIUS_OF_MAX_WIND_KM = 40.0
+DECAY_EXPONENT = 0.5  # v(r) = v_max * (R_max / r) ** x outside the eye wall
+CHUNK_POINTS = 2048   # bounds the points x path matrices to a few MB
+
+# km/h (34, 48 and 64 knots)
+WIND_THRESHOLDS = {"gale": 62.0, "storm": 89.0, "hurricane": 118.0}
+
+# Layers scored as a whole: name -> (dataset, fields copied into each result)
+ETA_LAYERS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'evacuation-centers': ('evacuation_centers.json', ('id', 'name', 'type', 'location')),
+    'flood-zones': ('flood_zones.json', ('id', 'river', 'location', 'risk_level')),
+}
+
+_YEAR = re.compile(r'\b(19|20)\d{2}\b')
+_TIME_FORMATS = ('%b %d, %I %p', '%b %d, %I:%M %p', '%b %d %I %p', '%d %b, %I %p')
+
+
+def unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """(n, 3) unit vectors of lat/lon degrees"""
+    lat, lon = np.radians(lats), np.radians(lons)
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def _to_lat_lon(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    lats = np.degrees(np.arcsin(np.clip(vectors[:, 2], -1.0, 1.0)))
+    lons = np.degrees(np.arctan2(vectors[:, 1], vectors[:, 0]))
+    return lats, lons
+
+
+def parse_track_time(label: Any, year: int) -> Optional[datetime]:
+    """'Aug 15, 6 PM' (in the given year) or an ISO timestamp"""
+    if not isinstance(label, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(label.replace('Z', '+00:00'))
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    except ValueError:
+        pass
+    for fmt in _TIME_FORMATS:
+        try:
+            return datetime.strptime(f"{label} {year}", f"{fmt} %Y").replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def wind_radius_km(max_wind: np.ndarray, threshold: float) -> np.ndarray:
+    """Radius out to which the vortex profile reaches threshold (0 if the storm is weaker)"""
+    with np.errstate(divide='ignore'):
+        radius = RADIUS_OF_MAX_WIND_KM * (max_wind / threshold) ** (1.0 / DECAY_EXPONENT)
+    return np.where(max_wind >= threshold, radius, 0.0)
+
+
+def _iso(seconds: float) -> str:
+    return datetime.fromtimestamp(float(seconds), tz=timezone.utc).isoformat()
+
+
+class CycloneTrack:
+    """Dense, time-interpolated path of the active cyclone"""
+
+    def __init__(self, data: Any, step_minutes: int = STEP_MINUTES):
+        cyclone = (data or {}).get('active_cyclone') or {}
+        self.name = cyclone.get('name')
+        self.category = cyclone.get('category')
+        year_match = _YEAR.search(str((cyclone.get('landfall_estimate') or {}).get('time', '')))
+        year = int(year_match.group(0)) if year_match else datetime.now(timezone.utc).year
+
+        knots: List[Tuple[float, float, float, float]] = []  # (epoch s, lat, lon, wind)
+        categories: List[Tuple[float, Optional[str]]] = []
+        for point in cyclone.get('forecast_track') or ():
+            moment = parse_track_time(point.get('time'), year)
+            if moment is None or point.get('lat') is None or point.get('lon') is None:
+                continue
+            knots.append((moment.timestamp(), float(point['lat']), float(point['lon']), float(point.get('wind') or 0)))
+            categories.append((moment.timestamp(), point.get('category')))
+        knots.sort()
+        self.categories = sorted(categories, key=lambda entry: entry[0])
+
+        current = cyclone.get('current_position') or {}
+        if current.get('lat') is not None and current.get('lon') is not None:
+            knots.insert(0, self._current_knot(cyclone, current, knots))
+
+        self.available = bool(knots)
+        if not knots:
+            return
+        times = np.asarray([k[0] for k in knots], dtype=np.float64)
+        keep = np.r_[True, np.diff(times) > 0]  # drop knots that do not move forward in time
+        times = times[keep]
+        vectors = unit_vectors(np.asarray([k[1] for k in knots])[keep], np.asarray([k[2] for k in knots])[keep])
+        winds = np.asarray([k[3] for k in knots], dtype=np.float64)[keep]
+        self.observed_at = float(times[0])
+
+        step = step_minutes * 60.0
+        self.times = np.arange(times[0], times[-1] + step / 2, step) if len(times) > 1 else times.copy()
+        self.times[-1] = times[-1]
+        self.vectors = self._slerp(times, vectors, self.times)
+        self.lats, self.lons = _to_lat_lon(self.vectors)
+        self.winds = np.interp(self.times, times, winds)
+        self.radii = {name: wind_radius_km(self.winds, threshold) for name, threshold in WIND_THRESHOLDS.items()}
+
+        # Per path step output, so scoring a point only picks indexes
+        self._iso_times = [_iso(t) for t in self.times.tolist()]
+        self._steps = [
+            {
+                "time": moment,
+                "eta_hours": self._hours(t),
+                "lat": round(lat, 4),
+                "lon": round(lon, 4),
+                "storm_wind_kmh": round(w, 1),
+                "storm_category": self.category_at(t),
+            }
+            for moment, t, lat, lon, w in zip(
+                self._iso_times, self.times.tolist(), self.lats.tolist(), self.lons.tolist(), self.winds.tolist()
+            )
+        ]
+
+    @staticmethod
+    def _current_knot(cyclone: Dict[str, Any], current: Dict[str, Any], knots: List[Tuple[float, ...]]) -> Tuple[float, ...]:
+        lat, lon = float(current['lat']), float(current['lon'])
+        wind = float((cyclone.get('intensity') or {}).get('wind_speed') or (knots[0][3] if knots else 0))
+        observed = parse_track_time(current.get('time') or cyclone.get('last_updated'), datetime.now(timezone.utc).year)
+        if observed is not None:
+            return observed.timestamp(), lat, lon, wind
+        if not knots:
+            return datetime.now(timezone.utc).timestamp(), lat, lon, wind
+        # Back off from the first forecast point at the storm's current speed
+        speed = float((cyclone.get('movement') or {}).get('speed') or 0)
+        first = unit_vectors(np.array([knots[0][1]]), np.array([knots[0][2]]))[0]
+        here = unit_vectors(np.array([lat]), np.array([lon]))[0]
+        distance = EARTH_RADIUS_KM * math.acos(min(1.0, float(first @ here)))
+        hours = distance / speed if speed > 0 else 0.0
+        return knots[0][0] - round(hours * 60.0) * 60.0, lat, lon, wind
+
+    @staticmethod
+    def _slerp(times: np.ndarray, vectors: np.ndarray, at: np.ndarray) -> np.ndarray:
+        if len(times) == 1:
+            return np.repeat(vectors, len(at), axis=0)
+        seg = np.clip(np.searchsorted(times, at, side='right') - 1, 0, len(times) - 2)
+        frac = ((at - times[seg]) / (times[seg + 1] - times[seg]))[:, None]
+        a, b = vectors[seg], vectors[seg + 1]
+        omega = np.arccos(np.clip(np.einsum('ij,ij->i', a, b), -1.0, 1.0))[:, None]
+        sin_omega = np.sin(omega)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slerped = (np.sin((1 - frac) * omega) * a + np.sin(frac * omega) * b) / sin_omega
+        out = np.where(sin_omega > 1e-12, slerped, a + frac * (b - a))
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+    def category_at(self, seconds: float) -> Optional[str]:
+        """Forecast category of the nearest track point at or before a time"""
+        category = self.category
+        for moment, name in self.categories:
+            if moment > seconds:
+                break
+            category = name or category
+        return category
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "observed_at": _iso(self.observed_at),
+            "forecast_until": _iso(self.times[-1]),
+            "path_points": int(len(self.times)),
+            "step_minutes": STEP_MINUTES,
+            "max_wind_radius_km": {name: round(float(r.max()), 1) for name, r in self.radii.items()},
+        }
+
+    def score(self, lats: np.ndarray, lons: np.ndarray) -> List[Dict[str, Any]]:
+        """Closest approach, peak wind and wind-radius windows for each point"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(lats), CHUNK_POINTS):
+            results.extend(self._score_chunk(lats[start:start + CHUNK_POINTS], lons[start:start + CHUNK_POINTS]))
+        return results
+
+    def _score_chunk(self, lats: np.ndarray, lons: np.ndarray) -> List[Dict[str, Any]]:
+        points = unit_vectors(lats, lons)
+        dist = EARTH_RADIUS_KM * np.arccos(np.clip(points @ self.vectors.T, -1.0, 1.0))  # (points, path)
+        rows = np.arange(len(points))
+
+        closest = dist.argmin(axis=1)
+        closest_km = dist[rows, closest]
+        with np.errstate(divide='ignore'):
+            # Rising linearly inside the radius of maximum wind, decaying outside it
+            profile = np.minimum(
+                dist / RADIUS_OF_MAX_WIND_KM,
+                (RADIUS_OF_MAX_WIND_KM / np.maximum(dist, 1e-9)) ** DECAY_EXPONENT,
+            )
+        wind = self.winds * profile
+        peak = wind.argmax(axis=1)
+        peak_wind = wind[rows, peak]
+
+        last = len(self.times) - 1
+        windows = []
+        for name, threshold in WIND_THRESHOLDS.items():
+            # Only points whose peak reaches the threshold have a window to look for
+            hit = np.flatnonzero(peak_wind >= threshold)
+            first = np.full(len(points), -1, dtype=np.int64)
+            final = np.full(len(points), -1, dtype=np.int64)
+            if len(hit):
+                inside = wind[hit] >= threshold
+                first[hit] = inside.argmax(axis=1)
+                final[hit] = last - inside[:, ::-1].argmax(axis=1)
+            windows.append((name, first.tolist(), final.tolist()))
+
+        steps, times = self._steps, self._iso_times
+        results = []
+        for i, (c, p, now_km, closest_i, peak_i) in enumerate(zip(
+            closest.tolist(), peak.tolist(), dist[:, 0].tolist(), closest_km.tolist(), peak_wind.tolist()
+        )):
+            impact: Dict[str, Any] = {}
+            level = None
+            for name, first, final in windows:
+                if first[i] < 0:
+                    impact[name] = None
+                    continue
+                level = name
+                impact[name] = {"from": times[first[i]], "until": times[final[i]], "eta_hours": steps[first[i]]["eta_hours"]}
+            results.append({
+                "distance_now_km": round(now_km, 2),
+                "approaching": c > 0 and closest_i < now_km,
+                "closest_approach": {"distance_km": round(closest_i, 2), **steps[c]},
+                "peak_wind": {"kmh": round(peak_i, 1), "time": times[p]},
+                "impact_level": level,
+                "wind_impact": impact,
+            })
+        return results
+
+    def _hours(self, seconds: float) -> float:
+        """Hours after the current (observed) position"""
+        return round((float(seconds) - self.observed_at) / 3600.0, 2)
+
+
+def layer_points(records: Sequence[Dict[str, Any]]) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """(positions, lats, lons) of records with a point or a coordinate list (its centroid)"""
+    positions, lats, lons = [], [], []
+    for position, record in enumerate(records):
+        coords = record.get('coordinates')
+        if isinstance(coords, dict):
+            lat, lon = coords.get('lat'), coords.get('lon')
+        elif coords:
+            points = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+            lat, lon = points.mean(axis=0)
+        else:
+            lat, lon = record.get('lat'), record.get('lon')
+        if lat is None or lon is None:
+            continue
+        positions.append(position)
+        lats.append(float(lat))
+        lons.append(float(lon))
+    return positions, np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+
+
+class CycloneImpact:
+    """Cyclone track per dataset version, plus layer scores cached per (track, layer) version"""
+
+    def __init__(self, store, layers: Dict[str, Tuple[str, Tuple[str, ...]]] = ETA_LAYERS, cache_size: int = 16):
+        self.store = store
+        self.layers = layers
+        store.register('cyclone_data.json', 'eta', CycloneTrack)
+        self._cache: LRUCache = LRUCache(maxsize=cache_size)
+
+    def track(self) -> Optional[CycloneTrack]:
+        return self.store.derived('cyclone_data.json', 'eta')
+
+    def layer(self, name: str) -> Optional[List[Dict[str, Any]]]:
+        """Every record of a layer with its closest approach and wind impact, nearest first"""
+        dataset, fields = self.layers[name]
+        track_snapshot, layer_snapshot = self.store.get('cyclone_data.json'), self.store.get(dataset)
+        if track_snapshot is None or layer_snapshot is None:
+            return None
+        key = (name, track_snapshot.version, layer_snapshot.version)
+        results = self._cache.get(key)
+        if results is None:
+            track = track_snapshot.derived.get('eta')
+            if track is None:
+                return None
+            records = layer_snapshot.data or ()
+            positions, lats, lons = layer_points(records)
+            scores = track.score(lats, lons) if track.available else []
+            results = [
+                {**{field: records[position].get(field) for field in fields}, **score}
+                for position, score in zip(positions, scores)
+            ]
+            results.sort(key=lambda result: result["closest_approach"]["distance_km"])
+            self._cache[key] = results
+        return results
@@ -0,0 +1,135 @@
+"""Materialized dashboard summary and Suraksha score.
+
+The summary is a pure function of five datasets. It is recomputed only when
+one of their versions changes and kept as pre-encoded bytes with an ETag,
+so the hot landing-page route just compares five version numbers.
+
+A region gets a view of its own, reading the region's partition of each
+input where it has one and the global dataset otherwise. Its score is
+recomputed only when one of those datasets changes.
+"""
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from data_store import DatasetStore
+from response_cache import EncodedResponse, encode_json, make_etag
+
+SUMMARY_INPUTS = (
+    'alerts.json',
+    'aqi_data.json',
+    'weather_data.json',
+    'cyclone_data.json',
+    'disasters.json',
+)
+
+
+def suraksha_score(red_alerts: int, orange_alerts: int, yellow_alerts: int, aqi_value: float, cyclone_active: bool) -> int:
+    """Simplified safety score from 0 (worst) to 100"""
+    score = 100
+
+    # Reduce score based on active alerts
+    score -= (red_alerts * 15 + orange_alerts * 10 + yellow_alerts * 5)
+
+    # Reduce score based on AQI
+    if aqi_value > 300:
+        score -= 20
+    elif aqi_value > 200:
+        score -= 15
+    elif aqi_value > 100:
+        score -= 10
+
+    # Reduce score if cyclone is active
+    if cyclone_active:
+        score -= 25
+
+    return max(0, min(100, score))  # Clamp between 0-100
+
+
+def build_summary(weather, aqi, alerts, disasters, cyclone, versions: Dict[str, int], region: Optional[str] = None) -> Dict[str, Any]:
+    by_severity = Counter(a.get('severity') for a in alerts)
+    red_alerts, orange_alerts, yellow_alerts = by_severity['red'], by_severity['orange'], by_severity['yellow']
+
+    summary = {
+        "suraksha_score": suraksha_score(
+            red_alerts, orange_alerts, yellow_alerts,
+            aqi['current']['aqi'],
+            bool(cyclone.get('active_cyclone')),
+        ),
+        "weather": weather['current'],
+        "aqi": aqi['current'],
+        "active_alerts_count": len(alerts),
+        "alerts_by_severity": {
+            "red": red_alerts,
+            "orange": orange_alerts,
+            "yellow": yellow_alerts
+        },
+        "total_historical_disasters": len(disasters),
+        "active_cyclone": cyclone.get('active_cyclone') is not None,
+        "last_updated": datetime.now(timezone.utc).isoformat(),
+        "versions": versions,
+    }
+    if region is not None:
+        summary["region"] = region
+    return summary
+
+
+class DashboardView:
+    def __init__(self, store: DatasetStore, region: Optional[str] = None):
+        self.store = store
+        self.region = region
+        self._key: Optional[Tuple[Tuple[str, int], ...]] = None
+        self._summary: Optional[Dict[str, Any]] = None
+        self._encoded: Optional[EncodedResponse] = None
+        self.recomputations = 0
+
+    def _current(self) -> Tuple[Tuple[Tuple[str, int], ...], Dict[str, Any]]:
+        snapshots = [self.store.get(self.store.resolve(name, self.region)) for name in SUMMARY_INPUTS]
+        missing = [name for name, snapshot in zip(SUMMARY_INPUTS, snapshots) if snapshot is None]
+        if missing:
+            raise LookupError(f"missing datasets: {', '.join(missing)}")
+        # Names too: a region file appearing replaces the global input without a version bump
+        key = tuple((snapshot.name, snapshot.version) for snapshot in snapshots)
+        if key != self._key:
+            data = dict(zip(SUMMARY_INPUTS, (snapshot.data for snapshot in snapshots)))
+            versions = {snapshot.name: snapshot.version for snapshot in snapshots}
+            summary = build_summary(
+                data['weather_data.json'],
+                data['aqi_data.json'],
+                data['alerts.json'],
+                data['disasters.json'],
+                data['cyclone_data.json'],
+                versions,
+                self.region,
+            )
+            body = encode_json(summary)
+            # Versions only grow, so their sum moves whenever any input changes
+            self._summary = summary
+            self._encoded = EncodedResponse(body=body, etag=make_etag(body), version=sum(v for _, v in key))
+            self._key = key
+            self.recomputations += 1
+        return self._key, self._summary
+
+    def summary(self) -> Dict[str, Any]:
+        return self._current()[1]
+
+    def encoded(self) -> EncodedResponse:
+        self._current()
+        return self._encoded
+
+
+class RegionalDashboards:
+    """One DashboardView per region, created on its first request"""
+
+    def __init__(self, store: DatasetStore):
+        self.store = store
+        self._views: Dict[str, DashboardView] = {}
+
+    def view(self, region: str) -> DashboardView:
+        view = self._views.get(region)
+        if view is None:
+            view = self._views[region] = DashboardView(self.store, region)
+        return view
+
+    def recomputations(self) -> Dict[str, int]:
+        return {region: view.recomputations for region, view in sorted(self._views.items())}
@@ -0,0 +1,273 @@
+"""Snapshot files through which one loader process feeds every worker.
+
+With several uvicorn/gunicorn workers, each would otherwise parse every JSON
+file, build every index and encode every response itself. Instead a single
+loader (data_plane_loader.py) does that once per change and writes a
+generation file into DATA_PLANE_DIR:
+
+    blobs...  | header (JSON) | trailer: header offset, header length, magic
+
+For each dataset the file holds:
+- the JSON response bodies of the whole dataset and of each top-level key,
+  with their ETags
+- a pickle of the parsed data together with its derived indexes, so the
+  records the indexes point at stay shared
+
+The loader writes a file under a temporary name, renames it into place and
+then atomically replaces the CURRENT pointer. Workers mmap the file that
+CURRENT names, read-only. The response bodies are served straight from the
+mapping, so every worker shares the same page-cache pages for them. Workers
+unpickle data and indexes instead of parsing and rebuilding them.
+
+Switching generations works like any hot reload: changed datasets are
+installed one by one, and an old mapping stays valid until the last response
+using it is released. Only the loader may be able to write DATA_PLANE_DIR,
+since workers unpickle what they find there.
+"""
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from data_store import DatasetSnapshot, DatasetStore, split_regional
+from response_cache import encode_json, make_etag
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SSDPLAN1'
+TRAILER = struct.Struct('<QQ8s')
+CURRENT = 'CURRENT'
+PREFIX = 'snapshot-'
+SUFFIX = '.bin'
+
+Span = Tuple[int, int]  # (offset, length) in the mapped file
+
+
+def encoded_parts(data: Any) -> Dict[str, Any]:
+    """Sub-paths pre-encoded by the loader: the whole dataset and each top-level key"""
+    parts = {'': data}
+    if isinstance(data, dict):
+        parts.update((key, value) for key, value in data.items() if isinstance(key, str) and '.' not in key)
+    return parts
+
+
+def _generation(path: Path) -> int:
+    try:
+        return int(path.name[len(PREFIX):-len(SUFFIX)])
+    except ValueError:
+        return -1
+
+
+class MappedSnapshot:
+    """One generation file, mapped read-only"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offset, length, magic = TRAILER.unpack_from(self._map, len(self._map) - TRAILER.size)
+        if magic != MAGIC:
+            raise ValueError(f"{path.name} is not a data plane snapshot")
+        self.header = json.loads(self._map[offset:offset + length])
+        self.generation: int = self.header['generation']
+        self.datasets: Dict[str, Dict[str, Any]] = self.header['datasets']
+        self._view = memoryview(self._map)
+
+    def view(self, span: Span) -> memoryview:
+        offset, length = span
+        return self._view[offset:offset + length]
+
+    def source(self, name: str) -> Optional[str]:
+        """ETag of the whole dataset, which changes exactly when its data does"""
+        entry = self.datasets.get(name)
+        return entry['parts'][''][2] if entry else None
+
+    def load(self, name: str) -> Tuple[Any, Dict[str, Any]]:
+        """(data, derived) of a dataset"""
+        return pickle.loads(self.view(self.datasets[name]['state']))
+
+    def part(self, name: str, path: str) -> Optional[Tuple[memoryview, str]]:
+        entry = self.datasets.get(name)
+        found = entry['parts'].get(path) if entry else None
+        if found is None:
+            return None
+        offset, length, etag = found
+        return self.view((offset, length)), etag
+
+
+def _picklable(name: str, derived: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        pickle.dumps(derived, protocol=pickle.HIGHEST_PROTOCOL)
+        return derived
+    except Exception:
+        pass
+    kept = {}
+    for key, value in derived.items():
+        try:
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"{key} of {name} cannot be shared; each worker rebuilds it: {str(e)}")
+            continue
+        kept[key] = value
+    return kept
+
+
+class DataPlanePublisher:
+    """Loader side: writes the store's current snapshots as a new generation file"""
+
+    def __init__(self, store: DatasetStore, directory: Path, keep: int = 3):
+        self.store = store
+        self.directory = Path(directory)
+        self.keep = max(2, keep)  # never delete the file CURRENT pointed at a moment ago
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = [_generation(path) for path in self.directory.glob(f'{PREFIX}*{SUFFIX}')]
+        # Continue numbering across loader restarts so workers never see a reused name
+        self.generation = max(existing, default=0)
+
+    def publish(self) -> Path:
+        self.generation += 1
+        path = self.directory / f"{PREFIX}{self.generation:08d}{SUFFIX}"
+        tmp = path.with_suffix('.tmp')
+        datasets: Dict[str, Dict[str, Any]] = {}
+        with open(tmp, 'wb') as f:
+            def blob(body: bytes) -> Span:
+                offset = f.tell()
+                f.write(body)
+                return offset, len(body)
+
+            for snapshot in self.store.snapshots():
+                parts = {}
+                for sub_path, value in encoded_parts(snapshot.data).items():
+                    body = encode_json(value)
+                    parts[sub_path] = [*blob(body), make_etag(body)]
+                derived = _picklable(snapshot.name, dict(snapshot.derived))
+                datasets[snapshot.name] = {
+                    "version": snapshot.version,
+                    "mtime_ns": snapshot.mtime_ns,
+                    "size": snapshot.size,
+                    "parts": parts,
+                    "state": blob(pickle.dumps((snapshot.data, derived), protocol=pickle.HIGHEST_PROTOCOL)),
+                }
+            header = json.dumps({
+                "generation": self.generation,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "datasets": datasets,
+            }).encode('utf-8')
+            offset, length = blob(header)
+            f.write(TRAILER.pack(offset, length, MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        pointer = self.directory / f"{CURRENT}.tmp"
+        pointer.write_text(path.name, encoding='utf-8')
+        os.replace(pointer, self.directory / CURRENT)
+        self._prune()
+        logger.info(f"Published data plane generation {self.generation} ({len(datasets)} datasets, {path.stat().st_size} bytes)")
+        return path
+
+    def _prune(self) -> None:
+        files = sorted(self.directory.glob(f'{PREFIX}*{SUFFIX}'), key=_generation)
+        for path in files[:-self.keep]:
+            # Workers still mapping it keep their pages; the name just goes away
+            path.unlink(missing_ok=True)
+
+
+class MappedDatasetStore(DatasetStore):
+    """Worker side: a DatasetStore fed from the loader's generation files instead of mock_data/"""
+
+    def __init__(self, directory: Path, poll_interval: float = 2.0, regions: Optional[Iterable[str]] = None):
+        super().__init__(directory, poll_interval=poll_interval, regions=regions)
+        self._mapping: Optional[MappedSnapshot] = None
+        self._sources: Dict[str, str] = {}
+        self._parts: Dict[str, Tuple[int, MappedSnapshot]] = {}
+
+    @property
+    def generation(self) -> Optional[int]:
+        return self._mapping.generation if self._mapping else None
+
+    def _remap(self) -> bool:
+        """Map the generation CURRENT points at; False when it is already mapped (or unavailable)"""
+        try:
+            name = (self.data_dir / CURRENT).read_text(encoding='utf-8').strip()
+        except OSError:
+            return False
+        if self._mapping is not None and self._mapping.path.name == name:
+            return False
+        try:
+            mapping = MappedSnapshot(self.data_dir / name)
+        except (OSError, ValueError) as e:
+            logger.error(f"Unable to map data plane snapshot {name}: {str(e)}")
+            return False
+        self._mapping = mapping
+        return True
+
+    def _files(self) -> List[str]:
+        if self._mapping is None:
+            return []
+        return sorted(name for name in self._mapping.datasets if self.serves(split_regional(name)[0]))
+
+    def _parse(self, name: str) -> Optional[DatasetSnapshot]:
+        mapping = self._mapping
+        if mapping is None or name not in mapping.datasets:
+            return None
+        try:
+            data, derived = mapping.load(name)
+        except Exception as e:
+            logger.error(f"Error loading {name} from {mapping.path.name}: {str(e)}")
+            return None
+
+        entry = mapping.datasets[name]
+        previous = self._snapshots.get(name)
+        snapshot = DatasetSnapshot(
+            name=name,
+            data=data,
+            version=previous.version + 1 if previous else 1,
+            mtime_ns=entry['mtime_ns'],
+            size=entry['size'],
+            loaded_at=datetime.now(timezone.utc),
+            derived=derived,
+        )
+        for key, builder in self._builders_for(name).items():
+            if key not in snapshot.derived:
+                self._build(snapshot, key, builder)
+        self._sources[name] = mapping.source(name)
+        self._parts[name] = (snapshot.version, mapping)
+        return snapshot
+
+    def load_all(self) -> None:
+        self._remap()
+        if self._mapping is None:
+            logger.warning(f"No data plane snapshot in {self.data_dir} yet; waiting for the loader")
+        super().load_all()
+
+    def _changed(self) -> List[DatasetSnapshot]:
+        if not self._remap():
+            return []
+        changed = []
+        for name in self._files():
+            if name in self._snapshots and self._sources.get(name) == self._mapping.source(name):
+                # Same bytes in the new file: move over so the old mapping can be released
+                self._parts[name] = (self._snapshots[name].version, self._mapping)
+                continue
+            snapshot = self._read(name)
+            if snapshot is not None:
+                changed.append(snapshot)
+        return changed
+
+    def _drop(self, name: str) -> None:
+        super()._drop(name)
+        self._sources.pop(name, None)
+        self._parts.pop(name, None)
+
+    def encoded_part(self, name: str, path: str, version: int) -> Optional[Tuple[memoryview, str]]:
+        found = self._parts.get(name)
+        # Only for the version being served: a newer generation may be mapped but not installed yet
+        if found is None or found[0] != version:
+            return None
+        return found[1].part(name, path)
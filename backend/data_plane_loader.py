@@ -0,0 +1,60 @@
+"""Build the datasets once and publish them to the workers through DATA_PLANE_DIR.
+
+Run one loader per host next to the API workers, with the same environment:
+    DATA_PLANE_DIR=/dev/shm/suraksha python data_plane_loader.py
+    DATA_PLANE_DIR=/dev/shm/suraksha uvicorn server:app --workers 4
+
+The loader registers exactly the indexes the server does, because it builds
+them from the server's own store. It then republishes whenever a file under
+mock_data/ changes.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+
+# server must build a file-backed store here, not map the snapshots we are about to write
+os.environ['DATA_PLANE_ROLE'] = 'loader'
+
+import server  # noqa: E402
+from data_plane import DataPlanePublisher  # noqa: E402
+
+
+async def run(publisher: DataPlanePublisher, interval: float) -> None:
+    store = publisher.store
+    store.load_all()
+    await asyncio.to_thread(publisher.publish)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await store.check_for_changes():
+                await asyncio.to_thread(publisher.publish)
+        except Exception as e:
+            logging.error(f"Data plane loader error: {str(e)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=os.environ.get('DATA_PLANE_DIR'), help="defaults to $DATA_PLANE_DIR")
+    parser.add_argument("--interval", type=float, default=float(os.environ.get('DATA_RELOAD_INTERVAL', '2')))
+    parser.add_argument("--keep", type=int, default=3, help="generation files kept for workers still switching")
+    parser.add_argument("--once", action="store_true", help="publish one generation and exit")
+    args = parser.parse_args()
+    if args.dir is None:
+        parser.error("--dir or DATA_PLANE_DIR is required")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    publisher = DataPlanePublisher(server.dataset_store, args.dir, keep=args.keep)
+    if args.once:
+        started = time.perf_counter()
+        server.dataset_store.load_all()
+        path = publisher.publish()
+        logging.info(f"Wrote {path} in {time.perf_counter() - started:.1f}s")
+        return
+    asyncio.run(run(publisher, args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""In-memory store for the JSON datasets under mock_data/.
+
+Every file is parsed once and kept as an immutable snapshot. A background
+task polls file mtimes and swaps in a freshly parsed snapshot when a file
+changes, so request handlers never touch the disk: a dataset that is missing
+or fails to parse is simply absent until the watcher sees a new version of
+the file, and a dataset whose file is deleted is dropped.
+
+Region partitions live under mock_data/regions/<region>/ and are loaded as
+datasets of their own, named e.g. "regions/cuttack/alerts.json". Each has
+its own version, derived structures and cache entries, so reloading one
+district leaves every other region untouched. A region directory only needs
+the files it overrides; the rest are read from the global files. A store can
+be pinned to a subset of regions and then never loads the others.
+"""
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+REGIONS_DIR = 'regions'
+
+
+class FrozenDict(dict):
+    """dict that refuses mutation; still a dict for JSON encoding"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("dataset snapshots are read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert parsed JSON into read-only containers"""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    name: str
+    data: Any
+    version: int
+    mtime_ns: int
+    size: int
+    loaded_at: datetime
+    # Structures computed from `data` at load time (indexes, etc.), keyed by builder name
+    derived: Dict[str, Any] = field(default_factory=dict, compare=False)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "loaded_at": self.loaded_at.isoformat(),
+            "modified_at": datetime.fromtimestamp(self.mtime_ns / 1e9, tz=timezone.utc).isoformat(),
+            "size_bytes": self.size,
+        }
+
+
+def regional_name(region: str, name: str) -> str:
+    return f"{REGIONS_DIR}/{region}/{name}"
+
+
+def split_regional(name: str) -> Tuple[Optional[str], str]:
+    """(region, file name) of a dataset name; region is None for global datasets"""
+    parts = name.split('/')
+    if len(parts) == 3 and parts[0] == REGIONS_DIR:
+        return parts[1], parts[2]
+    return None, name
+
+
+Listener = Callable[[DatasetSnapshot, Optional[DatasetSnapshot]], None]
+Builder = Callable[[Any], Any]
+LoadObserver = Callable[[str, float, bool], None]  # (name, seconds, succeeded)
+
+
+class DatasetStore:
+    """Holds one snapshot per JSON file and hot-reloads them on change"""
+
+    def __init__(self, data_dir: Path, poll_interval: float = 2.0, regions: Optional[Iterable[str]] = None):
+        self.data_dir = Path(data_dir)
+        self.poll_interval = poll_interval
+        # None serves every region found on disk
+        self.pinned_regions = frozenset(regions) if regions else None
+        self._snapshots: Dict[str, DatasetSnapshot] = {}
+        self._region_files: Dict[str, Set[str]] = {}
+        # (mtime_ns, size) of files that failed to parse, so the watcher retries only once they change
+        self._failed: Dict[str, Tuple[int, int]] = {}
+        self._listeners: List[Listener] = []
+        self._builders: Dict[str, Dict[str, Builder]] = {}
+        self._regional_builders: Dict[str, Dict[str, Builder]] = {}
+        self._load_observers: List[LoadObserver] = []
+        self._watch_task: Optional[asyncio.Task] = None
+
+    # ---- loading ----
+
+    def serves(self, region: Optional[str]) -> bool:
+        return region is None or self.pinned_regions is None or region in self.pinned_regions
+
+    def _files(self) -> List[str]:
+        """Names of the dataset files on disk that this store serves"""
+        names = [path.name for path in self.data_dir.glob('*.json')]
+        for path in self.data_dir.glob(f'{REGIONS_DIR}/*/*.json'):
+            if self.serves(path.parent.name):
+                names.append(regional_name(path.parent.name, path.name))
+        return sorted(names)
+
+    def _stat(self, name: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = (self.data_dir / name).stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read(self, name: str) -> Optional[DatasetSnapshot]:
+        """Parse a file into a new snapshot; safe to call off the event loop"""
+        started = time.perf_counter()
+        stat = self._stat(name)
+        snapshot = self._parse(name)
+        elapsed = time.perf_counter() - started
+        if snapshot is None and stat is not None:
+            self._failed[name] = stat
+        else:
+            self._failed.pop(name, None)
+        for observer in self._load_observers:
+            observer(name, elapsed, snapshot is not None)
+        return snapshot
+
+    def _parse(self, name: str) -> Optional[DatasetSnapshot]:
+        stat = self._stat(name)
+        if stat is None:
+            logger.error(f"Error loading {name}: file not found")
+            return None
+        try:
+            with open(self.data_dir / name, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading {name}: {str(e)}")
+            return None
+
+        previous = self._snapshots.get(name)
+        snapshot = DatasetSnapshot(
+            name=name,
+            data=freeze(data),
+            version=previous.version + 1 if previous else 1,
+            mtime_ns=stat[0],
+            size=stat[1],
+            loaded_at=datetime.now(timezone.utc),
+        )
+        for key, builder in self._builders_for(name).items():
+            self._build(snapshot, key, builder)
+        return snapshot
+
+    def _builders_for(self, name: str) -> Dict[str, Builder]:
+        region, filename = split_regional(name)
+        if region is None:
+            return self._builders.get(name, {})
+        return self._regional_builders.get(filename, {})
+
+    def _build(self, snapshot: DatasetSnapshot, key: str, builder: Builder) -> None:
+        try:
+            snapshot.derived[key] = builder(snapshot.data)
+        except Exception as e:
+            logger.error(f"Error building {key} for {snapshot.name}: {str(e)}")
+
+    def _install(self, snapshot: DatasetSnapshot) -> None:
+        previous = self._snapshots.get(snapshot.name)
+        if previous and previous.version >= snapshot.version:
+            return
+        self._snapshots[snapshot.name] = snapshot
+        region, filename = split_regional(snapshot.name)
+        if region is not None:
+            self._region_files.setdefault(region, set()).add(filename)
+        for listener in self._listeners:
+            try:
+                listener(snapshot, previous)
+            except Exception as e:
+                logger.error(f"Dataset listener failed for {snapshot.name}: {str(e)}")
+
+    def _drop(self, name: str) -> None:
+        self._snapshots.pop(name, None)
+        self._failed.pop(name, None)
+        region, filename = split_regional(name)
+        files = self._region_files.get(region) if region is not None else None
+        if files is not None:
+            files.discard(filename)
+            if not files:
+                del self._region_files[region]
+
+    def load(self, name: str) -> Optional[DatasetSnapshot]:
+        if not self.serves(split_regional(name)[0]):
+            return None
+        snapshot = self._read(name)
+        if snapshot is not None:
+            self._install(snapshot)
+        return self._snapshots.get(name)
+
+    def load_all(self) -> None:
+        for name in self._files():
+            self.load(name)
+        logger.info(f"Loaded {len(self._snapshots)} datasets ({len(self.regions())} regions) from {self.data_dir}")
+
+    # ---- access ----
+
+    def get(self, name: str) -> Optional[DatasetSnapshot]:
+        # Files added, fixed or deleted later are picked up by the watcher, never on a request
+        return self._snapshots.get(name)
+
+    def data(self, name: str) -> Any:
+        snapshot = self.get(name)
+        return snapshot.data if snapshot else None
+
+    def snapshots(self) -> List[DatasetSnapshot]:
+        return [self._snapshots[name] for name in sorted(self._snapshots)]
+
+    def regions(self) -> Dict[str, List[DatasetSnapshot]]:
+        """Loaded region partitions, by region"""
+        return {
+            region: [self._snapshots[regional_name(region, filename)] for filename in sorted(files)]
+            for region, files in sorted(self._region_files.items())
+        }
+
+    def has_region(self, region: str) -> bool:
+        return region in self._region_files
+
+    def resolve(self, name: str, region: Optional[str] = None) -> str:
+        """Dataset holding `name` for a region: its own partition if it has one, else the global file"""
+        if region is not None and regional_name(region, name) in self._snapshots:
+            return regional_name(region, name)
+        return name
+
+    def derived(self, name: str, key: str) -> Any:
+        snapshot = self.get(name)
+        return snapshot.derived.get(key) if snapshot else None
+
+    def encoded_part(self, name: str, path: str, version: int) -> Optional[Tuple[Any, str]]:
+        """Pre-encoded (body, etag) of a dataset sub-path at a version, when a loader process provided one"""
+        return None
+
+    def register(self, name: str, key: str, builder: Builder, regional: bool = False) -> None:
+        """Build builder(data) into snapshot.derived[key] on every load of `name`
+
+        Builders run alongside parsing (off the event loop on hot reload), so
+        the derived structure is swapped in together with the data it indexes.
+        With regional=True every region's partition of `name` gets one too.
+        """
+        self._builders.setdefault(name, {})[key] = builder
+        if regional:
+            self._regional_builders.setdefault(name, {})[key] = builder
+        for snapshot in self.snapshots():
+            region, filename = split_regional(snapshot.name)
+            if snapshot.name == name or (regional and region is not None and filename == name):
+                self._build(snapshot, key, builder)
+
+    def subscribe(self, listener: Listener) -> None:
+        """Call listener(new, previous) whenever a dataset is (re)loaded"""
+        self._listeners.append(listener)
+
+    def observe_loads(self, observer: LoadObserver) -> None:
+        """Call observer(name, seconds, succeeded) after every parse + build of a file"""
+        self._load_observers.append(observer)
+
+    # ---- hot reload ----
+
+    def _changed(self) -> List[DatasetSnapshot]:
+        changed = []
+        for name in self._files():
+            stat = self._stat(name)
+            current = self._snapshots.get(name)
+            if stat is None or (current and (current.mtime_ns, current.size) == stat) or self._failed.get(name) == stat:
+                continue
+            snapshot = self._read(name)
+            if snapshot is not None:
+                changed.append(snapshot)
+        return changed
+
+    def _scan(self) -> Tuple[List[DatasetSnapshot], Set[str]]:
+        changed = self._changed()
+        return changed, set(self._files())
+
+    async def check_for_changes(self) -> List[str]:
+        """Re-parse modified files in a worker thread and swap them in; drop datasets whose file is gone"""
+        changed, present = await asyncio.to_thread(self._scan)
+        for snapshot in changed:
+            self._install(snapshot)
+            logger.info(f"Reloaded {snapshot.name} (version {snapshot.version})")
+        removed = [name for name in self._snapshots if name not in present]
+        for name in removed:
+            self._drop(name)
+            logger.info(f"Dropped {name}: file removed")
+        return [snapshot.name for snapshot in changed] + removed
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.check_for_changes()
+            except Exception as e:
+                logger.error(f"Dataset watcher error: {str(e)}")
+
+    def start_watching(self) -> None:
+        if self.poll_interval > 0 and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop_watching(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
@@ -0,0 +1,129 @@
+"""Group-by aggregation over historical disasters.
+
+The disaster list is converted once per dataset version into a pandas
+DataFrame with typed columns (parsed dates, numeric USD losses). Aggregates
+are computed with vectorized groupby and cached per (version, query).
+"""
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+from cachetools import LRUCache
+
+from data_store import DatasetStore
+
+GROUP_FIELDS = ('type', 'severity', 'location')
+BUCKETS = ('year', 'month')
+METRICS = ('casualties', 'affected_population', 'economic_loss')
+AGGREGATIONS = ('sum', 'mean', 'max', 'min')
+
+_MONEY = re.compile(r'([\d,]+(?:\.\d+)?)\s*(thousand|million|billion|trillion|lakh|crore)?', re.IGNORECASE)
+_SCALE = {
+    None: 1, 'thousand': 1e3, 'million': 1e6, 'billion': 1e9, 'trillion': 1e12,
+    'lakh': 1e5, 'crore': 1e7,
+}
+
+
+def parse_money(value: Any) -> float:
+    """'$8.1 billion USD' -> 8.1e9; numbers pass through; unparseable -> NaN"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _MONEY.search(str(value or ''))
+    if not match:
+        return math.nan
+    return float(match.group(1).replace(',', '')) * _SCALE[(match.group(2) or '').lower() or None]
+
+
+def build_frame(disasters: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    frame = pd.DataFrame({
+        'type': [d.get('type') or 'Unknown' for d in disasters],
+        'severity': [d.get('severity') or 'Unknown' for d in disasters],
+        'location': [d.get('location') or 'Unknown' for d in disasters],
+        'date': pd.to_datetime([d.get('date') for d in disasters], errors='coerce'),
+        'casualties': pd.to_numeric([d.get('casualties') for d in disasters], errors='coerce'),
+        'affected_population': pd.to_numeric([d.get('affected_population') for d in disasters], errors='coerce'),
+        'economic_loss': [parse_money(d.get('economic_loss')) for d in disasters],
+    })
+    frame['year'] = frame['date'].dt.year.astype('Int64')
+    frame['month'] = frame['date'].dt.strftime('%Y-%m')
+    return frame
+
+
+def _plain(value: Any) -> Any:
+    """numpy/pandas scalar -> JSON-safe Python value"""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer():
+            return int(value)
+        return round(value, 4)
+    return value
+
+
+class DisasterStatsEngine:
+    def __init__(self, store: DatasetStore, cache_size: int = 256):
+        self.store = store
+        self._cache: LRUCache = LRUCache(maxsize=cache_size)
+        self.hits = 0
+        self.misses = 0
+        store.register('disasters.json', 'frame', build_frame)
+
+    def aggregate(
+        self,
+        group_by: Sequence[str] = ('type',),
+        bucket: Optional[str] = None,
+        metrics: Sequence[str] = METRICS,
+        aggregations: Sequence[str] = ('sum',),
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        snapshot = self.store.get('disasters.json')
+        frame = snapshot.derived.get('frame') if snapshot else None
+        if frame is None:
+            return None
+
+        key = (snapshot.version, tuple(group_by), bucket, tuple(metrics), tuple(aggregations), date_from, date_to)
+        result = self._cache.get(key)
+        if result is None:
+            self.misses += 1
+            result = self._compute(frame, list(group_by), bucket, list(metrics), list(aggregations), date_from, date_to)
+            self._cache[key] = result
+        else:
+            self.hits += 1
+        return result
+
+    def _compute(self, frame, group_by, bucket, metrics, aggregations, date_from, date_to) -> Dict[str, Any]:
+        if date_from:
+            frame = frame[frame['date'] >= pd.Timestamp(date_from)]
+        if date_to:
+            frame = frame[frame['date'] <= pd.Timestamp(date_to)]
+
+        keys = group_by + ([bucket] if bucket else [])
+        totals = {"count": int(len(frame))}
+        for metric in metrics:
+            totals[metric] = {agg: _plain(frame[metric].agg(agg)) for agg in aggregations}
+
+        groups: List[Dict[str, Any]] = []
+        if keys and len(frame):
+            grouped = frame.groupby(keys, sort=True)
+            table = grouped[metrics].agg(aggregations)
+            counts = grouped.size()
+            for index, row in table.iterrows():
+                index = index if isinstance(index, tuple) else (index,)
+                group = {k: _plain(v) for k, v in zip(keys, index)}
+                group["count"] = int(counts.loc[index if len(index) > 1 else index[0]])
+                for metric in metrics:
+                    group[metric] = {agg: _plain(row[(metric, agg)]) for agg in aggregations}
+                groups.append(group)
+
+        return {
+            "group_by": keys,
+            "filters": {"date_from": date_from, "date_to": date_to},
+            "totals": totals,
+            "groups": groups,
+        }
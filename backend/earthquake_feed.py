@@ -0,0 +1,387 @@
+"""Time-ordered earthquake store with range queries and rolling aggregates.
+
+Events are kept sorted by (time, id) in column arrays (time, magnitude,
+depth, lat, lon). Events arrive in batches (a reload, or add_many):
+- A batch newer than everything stored is appended into spare capacity.
+- Late events go to a small sorted side buffer instead of the main
+  arrays, so a late batch costs O(b + m log m) for a buffer of b events,
+  whatever the size of the store.
+- When the buffer grows past late_buffer events it is merged into the
+  main arrays in one O(n + b log n) pass, paid once per late_buffer late
+  events rather than once per batch.
+
+Queries work as follows:
+- The time range and the cursor become slice bounds, found by bisect, in
+  both the main arrays and the side buffer.
+- Magnitude, depth, bounding box and radius filters are vectorized over
+  those slices only.
+- Pages run newest first with a keyset cursor on (time, id); matches from
+  the two slices are merged by key.
+
+Hourly and daily counts and seismic energy per region are updated as each
+event is added. Buckets older than the retention, counted back from the
+newest event, are dropped.
+"""
+import bisect
+import heapq
+import logging
+import math
+from collections import deque
+from itertools import islice
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cursors import decode_cursor, encode_cursor
+from data_store import DatasetSnapshot, DatasetStore
+from spatial import haversine_km, record_coordinates
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = {'hour': 3600, 'day': 86400}
+COLUMNS = ('time', 'magnitude', 'depth', 'lat', 'lon')
+
+Key = Tuple[float, str]
+Row = Tuple[float, ...]
+
+
+def energy_joules(magnitude: float) -> float:
+    """Gutenberg-Richter energy: log10 E = 1.5 M + 4.8"""
+    return 10.0 ** (1.5 * magnitude + 4.8)
+
+
+def energy_magnitude(energy: float) -> Optional[float]:
+    """Magnitude of a single event releasing the given energy"""
+    return round((math.log10(energy) - 4.8) / 1.5, 2) if energy > 0 else None
+
+
+def parse_event_time(value: Any) -> Optional[float]:
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def event_region(event: Dict[str, Any]) -> str:
+    return str(event.get('region') or event.get('location') or 'Unknown')
+
+
+def _number(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else math.nan
+
+
+class RollingAggregates:
+    """Per (bucket start, region) count, energy and max magnitude for one bucket size"""
+
+    def __init__(self, size: int, retention: int):
+        self.size = size
+        self.retention = retention
+        self._starts: Deque[int] = deque()  # ascending bucket starts present in _buckets
+        self._buckets: Dict[int, Dict[str, List[float]]] = {}
+
+    def add(self, seconds: float, region: str, magnitude: float) -> None:
+        start = int(seconds // self.size) * self.size
+        if self._starts and start < self._starts[-1] - (self.retention - 1) * self.size:
+            return  # older than the window we keep
+        regions = self._buckets.get(start)
+        if regions is None:
+            regions = self._buckets[start] = {}
+            if not self._starts or start > self._starts[-1]:
+                self._starts.append(start)
+            else:
+                position = bisect.bisect_left(self._starts, start)
+                self._starts.insert(position, start)
+        stats = regions.setdefault(region, [0, 0.0, -math.inf])
+        stats[0] += 1
+        if not math.isnan(magnitude):
+            stats[1] += energy_joules(magnitude)
+            stats[2] = max(stats[2], magnitude)
+        self._evict()
+
+    def _evict(self) -> None:
+        oldest = self._starts[-1] - (self.retention - 1) * self.size
+        while self._starts and self._starts[0] < oldest:
+            del self._buckets[self._starts.popleft()]
+
+    def query(self, since: Optional[float], until: Optional[float], region: Optional[str]) -> Dict[str, Any]:
+        series = []
+        totals: Dict[str, List[float]] = {}
+        for start in self._starts:
+            if (since is not None and start + self.size <= since) or (until is not None and start > until):
+                continue
+            for name, (count, energy, max_magnitude) in sorted(self._buckets[start].items()):
+                if region and name.lower() != region.lower():
+                    continue
+                series.append(self._row(start, name, count, energy, max_magnitude))
+                total = totals.setdefault(name, [0, 0.0, -math.inf])
+                total[0] += count
+                total[1] += energy
+                total[2] = max(total[2], max_magnitude)
+        return {
+            "regions": {
+                name: {k: v for k, v in self._row(None, name, *total).items() if k not in ("start", "region")}
+                for name, total in sorted(totals.items())
+            },
+            "series": series,
+        }
+
+    @staticmethod
+    def _row(start: Optional[int], region: str, count: float, energy: float, max_magnitude: float) -> Dict[str, Any]:
+        return {
+            "start": datetime.fromtimestamp(start, tz=timezone.utc).isoformat() if start is not None else None,
+            "region": region,
+            "count": int(count),
+            "energy_joules": float(f"{energy:.4g}"),
+            "equivalent_magnitude": energy_magnitude(energy),
+            "max_magnitude": round(max_magnitude, 2) if max_magnitude != -math.inf else None,
+        }
+
+
+class EarthquakeFeed:
+    def __init__(
+        self,
+        store: Optional[DatasetStore] = None,
+        dataset: str = 'earthquake_data.json',
+        hour_retention: int = 24 * 7,
+        day_retention: int = 365,
+        late_buffer: int = 1024,
+    ):
+        self.dataset = dataset
+        self.retention = {'hour': hour_retention, 'day': day_retention}
+        self.late_buffer = late_buffer
+        self._reset()
+        if store is not None:
+            store.subscribe(self._on_reload)
+
+    def _reset(self) -> None:
+        self._keys: List[Key] = []
+        self._events: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._columns = {name: np.empty(64, dtype=np.float64) for name in COLUMNS}
+        # Late events waiting for the next merge, sorted by key like the main arrays
+        self._late: List[Tuple[Key, Dict[str, Any], Row]] = []
+        self._late_keys: List[Key] = []
+        self._late_events: List[Dict[str, Any]] = []
+        self._late_columns: Optional[Dict[str, np.ndarray]] = None
+        self.aggregates = {name: RollingAggregates(size, self.retention[name]) for name, size in BUCKETS.items()}
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self._keys) + len(self._late)
+
+    # ---- ingestion ----
+
+    def _on_reload(self, snapshot: DatasetSnapshot, previous: Optional[DatasetSnapshot]) -> None:
+        if snapshot.name == self.dataset:
+            self.sync(snapshot.data or ())
+
+    def sync(self, events: Sequence[Dict[str, Any]]) -> int:
+        """Bring the store in line with a full event list; only new events are inserted when nothing was removed"""
+        incoming = {self._event_id(event): event for event in events}
+        if any(incoming.get(event_id) != event for event_id, event in self._by_id.items()):
+            # Events were edited or withdrawn: rebuild rather than un-apply aggregates
+            self._reset()
+        self.skipped = 0
+        added = self.add_many(event for event_id, event in incoming.items() if event_id not in self._by_id)
+        if self.skipped:
+            logger.warning(f"Skipped {self.skipped} earthquakes without a valid time")
+        return added
+
+    @staticmethod
+    def _event_id(event: Dict[str, Any]) -> str:
+        return str(event.get('id') or f"{event.get('time')}:{event.get('location')}")
+
+    def add(self, event: Dict[str, Any]) -> bool:
+        """Insert one event in time order; False for duplicates and events without a valid time"""
+        return self.add_many([event]) == 1
+
+    def add_many(self, events: Iterable[Dict[str, Any]]) -> int:
+        """Insert a batch of events in time order; returns how many were new and had a valid time"""
+        batch: Dict[str, Tuple[Key, Dict[str, Any]]] = {}
+        for event in events:
+            event_id = self._event_id(event)
+            seconds = parse_event_time(event.get('time'))
+            if seconds is None:
+                self.skipped += 1
+                continue
+            if event_id not in self._by_id and event_id not in batch:
+                batch[event_id] = ((seconds, event_id), event)
+        if not batch:
+            return 0
+        items = sorted(batch.values(), key=lambda item: item[0])
+        rows = [self._row(key[0], event) for key, event in items]
+
+        n, m = len(self._keys), len(items)
+        if not n or items[0][0] > self._keys[-1]:
+            # In time order (the usual feed): append into spare capacity
+            if n + m > len(self._columns['time']):
+                self._columns = {name: np.resize(column, max(2 * n, n + m)) for name, column in self._columns.items()}
+            block = np.array(rows, dtype=np.float64)
+            for i, name in enumerate(COLUMNS):
+                self._columns[name][n:n + m] = block[:, i]
+            self._keys.extend(key for key, _ in items)
+            self._events.extend(event for _, event in items)
+        else:
+            # Late events: into the side buffer, merged into the main arrays once it is full
+            late = [(key, event, row) for (key, event), row in zip(items, rows)]
+            self._late = list(heapq.merge(self._late, late, key=lambda item: item[0]))
+            self._late_keys = [key for key, _, _ in self._late]
+            self._late_events = [event for _, event, _ in self._late]
+            self._late_columns = None
+            if len(self._late) > self.late_buffer:
+                self.merge_late()
+
+        for (key, event), row in zip(items, rows):
+            self._by_id[key[1]] = event
+            for aggregates in self.aggregates.values():
+                aggregates.add(key[0], event_region(event), row[1])
+        return m
+
+    def merge_late(self) -> None:
+        """Merge the side buffer into the main arrays in one pass over lists and columns"""
+        if not self._late:
+            return
+        items = self._late
+        self._late, self._late_keys, self._late_events, self._late_columns = [], [], [], None
+        n, m = len(self._keys), len(items)
+        positions = [bisect.bisect_left(self._keys, key) for key, _, _ in items]
+        block = np.array([row for _, _, row in items], dtype=np.float64)
+        capacity = max(len(self._columns['time']), 2 * (n + m))
+        for i, name in enumerate(COLUMNS):
+            column = np.empty(capacity, dtype=np.float64)
+            column[:n + m] = np.insert(self._columns[name][:n], positions, block[:, i])
+            self._columns[name] = column
+        keys: List[Key] = []
+        merged: List[Dict[str, Any]] = []
+        previous = 0
+        for position, (key, event, _) in zip(positions, items):
+            keys.extend(self._keys[previous:position])
+            merged.extend(self._events[previous:position])
+            keys.append(key)
+            merged.append(event)
+            previous = position
+        keys.extend(self._keys[previous:])
+        merged.extend(self._events[previous:])
+        self._keys, self._events = keys, merged
+
+    @staticmethod
+    def _row(seconds: float, event: Dict[str, Any]) -> Row:
+        point = record_coordinates(event)
+        return (seconds, _number(event.get('magnitude')), _number(event.get('depth'))) + (point or (math.nan, math.nan))
+
+    # ---- queries ----
+
+    def query(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        min_magnitude: Optional[float] = None,
+        max_magnitude: Optional[float] = None,
+        min_depth: Optional[float] = None,
+        max_depth: Optional[float] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        near: Optional[Tuple[float, float, float]] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of events, newest first, plus the cursor of the next page; raises InvalidCursor"""
+        low = None if since is None else (since.timestamp(), '')
+        high = None if until is None else (until.timestamp(), '\uffff')
+        before = None
+        if cursor:
+            moment, event_id = decode_cursor(cursor)
+            before = (moment.timestamp(), event_id)
+        filters = (min_magnitude, max_magnitude, min_depth, max_depth, bbox, near)
+
+        if self._late and self._late_columns is None:
+            block = np.array([row for _, _, row in self._late], dtype=np.float64)
+            self._late_columns = {name: block[:, i] for i, name in enumerate(COLUMNS)}
+        matches = list(islice(heapq.merge(
+            self._scan(self._keys, self._events, self._columns, low, high, before, filters, limit + 1),
+            self._scan(self._late_keys, self._late_events, self._late_columns, low, high, before, filters, limit + 1),
+            key=lambda match: match[0],
+            reverse=True,
+        ), limit + 1))
+        page = [event for _, event in matches[:limit]]
+        next_cursor = None
+        if len(matches) > limit:
+            seconds, event_id = matches[limit - 1][0]
+            next_cursor = encode_cursor(datetime.fromtimestamp(seconds, tz=timezone.utc), event_id)
+        return page, next_cursor
+
+    @staticmethod
+    def _scan(
+        keys: List[Key],
+        events: List[Dict[str, Any]],
+        columns: Optional[Dict[str, np.ndarray]],
+        low: Optional[Key],
+        high: Optional[Key],
+        before: Optional[Key],
+        filters: Tuple[Any, ...],
+        limit: int,
+    ) -> List[Tuple[Key, Dict[str, Any]]]:
+        """Up to limit (key, event) matches from one sorted store, newest first"""
+        lo = 0 if low is None else bisect.bisect_left(keys, low)
+        hi = len(keys) if high is None else bisect.bisect_right(keys, high)
+        if before is not None:
+            hi = min(hi, bisect.bisect_left(keys, before))
+        if hi <= lo:
+            return []
+
+        min_magnitude, max_magnitude, min_depth, max_depth, bbox, near = filters
+        columns = {name: column[lo:hi] for name, column in columns.items()}
+        mask = np.ones(hi - lo, dtype=bool)
+        # Comparisons with NaN are False, so events missing a filtered field drop out
+        if min_magnitude is not None:
+            mask &= columns['magnitude'] >= min_magnitude
+        if max_magnitude is not None:
+            mask &= columns['magnitude'] <= max_magnitude
+        if min_depth is not None:
+            mask &= columns['depth'] >= min_depth
+        if max_depth is not None:
+            mask &= columns['depth'] <= max_depth
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            lats, lons = columns['lat'], columns['lon']
+            mask &= (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        distances = None
+        if near is not None:
+            lat, lon, radius_km = near
+            candidates = np.flatnonzero(mask)
+            distances = np.full(hi - lo, np.nan)
+            distances[candidates] = haversine_km(lat, lon, columns['lat'][candidates], columns['lon'][candidates])
+            mask &= distances <= radius_km
+
+        matches = []
+        for offset in np.flatnonzero(mask)[::-1][:limit].tolist():
+            event = events[lo + offset]
+            if distances is not None:
+                event = {**event, "distance_km": round(float(distances[offset]), 3)}
+            matches.append((keys[lo + offset], event))
+        return matches
+
+    def rolling(self, bucket: str, since: Optional[datetime], until: Optional[datetime], region: Optional[str]) -> Dict[str, Any]:
+        aggregates = self.aggregates[bucket]
+        return {
+            "bucket": bucket,
+            "retention": f"{aggregates.retention} {bucket}s",
+            **aggregates.query(
+                since.timestamp() if since else None,
+                until.timestamp() if until else None,
+                region,
+            ),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        first = min(self._keys[:1] + self._late_keys[:1], default=None)
+        last = max(self._keys[-1:] + self._late_keys[-1:], default=None)
+        return {
+            "events": len(self),
+            "skipped": self.skipped,
+            "from": datetime.fromtimestamp(first[0], tz=timezone.utc).isoformat() if first else None,
+            "to": datetime.fromtimestamp(last[0], tz=timezone.utc).isoformat() if last else None,
+        }
@@ -0,0 +1,193 @@
+"""Point-in-flood-zone lookups over preprocessed zone geometry.
+
+Each zone's coordinate list is turned into segment arrays once per dataset
+version: an open list is a river reach (polyline) and a closed ring is a
+polygon. Zone bounding boxes are packed into a small STR R-tree. Batches of
+points walk the tree together as NumPy index arrays, so scoring 100k points
+costs a handful of vectorized passes per zone rather than a Python loop per
+point.
+"""
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from spatial import KM_PER_DEGREE
+
+RISK_ORDER = {"low": 1, "moderate": 2, "medium": 2, "high": 3, "very high": 4, "severe": 4}
+
+
+class ZoneGeometry:
+    """Segments of one zone in a local km plane (equirectangular around the zone)"""
+
+    def __init__(self, coordinates: Sequence[Sequence[float]]):
+        points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        self.box = (points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max())
+        self.polygon = len(points) >= 4 and bool(np.allclose(points[0], points[-1]))
+
+        lat0 = (self.box[0] + self.box[2]) / 2.0
+        self.lon0 = (self.box[1] + self.box[3]) / 2.0
+        self.kx = KM_PER_DEGREE * math.cos(math.radians(lat0))
+        if len(points) == 1:
+            points = np.vstack([points, points])
+        start, end = points[:-1], points[1:]
+        self.ay = start[:, 0] * KM_PER_DEGREE
+        self.ax = (start[:, 1] - self.lon0) * self.kx
+        self.dy = end[:, 0] * KM_PER_DEGREE - self.ay
+        self.dx = (end[:, 1] - self.lon0) * self.kx - self.ax
+        self.len2 = self.dx ** 2 + self.dy ** 2
+        # Raw degrees for the polygon ray cast
+        self.lat_a, self.lon_a = start[:, 0], start[:, 1]
+        self.lat_b, self.lon_b = end[:, 0], end[:, 1]
+
+    def distance_km(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Distance from each point to the zone; 0 inside a polygon"""
+        py = (lats * KM_PER_DEGREE)[:, None]
+        px = ((lons - self.lon0) * self.kx)[:, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = ((px - self.ax) * self.dx + (py - self.ay) * self.dy) / self.len2
+        t = np.clip(np.nan_to_num(t), 0.0, 1.0)
+        dist = np.hypot(px - (self.ax + t * self.dx), py - (self.ay + t * self.dy)).min(axis=1)
+        if self.polygon:
+            dist[self._contains(lats, lons)] = 0.0
+        return dist
+
+    def _contains(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        y, x = lats[:, None], lons[:, None]
+        crosses = (self.lat_a > y) != (self.lat_b > y)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            x_at = self.lon_a + (y - self.lat_a) * (self.lon_b - self.lon_a) / (self.lat_b - self.lat_a)
+        return (np.count_nonzero(crosses & (x < x_at), axis=1) % 2) == 1
+
+
+class FloodZoneIndex:
+    def __init__(self, zones: Sequence[Dict[str, Any]], node_size: int = 8):
+        self.zones = zones
+        self.node_size = node_size
+        self.positions: List[int] = []
+        self.geometries: List[ZoneGeometry] = []
+        for position, zone in enumerate(zones):
+            coordinates = zone.get('coordinates')
+            if coordinates:
+                self.positions.append(position)
+                self.geometries.append(ZoneGeometry(coordinates))
+        boxes = np.asarray([g.box for g in self.geometries], dtype=np.float64).reshape(-1, 4)
+        self._levels = self._pack(boxes)
+
+    def _pack(self, boxes: np.ndarray) -> List[Tuple[np.ndarray, List[np.ndarray]]]:
+        """Sort-Tile-Recursive packing; each level is (node boxes, child ids per node)"""
+        levels = []
+        while True:
+            count = len(boxes)
+            if count == 0:
+                return levels
+            slices = max(1, math.ceil(math.sqrt(math.ceil(count / self.node_size))))
+            per_slice = slices * self.node_size
+            order = np.argsort((boxes[:, 1] + boxes[:, 3]) / 2.0, kind="stable")
+            groups = []
+            for s in range(0, count, per_slice):
+                chunk = order[s:s + per_slice]
+                chunk = chunk[np.argsort((boxes[chunk, 0] + boxes[chunk, 2]) / 2.0, kind="stable")]
+                groups.extend(chunk[i:i + self.node_size] for i in range(0, len(chunk), self.node_size))
+            parents = np.asarray([
+                (boxes[g, 0].min(), boxes[g, 1].min(), boxes[g, 2].max(), boxes[g, 3].max()) for g in groups
+            ])
+            levels.append((parents, groups))
+            if len(groups) == 1:
+                return levels
+            boxes = parents
+
+    def query(self, lats: np.ndarray, lons: np.ndarray, near_km: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(point index, zone position, distance km) for every point within near_km of a zone"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        hit_points, hit_zones, hit_dist = [], [], []
+        if not self._levels or len(lats) == 0:
+            return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+
+        dlat = near_km / KM_PER_DEGREE
+        dlon = dlat / np.maximum(np.cos(np.radians(np.minimum(np.abs(lats) + dlat, 89.9))), 1e-6)
+
+        def overlaps(box, idx: np.ndarray) -> np.ndarray:
+            la, lo, dl = lats[idx], lons[idx], dlon[idx]
+            keep = (la >= box[0] - dlat) & (la <= box[2] + dlat) & (lo >= box[1] - dl) & (lo <= box[3] + dl)
+            return idx[keep]
+
+        top = len(self._levels) - 1
+        stack = [(top, 0, np.arange(len(lats)))]
+        while stack:
+            level, node, idx = stack.pop()
+            boxes, groups = self._levels[level]
+            idx = overlaps(boxes[node], idx)
+            if not len(idx):
+                continue
+            for child in groups[node]:
+                child = int(child)
+                if level > 0:
+                    stack.append((level - 1, child, idx))
+                    continue
+                geometry = self.geometries[child]
+                candidates = overlaps(geometry.box, idx)
+                if not len(candidates):
+                    continue
+                dist = geometry.distance_km(lats[candidates], lons[candidates])
+                near = dist <= near_km
+                hit_points.append(candidates[near])
+                hit_zones.append(np.full(int(near.sum()), self.positions[child], dtype=np.int64))
+                hit_dist.append(dist[near])
+
+        if not hit_points:
+            return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+        points, zones, dist = np.concatenate(hit_points), np.concatenate(hit_zones), np.concatenate(hit_dist)
+        order = np.lexsort((dist, points))
+        return points[order], zones[order], dist[order]
+
+    def zone_hit(self, position: int, distance_km: float) -> Dict[str, Any]:
+        zone = self.zones[position]
+        return {
+            "id": zone.get('id'),
+            "river": zone.get('river'),
+            "location": zone.get('location'),
+            "risk_level": zone.get('risk_level'),
+            "trend": zone.get('trend'),
+            "distance_km": round(distance_km, 3),
+            "covering": distance_km == 0.0,
+            "current_water_level": zone.get('current_water_level'),
+            "danger_level": zone.get('danger_level'),
+            "margin_to_danger": margin(zone, 'danger_level'),
+            "margin_to_warning": margin(zone, 'warning_level'),
+        }
+
+    def at(self, lat: float, lon: float, near_km: float) -> List[Dict[str, Any]]:
+        _, zones, dist = self.query(np.array([lat]), np.array([lon]), near_km)
+        return [self.zone_hit(int(z), float(d)) for z, d in zip(zones.tolist(), dist.tolist())]
+
+    def score(self, lats: np.ndarray, lons: np.ndarray, near_km: float) -> List[Dict[str, Any]]:
+        """Per-point hits for a batch, only for points near at least one zone"""
+        points, zones, dist = self.query(lats, lons, near_km)
+        results: List[Dict[str, Any]] = []
+        current: Optional[Dict[str, Any]] = None
+        for point, zone, d in zip(points.tolist(), zones.tolist(), dist.tolist()):
+            if current is None or current["index"] != point:
+                current = {"index": point, "max_risk_level": None, "min_margin_to_danger": None, "zones": []}
+                results.append(current)
+            hit = self.zone_hit(zone, d)
+            current["zones"].append(hit)
+            if risk_rank(hit["risk_level"]) > risk_rank(current["max_risk_level"]):
+                current["max_risk_level"] = hit["risk_level"]
+            if hit["margin_to_danger"] is not None and (
+                current["min_margin_to_danger"] is None or hit["margin_to_danger"] < current["min_margin_to_danger"]
+            ):
+                current["min_margin_to_danger"] = hit["margin_to_danger"]
+        return results
+
+
+def margin(zone: Dict[str, Any], level_field: str) -> Optional[float]:
+    level, current = zone.get(level_field), zone.get('current_water_level')
+    if level is None or current is None:
+        return None
+    return round(level - current, 3)
+
+
+def risk_rank(risk_level: Optional[str]) -> int:
+    return RISK_ORDER.get((risk_level or "").lower(), 0)
@@ -0,0 +1,183 @@
+"""Incrementally maintained hotspot grid over community reports.
+
+Each report with coordinates is added once, as it is accepted, to a bucket
+keyed by (hour, fine grid cell). Near-duplicates merged into an earlier
+report are counted too, since corroboration is what makes a hotspot. A
+bucket keeps a count, per-type counts, the highest severity and coordinate
+sums for a centroid. A query at a coarser zoom merges the fine cells of the
+requested hours by integer shift, so the cost grows with the number of
+non-empty buckets and not with the number of reports. Time windows are
+resolved to whole hours.
+"""
+import logging
+import math
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from spatial import record_coordinates
+
+logger = logging.getLogger(__name__)
+
+MAX_ZOOM = 14  # fine cells are 360/2^14 deg of longitude (~2.4 km) wide
+
+SEVERITY_RANK = {"low": 1, "medium": 2, "moderate": 2, "high": 3, "severe": 4, "critical": 4}
+SEVERITY_NAMES = {1: "low", 2: "medium", 3: "high", 4: "critical"}
+
+Cell = Tuple[int, int]
+
+
+def hour_of(timestamp: datetime) -> int:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() // 3600)
+
+
+def fine_cell(lat: float, lon: float) -> Cell:
+    scale = 1 << MAX_ZOOM
+    x = min(scale - 1, max(0, math.floor((lon + 180.0) / 360.0 * scale)))
+    y = min(scale - 1, max(0, math.floor((lat + 90.0) / 180.0 * scale)))
+    return x, y
+
+
+class _Bucket:
+    __slots__ = ("count", "types", "max_severity", "lat_sum", "lon_sum")
+
+    def __init__(self):
+        self.count = 0
+        self.types: Counter = Counter()
+        self.max_severity = 0
+        self.lat_sum = 0.0
+        self.lon_sum = 0.0
+
+    def add(self, lat: float, lon: float, report_type: str, severity: int, weight: int = 1) -> None:
+        self.count += weight
+        self.types[report_type] += weight
+        self.max_severity = max(self.max_severity, severity)
+        self.lat_sum += lat * weight
+        self.lon_sum += lon * weight
+
+    def merge(self, other: "_Bucket") -> None:
+        self.count += other.count
+        self.types.update(other.types)
+        self.max_severity = max(self.max_severity, other.max_severity)
+        self.lat_sum += other.lat_sum
+        self.lon_sum += other.lon_sum
+
+
+class HotspotIndex:
+    def __init__(self, retention_hours: int = 24 * 30):
+        self.retention_hours = retention_hours
+        self._hours: Dict[int, Dict[Cell, _Bucket]] = {}
+        self._bootstrapping = False
+        self._live_ids: Set[str] = set()  # seen live while the bootstrap scan runs
+        self.reports = 0
+
+    def add(self, report: Dict[str, Any], weight: int = 1) -> bool:
+        """Count a report `weight` times; reports without coordinates are ignored"""
+        point = record_coordinates(report)
+        if point is None:
+            return False
+        lat, lon = point
+        timestamp = report.get('timestamp')
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        hour = hour_of(timestamp or datetime.now(timezone.utc))
+        newest = max(self._hours, default=hour)
+        if hour <= newest - self.retention_hours:
+            return False
+
+        if self._bootstrapping:
+            self._live_ids.add(report.get('id'))
+        cells = self._hours.setdefault(hour, {})
+        cell = fine_cell(lat, lon)
+        bucket = cells.get(cell)
+        if bucket is None:
+            bucket = cells[cell] = _Bucket()
+        bucket.add(
+            lat, lon,
+            str(report.get('report_type') or 'unknown').lower(),
+            SEVERITY_RANK.get(str(report.get('severity') or '').lower(), 0),
+            weight,
+        )
+        self.reports += weight
+        self._evict(max(newest, hour))
+        return True
+
+    def _evict(self, newest_hour: int) -> None:
+        cutoff = newest_hour - self.retention_hours
+        for hour in [h for h in self._hours if h <= cutoff]:
+            self.reports -= sum(b.count for b in self._hours.pop(hour).values())
+
+    async def bootstrap(self, collection) -> None:
+        """Load the retention window from Mongo without double counting live reports"""
+        since = datetime.now(timezone.utc) - timedelta(hours=self.retention_hours)
+        projection = {
+            "_id": 0, "id": 1, "coordinates": 1, "timestamp": 1, "report_type": 1, "severity": 1,
+            "corroborated_by": 1,
+        }
+        self._bootstrapping = True
+        loaded = 0
+        try:
+            cursor = collection.find({"timestamp": {"$gte": since}, "coordinates": {"$ne": None}}, projection)
+            async for report in cursor:
+                # Suppressed duplicates are not stored; count them in their canonical report's bucket.
+                # Every report and corroboration is counted by its id, so one already added live is skipped
+                # whether or not its flush reached Mongo before the scan did.
+                ids = [report.get('id'), *(report.get('corroborated_by') or ())]
+                weight = sum(1 for report_id in ids if report_id not in self._live_ids)
+                if weight:
+                    loaded += self.add(report, weight)
+            logger.info(f"Hotspot grid bootstrapped with {loaded} community reports")
+        except Exception as e:
+            logger.error(f"Unable to bootstrap community report hotspots: {str(e)}")
+        finally:
+            self._bootstrapping = False
+            self._live_ids.clear()
+
+    def query(
+        self,
+        zoom: int,
+        since: datetime,
+        until: datetime,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        limit: int = 500,
+    ) -> List[Dict[str, Any]]:
+        """Hotspots at a zoom level for [since, until), optionally within (min_lat, min_lon, max_lat, max_lon)"""
+        shift = MAX_ZOOM - max(0, min(zoom, MAX_ZOOM))
+        first, last = hour_of(since), hour_of(until)
+        merged: Dict[Cell, _Bucket] = {}
+        for hour, cells in self._hours.items():
+            if hour < first or hour > last:
+                continue
+            for (x, y), bucket in cells.items():
+                if bbox is not None:
+                    lat, lon = bucket.lat_sum / bucket.count, bucket.lon_sum / bucket.count
+                    if not (bbox[0] <= lat <= bbox[2] and bbox[1] <= lon <= bbox[3]):
+                        continue
+                key = (x >> shift, y >> shift)
+                target = merged.get(key)
+                if target is None:
+                    target = merged[key] = _Bucket()
+                target.merge(bucket)
+
+        ranked = sorted(merged.items(), key=lambda item: (-item[1].count, -item[1].max_severity))[:limit]
+        return [
+            {
+                "cell": f"{zoom}/{x}/{y}",
+                "lat": round(bucket.lat_sum / bucket.count, 6),
+                "lon": round(bucket.lon_sum / bucket.count, 6),
+                "count": bucket.count,
+                "dominant_report_type": bucket.types.most_common(1)[0][0],
+                "report_types": dict(bucket.types),
+                "max_severity": SEVERITY_NAMES.get(bucket.max_severity),
+            }
+            for (x, y), bucket in ranked
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "reports": self.reports,
+            "hours": len(self._hours),
+            "buckets": sum(len(cells) for cells in self._hours.values()),
+        }
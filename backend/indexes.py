@@ -0,0 +1,85 @@
+"""Hash indexes over list datasets (alerts, disasters, cards, centers...).
+
+Built once per dataset version: an id -> record map plus, for each filter
+field, a case-normalized value -> positions map. Combined filters intersect
+the posting lists, starting from the smallest one.
+"""
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+
+def normalize(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return str(value).lower()
+
+
+class Postings:
+    """Positions of matching records, in dataset order, plus a set for membership tests"""
+
+    __slots__ = ("positions", "members")
+
+    def __init__(self, positions: List[int]):
+        self.positions: Tuple[int, ...] = tuple(positions)
+        self.members: FrozenSet[int] = frozenset(positions)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+_EMPTY = Postings([])
+
+
+class RecordIndex:
+    def __init__(self, records: Sequence[Dict[str, Any]], fields: Sequence[str] = (), id_field: str = "id"):
+        self.records = records
+        self.fields = tuple(fields)
+        self.by_id: Dict[Any, Dict[str, Any]] = {}
+        buckets: Dict[str, Dict[str, List[int]]] = {name: {} for name in self.fields}
+
+        for position, record in enumerate(records):
+            record_id = record.get(id_field)
+            if record_id is not None:
+                # Keep the first occurrence, as the old linear scan did
+                self.by_id.setdefault(record_id, record)
+            for name in self.fields:
+                key = normalize(record.get(name))
+                if key is not None:
+                    buckets[name].setdefault(key, []).append(position)
+
+        self._postings: Dict[str, Dict[str, Postings]] = {
+            name: {key: Postings(positions) for key, positions in values.items()}
+            for name, values in buckets.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, record_id: Any) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(record_id)
+
+    def values(self, name: str) -> List[str]:
+        """Distinct normalized values of an indexed field"""
+        return sorted(self._postings[name])
+
+    def count(self, name: str, value: Any) -> int:
+        return len(self._postings[name].get(normalize(value), _EMPTY))
+
+    def filter(self, **criteria: Any) -> List[Dict[str, Any]]:
+        """Records whose fields equal all given values (case-insensitive); None values are ignored"""
+        postings = []
+        for name, value in criteria.items():
+            if value is None or value == "":
+                continue
+            if name not in self._postings:
+                raise KeyError(f"field '{name}' is not indexed")
+            postings.append(self._postings[name].get(normalize(value), _EMPTY))
+
+        if not postings:
+            return list(self.records)
+
+        postings.sort(key=len)
+        smallest, others = postings[0], postings[1:]
+        positions = smallest.positions
+        for other in others:
+            positions = [p for p in positions if p in other.members]
+        return [self.records[p] for p in positions]
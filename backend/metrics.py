@@ -0,0 +1,345 @@
+"""Prometheus text-format metrics without a client library.
+
+Counters and histograms are kept in dicts keyed by label tuples. Recording
+a sample costs one dict lookup and a bisect into the bucket bounds.
+Cumulative bucket counts are worked out only when /metrics is scraped.
+Values that other objects already track (cache hits, queue depth) are
+collected at scrape time through callbacks.
+
+Parts:
+- MetricsMiddleware (recording into HttpMetrics): a pure ASGI middleware.
+  It times each request up to its response start and labels it by route
+  template, not raw path, so label cardinality stays bounded.
+- LoopLagMonitor: measures how late the event loop wakes from a sleep.
+- MongoCommandMetrics: a pymongo command listener.
+- SlowRequestProfiler: opt-in. It samples the event loop thread's stack
+  while a sampled request runs, and keeps the stacks of requests that turn
+  out slow.
+"""
+import asyncio
+import bisect
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter as StackCounter, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+AI_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.bounds = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last slot is +Inf), sum]; buckets are made cumulative on render
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float) -> None:
+        slot = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.bounds) + 1), [0.0])
+            series[0][slot] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            snapshot = [(key, list(counts), total[0]) for key, (counts, total) in sorted(self._series.items())]
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Gauge or counter whose samples are read from other objects at scrape time"""
+
+    def __init__(self, name: str, help: str, kind: str, labels: Sequence[str], collect: Callable[[], Iterable[Tuple[Labels, float]]]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        try:
+            samples = list(self.collect())
+        except Exception as e:
+            logger.error(f"Metric {self.name} collection error: {str(e)}")
+            return []
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in samples]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge_callback(self, name: str, help: str, labels: Sequence[str], collect) -> CallbackMetric:
+        return self._add(CallbackMetric(name, help, "gauge", labels, collect))
+
+    def counter_callback(self, name: str, help: str, labels: Sequence[str], collect) -> CallbackMetric:
+        return self._add(CallbackMetric(name, help, "counter", labels, collect))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ---- slow request profiling ----
+
+class _Profile:
+    __slots__ = ("stacks", "started")
+
+    def __init__(self):
+        self.stacks: StackCounter = StackCounter()
+        self.started = time.perf_counter()
+
+
+class SlowRequestProfiler:
+    """Samples the event loop thread's stack while sampled requests are in flight.
+
+    Requests share the loop, so a sample is attributed to every profiled
+    request in flight at that moment. The stacks show where the loop spent
+    its time while the slow request was waiting; they are not a per-request
+    call tree.
+    """
+
+    def __init__(self, threshold_ms: float, sample_rate: float = 0.1, interval_ms: float = 5.0, keep: int = 20, depth: int = 25):
+        self.threshold = threshold_ms / 1000.0
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000.0
+        self.depth = depth
+        self.slow: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._active: List[_Profile] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target: Optional[int] = None
+
+    def begin(self) -> Optional[_Profile]:
+        if random.random() >= self.sample_rate:
+            return None
+        profile = _Profile()
+        with self._lock:
+            self._target = threading.get_ident()
+            self._active.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return profile
+
+    def end(self, profile: _Profile, method: str, route: str, status: int, duration: float) -> None:
+        with self._lock:
+            self._active.remove(profile)
+            if not self._active:
+                self._wake.clear()
+        if duration < self.threshold:
+            return
+        top = profile.stacks.most_common(10)
+        record = {
+            "method": method,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration * 1000, 1),
+            "samples": sum(profile.stacks.values()),
+            "stacks": [{"count": count, "stack": stack.split(";")} for stack, count in top],
+            "at": time.time(),
+        }
+        self.slow.append(record)
+        hottest = top[0][0].rsplit(";", 1)[-1] if top else "no samples"
+        logger.warning(f"Slow request {method} {route} took {record['duration_ms']}ms; hottest frame: {hottest}")
+
+    def _sample(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None and len(names) < self.depth:
+                code = frame.f_code
+                names.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            stack = ";".join(reversed(names))
+            with self._lock:
+                for profile in self._active:
+                    profile.stacks[stack] += 1
+
+
+# ---- request instrumentation ----
+
+class HttpMetrics:
+    """Per-route request counts and latency (time to response start)"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests by method, route template and status", ("method", "route", "status")
+        )
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "Time from request to response start", ("method", "route")
+        )
+        self.in_progress = 0
+        registry.gauge_callback("http_requests_in_progress", "HTTP requests being handled", (), lambda: [((), self.in_progress)])
+
+
+class MetricsMiddleware:
+    def __init__(self, app, metrics: HttpMetrics, profiler: Optional[SlowRequestProfiler] = None):
+        self.app = app
+        self.metrics = metrics
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        started = time.perf_counter()
+        status = [500, None]  # status code, seconds to response start
+        profile = self.profiler.begin() if self.profiler is not None else None
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                status[1] = time.perf_counter() - started
+            await send(message)
+
+        metrics.in_progress += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_progress -= 1
+            elapsed = status[1] if status[1] is not None else time.perf_counter() - started
+            route = scope.get("route")
+            template = route.path if route is not None else "unmatched"
+            metrics.requests.inc((scope["method"], template, str(status[0])))
+            metrics.latency.observe((scope["method"], template), elapsed)
+            if profile is not None:
+                self.profiler.end(profile, scope["method"], template, status[0], elapsed)
+
+
+class LoopLagMonitor:
+    """How late asyncio.sleep(interval) wakes up: time the loop was busy with other work"""
+
+    def __init__(self, registry: MetricsRegistry, interval: float = 0.5):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.lag = registry.histogram(
+            "event_loop_lag_seconds", "Delay of event loop wake-ups beyond the scheduled time", (),
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+        )
+        registry.gauge_callback("event_loop_lag_last_seconds", "Most recent event loop lag sample", (), lambda: [((), self.last_lag)])
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - scheduled)
+            self.lag.observe((), self.last_lag)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Mongo command latency by command name and outcome (runs on driver threads)"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.latency = registry.histogram(
+            "mongodb_command_duration_seconds", "MongoDB command round trips", ("command", "outcome")
+        )
+
+    def started(self, event) -> None:
+        pass
+
+    def succeeded(self, event) -> None:
+        self.latency.observe((event.command_name, "success"), event.duration_micros / 1e6)
+
+    def failed(self, event) -> None:
+        self.latency.observe((event.command_name, "failure"), event.duration_micros / 1e6)
@@ -0,0 +1,172 @@
+"""Versioned offline bundle with deltas since a client's version.
+
+The sync collections are read from five datasets. Whenever one of their
+versions changes, a new sync version is recorded in a bounded ring as a map
+of record id -> record. The records are the frozen snapshot objects
+themselves, so one ring entry costs only the maps.
+
+- A full snapshot is encoded once per sync version.
+- A delta from an older version still in the ring is encoded once per
+  (since, current) pair.
+- Both are cached, so reconnecting clients share the same bytes.
+
+Version tokens are a hash of the synced content, so every worker, and the
+same worker after a restart, hands out the same token for the same data. A
+token this process never recorded, or one older than the ring reaches, gets
+a full snapshot.
+"""
+import hashlib
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from cachetools import LRUCache
+
+from data_store import DatasetStore
+from response_cache import EncodedResponse, encode_json, make_etag, resolve_path
+
+
+@dataclass(frozen=True)
+class SyncCollection:
+    dataset: str
+    path: str = ""
+    id_field: Optional[str] = 'id'  # None: a single object (or null) rather than a list
+
+
+SYNC_COLLECTIONS: Dict[str, SyncCollection] = {
+    'alerts': SyncCollection('alerts.json'),
+    'evacuation_centers': SyncCollection('evacuation_centers.json'),
+    'flood_zones': SyncCollection('flood_zones.json'),
+    'knowledge_cards': SyncCollection('knowledge_cards.json'),
+    'active_cyclone': SyncCollection('cyclone_data.json', 'active_cyclone', id_field=None),
+}
+
+State = Dict[str, Any]  # collection -> {id: record} (or the single object)
+
+TOKEN = re.compile(r"[0-9a-f]{32}")
+# Tokens handed out before they were content hashes: "<epoch>-<counter>"
+LEGACY_TOKEN = re.compile(r"[0-9a-f]+-[0-9]+")
+
+
+class InvalidVersion(ValueError):
+    pass
+
+
+def diff_records(before: Dict[Any, Any], after: Dict[Any, Any]) -> Dict[str, Any]:
+    return {
+        "added": [record for key, record in after.items() if key not in before],
+        "changed": [record for key, record in after.items() if key in before and before[key] != record],
+        "removed": [key for key in before if key not in after],
+    }
+
+
+class OfflineSync:
+    def __init__(self, store: DatasetStore, collections: Dict[str, SyncCollection] = SYNC_COLLECTIONS, history: int = 32):
+        self.store = store
+        self.collections = collections
+        self._inputs: Optional[Tuple[int, ...]] = None
+        self._version = 0
+        self._token: Optional[str] = None
+        self._states: Deque[Tuple[str, State]] = deque(maxlen=history)
+        self._snapshot: Optional[EncodedResponse] = None
+        self._deltas: LRUCache = LRUCache(maxsize=history * 2)
+        self.builds = 0
+
+    def token(self, state: State) -> str:
+        """Content hash of a sync state, the same in every process"""
+        return hashlib.blake2b(encode_json(state), digest_size=16).hexdigest()
+
+    def parse_token(self, token: str) -> Optional[str]:
+        """The token itself, None for a legacy token (always answered with a snapshot)"""
+        if TOKEN.fullmatch(token):
+            return token
+        if LEGACY_TOKEN.fullmatch(token):
+            return None
+        raise InvalidVersion(token)
+
+    def _read_state(self) -> Optional[Tuple[Tuple[int, ...], State]]:
+        names = sorted({c.dataset for c in self.collections.values()})
+        snapshots = {name: self.store.get(name) for name in names}
+        if any(snapshot is None for snapshot in snapshots.values()):
+            return None
+        inputs = tuple(snapshots[name].version for name in names)
+        if inputs == self._inputs:
+            return inputs, self._states[-1][1]
+        state: State = {}
+        for name, collection in self.collections.items():
+            value = resolve_path(snapshots[collection.dataset].data, collection.path)
+            if collection.id_field is None:
+                state[name] = value
+            else:
+                state[name] = {record.get(collection.id_field): record for record in value or ()}
+        return inputs, state
+
+    def current(self) -> Optional[str]:
+        """Token of the latest sync version, recording a new one if any input dataset changed"""
+        read = self._read_state()
+        if read is None:
+            return None
+        inputs, state = read
+        if inputs != self._inputs:
+            self._inputs = inputs
+            token = self.token(state)
+            if token != self._token:
+                # A reload that left the synced records as they were keeps the version
+                self._token = token
+                self._version += 1
+                self._states.append((token, state))
+                self._snapshot = None
+        return self._token
+
+    def snapshot(self) -> Optional[EncodedResponse]:
+        token = self.current()
+        if token is None:
+            return None
+        if self._snapshot is None or self._snapshot.version != self._version:
+            state = self._states[-1][1]
+            body = encode_json({
+                "type": "snapshot",
+                "version": token,
+                "collections": {
+                    name: list(state[name].values()) if collection.id_field else state[name]
+                    for name, collection in self.collections.items()
+                },
+            })
+            self._snapshot = EncodedResponse(body=body, etag=make_etag(body), version=self._version)
+            self.builds += 1
+        return self._snapshot
+
+    def sync(self, since: Optional[str]) -> Optional[EncodedResponse]:
+        """Delta from `since` if it is still in the history ring, else the full snapshot"""
+        token = self.current()
+        if token is None:
+            return None
+        base = self.parse_token(since) if since else None
+        states = dict(self._states)
+        if base is None or base not in states:
+            return self.snapshot()
+
+        key = (base, token)
+        encoded = self._deltas.get(key)
+        if encoded is None:
+            before, after = states[base], states[token]
+            collections: Dict[str, Any] = {}
+            for name, collection in self.collections.items():
+                if collection.id_field is None:
+                    if before[name] != after[name]:
+                        collections[name] = {"value": after[name]}
+                    continue
+                delta = diff_records(before[name], after[name])
+                if any(delta.values()):
+                    collections[name] = delta
+            body = encode_json({
+                "type": "delta",
+                "since": since,
+                "version": token,
+                "collections": collections,
+            })
+            encoded = EncodedResponse(body=body, etag=make_etag(body), version=self._version)
+            self._deltas[key] = encoded
+            self.builds += 1
+        return encoded
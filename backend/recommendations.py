@@ -0,0 +1,143 @@
+"""AI safety recommendations computed once per change in their inputs.
+
+The recommendations only depend on a few values (temperature, condition,
+rain probability, AQI value/category and alert count). They are fingerprinted
+and generated once per distinct fingerprint. When weather, AQI or alerts
+reload, a background refresh runs while the last good answer keeps being
+served (stale-while-revalidate), so requests never wait on the model once
+a first answer exists.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from cachetools import LRUCache
+
+from ai_client import AIClient
+from data_store import DatasetSnapshot, DatasetStore
+
+logger = logging.getLogger(__name__)
+
+INPUT_DATASETS = ('weather_data.json', 'aqi_data.json', 'alerts.json')
+
+FALLBACK_RECOMMENDATIONS = [
+    {"type": "weather", "message": "Carry an umbrella, high chance of rain expected.", "priority": "medium"},
+    {"type": "cyclone", "message": "Cyclone approaching coast. Follow evacuation orders.", "priority": "high"},
+    {"type": "aqi", "message": "Air quality moderate. Sensitive groups should limit outdoor activities.", "priority": "medium"}
+]
+
+ERROR_RECOMMENDATIONS = [
+    {"type": "weather", "message": "Monitor weather updates regularly.", "priority": "medium"},
+    {"type": "safety", "message": "Keep emergency contacts handy.", "priority": "high"}
+]
+
+
+def fingerprint(inputs: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def build_prompt(inputs: Dict[str, Any]) -> str:
+    return f"""Based on the following current conditions, provide 3-5 actionable safety recommendations for citizens:
+
+Weather: Temperature {inputs['temperature']}°C, {inputs['condition']}, Rain probability {inputs['rain_probability']}%
+AQI: {inputs['aqi']} ({inputs['aqi_category']})
+Active Alerts: {inputs['alert_count']} alerts including severity levels
+
+Provide recommendations as a JSON array with format: {{"type": "category", "message": "recommendation text", "priority": "high/medium/low"}}"""
+
+
+def parse_recommendations(text: str) -> List[Dict[str, Any]]:
+    json_match = re.search(r'\[.*\]', text, re.DOTALL)
+    if json_match:
+        return json.loads(json_match.group())
+    return FALLBACK_RECOMMENDATIONS
+
+
+class RecommendationService:
+    def __init__(self, store: DatasetStore, ai_client: AIClient, history: int = 32):
+        self.store = store
+        self.ai_client = ai_client
+        self._results: LRUCache = LRUCache(maxsize=history)
+        self._latest: Optional[Dict[str, Any]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        store.subscribe(self._on_reload)
+
+    def inputs(self) -> Dict[str, Any]:
+        weather = self.store.data('weather_data.json')
+        aqi = self.store.data('aqi_data.json')
+        alerts = self.store.data('alerts.json')
+        return {
+            "temperature": weather['current']['temperature'],
+            "condition": weather['current']['condition'],
+            "rain_probability": weather['current']['rain_probability'],
+            "aqi": aqi['current']['aqi'],
+            "aqi_category": aqi['current']['category'],
+            "alert_count": len(alerts),
+        }
+
+    def _on_reload(self, snapshot: DatasetSnapshot, previous: Optional[DatasetSnapshot]) -> None:
+        if snapshot.name in INPUT_DATASETS:
+            self.refresh_in_background()
+
+    def refresh_in_background(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop yet (import-time load); the first request will compute
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_until_current())
+
+    async def _refresh_until_current(self) -> None:
+        # Inputs may change again while the model is answering; loop until caught up
+        while True:
+            try:
+                inputs = self.inputs()
+            except Exception as e:
+                logger.error(f"AI Recommendations inputs unavailable: {str(e)}")
+                return
+            key = fingerprint(inputs)
+            if key in self._results:
+                self._latest = self._results[key]
+                return
+            try:
+                await self._generate(inputs, key)
+            except Exception as e:
+                logger.error(f"AI Recommendations error: {str(e)}")
+                return
+
+    async def _generate(self, inputs: Dict[str, Any], key: str) -> Dict[str, Any]:
+        text = await self.ai_client.generate(build_prompt(inputs), cache_key=f"recommendations|{key}")
+        result = {
+            "recommendations": parse_recommendations(text),
+            "inputs_fingerprint": key,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._results[key] = result
+        self._latest = result
+        return result
+
+    async def get(self) -> Dict[str, Any]:
+        """Current recommendations; stale ones are served while a refresh runs"""
+        try:
+            inputs = self.inputs()
+            key = fingerprint(inputs)
+        except Exception as e:
+            logger.error(f"AI Recommendations inputs unavailable: {str(e)}")
+            return {"recommendations": ERROR_RECOMMENDATIONS, "stale": True}
+        result = self._results.get(key)
+        if result is not None:
+            return {**result, "stale": False}
+        if self._latest is not None:
+            self.refresh_in_background()
+            return {**self._latest, "stale": True}
+        # Nothing generated yet: the very first request has to wait for the model
+        try:
+            result = await self._generate(inputs, key)
+        except Exception as e:
+            logger.error(f"AI Recommendations error: {str(e)}")
+            return {"recommendations": ERROR_RECOMMENDATIONS, "stale": True}
+        return {**result, "stale": False}
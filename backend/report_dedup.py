@@ -0,0 +1,264 @@
+"""Near-duplicate detection for incoming community reports.
+
+Reports from the last few hours are held in memory, keyed by report_type and
+place. The place is a ~1 km grid cell when the report has coordinates and the
+normalized location text when it does not. Descriptions are reduced to
+content words (stop words dropped, plural and tense endings stripped) and a
+64-bit SimHash of those is split into 5 bands of 12-13 bits, each a hash
+bucket. Two reports whose hashes differ in at most max_distance (12) bits
+differ in at most 2 bits in one of the bands (pigeonhole). So a lookup
+probes every band value within 2 bits of the report's own (multi-probe).
+That is up to 5 x 92 dict lookups per neighbouring cell, and cells without
+reports of that type are skipped.
+
+The reports found are compared bit by bit. An unrelated report lands in a
+probed bucket about 6% of the time, so that part of a lookup still grows
+with the reports held nearby, at about a sixteenth of the cost of comparing
+against each of them. (Narrow exact-match bands, one per allowed bit,
+catch an unrelated report about 40% of the time.)
+
+Numbers name places (block 12, ward 3, NH 16), and one changed digit barely
+moves a SimHash, so reports only merge when their descriptions carry the
+same numbers. The default max_distance of 12 bits separates the labelled
+duplicate and distinct pairs in tests/test_report_dedup.py.
+"""
+import hashlib
+import heapq
+import itertools
+import logging
+import math
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from spatial import record_coordinates
+
+logger = logging.getLogger(__name__)
+
+CELL_DEGREES = 0.01  # ~1.1 km of latitude
+BITS = 64
+MAX_DISTANCE = 12
+BANDS = 5
+
+# Function words shift a short description's hash more than its content does
+STOPWORDS = frozenset(
+    "a an the is are was were be been has have had and or of in on at to for from by with "
+    "into onto our my we us there this that it its since about due after".split()
+)
+SUFFIXES = ('ing', 'ed', 'es', 's')
+
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def normalize_location(text: Optional[str]) -> str:
+    return " ".join(_WORD.findall(str(text or "").lower()))
+
+
+def _stem(word: str) -> str:
+    for suffix in SUFFIXES:
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def _tokens(text: str) -> List[str]:
+    # Words only: bigrams make short paraphrases ("the road" / "road") look far apart
+    return [_stem(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS and (len(w) > 1 or w.isdigit())]
+
+
+def numbers(text: Optional[str]) -> FrozenSet[str]:
+    return frozenset(w for w in _WORD.findall(str(text or "")) if w.isdigit())
+
+
+def simhash(text: Optional[str]) -> int:
+    """64-bit SimHash over the words of a text"""
+    tokens = _tokens(str(text or ""))
+    if not tokens:
+        return 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "big") for t in tokens],
+        dtype=">u8",
+    )
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(len(tokens), BITS)
+    majority = (bits.sum(axis=0) * 2 > len(tokens)).astype(np.uint8)
+    return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _probe_masks(width: int, bits: int) -> List[int]:
+    """XOR masks reaching every value within `bits` flipped bits of a band value"""
+    masks = [0]
+    for k in range(1, bits + 1):
+        masks.extend(sum(1 << bit for bit in flipped) for flipped in itertools.combinations(range(width), k))
+    return masks
+
+
+def _timestamp(report: Dict[str, Any]) -> datetime:
+    value = report.get('timestamp')
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value is None:
+        return datetime.now(timezone.utc)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+@dataclass(eq=False)
+class _Entry:
+    report: Dict[str, Any]
+    timestamp: datetime
+    fingerprint: int
+    numbers: FrozenSet[str]
+    expires: datetime
+    keys: List[Hashable] = field(default_factory=list)
+    corroborations: int = 0
+    held: bool = True
+
+
+class DuplicateIndex:
+    def __init__(
+        self,
+        window: timedelta = timedelta(hours=6),
+        max_distance: int = MAX_DISTANCE,
+        max_entries: int = 100000,
+        bands: int = BANDS,
+    ):
+        self.window = window
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.bands = bands
+        # Any pair within max_distance differs in at most this many bits in one of the bands
+        self.probe_bits = max_distance // bands
+        self._band_widths = [BITS // bands + (1 if i < BITS % bands else 0) for i in range(bands)]
+        self._probes = [_probe_masks(width, self.probe_bits) for width in self._band_widths]
+        self._buckets: Dict[Hashable, List[_Entry]] = {}
+        self._held_at: Dict[Hashable, int] = {}  # (report_type, place) -> entries held there
+        self._entries: Deque[_Entry] = deque()  # in arrival order, for max_entries
+        self._expiry: List[Tuple[datetime, int, _Entry]] = []  # heap on expiry; bootstrap adds out of order
+        self._arrivals = itertools.count()
+        self._by_id: Dict[str, _Entry] = {}
+        self.suppressed = 0
+
+    def _places(self, report: Dict[str, Any], neighbours: bool) -> List[Hashable]:
+        point = record_coordinates(report)
+        if point is None:
+            return [("loc", normalize_location(report.get('location')))]
+        row, col = math.floor(point[0] / CELL_DEGREES), math.floor(point[1] / CELL_DEGREES)
+        if not neighbours:
+            return [("cell", row, col)]
+        # A report just across a cell edge is still a neighbour
+        return [("cell", row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+
+    def _band_values(self, fingerprint: int) -> List[Tuple[int, int]]:
+        values, shift = [], 0
+        for i, width in enumerate(self._band_widths):
+            values.append((i, (fingerprint >> shift) & ((1 << width) - 1)))
+            shift += width
+        return values
+
+    def _drop(self, entry: _Entry) -> None:
+        if not entry.held:
+            return
+        entry.held = False
+        self._by_id.pop(entry.report.get('id'), None)
+        place = entry.keys[0][:2]
+        self._held_at[place] -= 1
+        if not self._held_at[place]:
+            del self._held_at[place]
+        for key in entry.keys:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            bucket.remove(entry)
+            if not bucket:
+                del self._buckets[key]
+
+    def _expire(self, now: datetime) -> None:
+        while self._expiry and self._expiry[0][0] < now:
+            self._drop(heapq.heappop(self._expiry)[2])
+        while self._entries and not self._entries[0].held:
+            self._entries.popleft()
+
+    def _drop_oldest(self) -> None:
+        while self._entries:
+            entry = self._entries.popleft()
+            if entry.held:
+                self._drop(entry)
+                return
+
+    def match(self, report: Dict[str, Any]) -> Optional[_Entry]:
+        """The held report this one duplicates, if any"""
+        timestamp = _timestamp(report)
+        self._expire(timestamp)
+        report_type = str(report.get('report_type') or '').lower()
+        fingerprint = simhash(report.get('description'))
+        report_numbers = numbers(report.get('description'))
+        best, best_distance = None, self.max_distance + 1
+        seen = set()
+        for place in self._places(report, neighbours=True):
+            if (report_type, place) not in self._held_at:
+                continue
+            for band, value in self._band_values(fingerprint):
+                for mask in self._probes[band]:
+                    for entry in self._buckets.get((report_type, place, band, value ^ mask), ()):
+                        if id(entry) in seen:
+                            continue
+                        seen.add(id(entry))
+                        distance = hamming(fingerprint, entry.fingerprint)
+                        if distance > self.max_distance or entry.numbers != report_numbers:
+                            continue
+                        if distance < best_distance or (distance == best_distance and entry.timestamp < best.timestamp):
+                            best, best_distance = entry, distance
+        return best
+
+    def add(self, report: Dict[str, Any]) -> None:
+        """Hold a canonical report for the rest of the window"""
+        timestamp = _timestamp(report)
+        if report.get('id') in self._by_id or timestamp < datetime.now(timezone.utc) - self.window:
+            return
+        report_type = str(report.get('report_type') or '').lower()
+        entry = _Entry(
+            report=report,
+            timestamp=timestamp,
+            expires=timestamp + self.window,
+            fingerprint=simhash(report.get('description')),
+            numbers=numbers(report.get('description')),
+            corroborations=int(report.get('corroboration_count') or 0),
+        )
+        place = self._places(report, neighbours=False)[0]
+        self._held_at[(report_type, place)] = self._held_at.get((report_type, place), 0) + 1
+        for band in self._band_values(entry.fingerprint):
+            key = (report_type, place) + band
+            entry.keys.append(key)
+            self._buckets.setdefault(key, []).append(entry)
+        self._entries.append(entry)
+        heapq.heappush(self._expiry, (entry.expires, next(self._arrivals), entry))
+        self._by_id[report.get('id')] = entry
+        if len(self._by_id) > self.max_entries:
+            self._drop_oldest()
+
+    def corroborate(self, entry: _Entry) -> Dict[str, Any]:
+        """Count a suppressed duplicate against its canonical report"""
+        entry.corroborations += 1
+        self.suppressed += 1
+        return {**entry.report, "corroboration_count": entry.corroborations}
+
+    async def bootstrap(self, collection) -> None:
+        """Hold the reports of the current window from Mongo; reports already held live are skipped"""
+        since = datetime.now(timezone.utc) - self.window
+        try:
+            cursor = collection.find({"timestamp": {"$gte": since}}, {"_id": 0, "corroborated_by": 0}).sort("timestamp", 1)
+            async for report in cursor:
+                self.add(report)
+            logger.info(f"Duplicate filter bootstrapped with {len(self._by_id)} community reports")
+        except Exception as e:
+            logger.error(f"Unable to bootstrap community report duplicate filter: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"held": len(self._by_id), "buckets": len(self._buckets), "suppressed": self.suppressed}
@@ -0,0 +1,400 @@
+"""Write-behind ingestion of community reports.
+
+Validated reports are appended to a local spool file and queued in memory.
+The HTTP request returns as soon as the report is in the spool, flushed and
+(unless fsync is turned off) fsynced, without waiting for Mongo. A
+background task flushes the queue to Mongo with insert_many, in batches
+bounded by size and time.
+
+- Spool writes run in a worker thread, never on the event loop. The reports
+  that arrive while one write is in progress share the next write and
+  fsync (group commit), so durability costs one fsync per burst rather
+  than one per report.
+
+- Memory is bounded: a full queue rejects new reports, so the API
+  answers 503 instead of buffering without limit.
+- Spool files are rotated in segments and deleted once every report in
+  them is stored.
+- On restart, leftover segments are replayed. A unique index on id makes
+  the replay idempotent.
+- A batch is retried as long as Mongo is unreachable. A batch that Mongo
+  rejects max_attempts times is written one document at a time instead.
+  Documents that are still refused go to dead-letter.jsonl in the spool
+  directory, so one bad document cannot block the queue.
+
+Corroborations of an existing report (suppressed duplicates) go through the
+same queue. They are applied after the inserts of their batch, so the
+canonical report is already stored when they are counted. Each one carries
+the id of the suppressed report and is added to the set corroborated_by,
+with corroboration_count derived from its size, so a retried batch or a
+replayed segment never counts the same corroboration twice.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+DEAD_LETTER = 'dead-letter.jsonl'
+
+
+class IngestQueueFull(Exception):
+    """The in-memory queue is at capacity; the client should retry later"""
+
+
+def _encode(doc: Dict[str, Any]) -> str:
+    return json.dumps(doc, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+
+
+def _transient(error: Exception) -> bool:
+    """Mongo unavailable (retry until it is back), as opposed to Mongo refusing a document"""
+    if isinstance(error, (ConnectionFailure, OSError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, PyMongoError) and error.has_error_label('RetryableWriteError')
+
+
+def _decode(line: str) -> Dict[str, Any]:
+    doc = json.loads(line)
+    if isinstance(doc.get('timestamp'), str):
+        doc['timestamp'] = datetime.fromisoformat(doc['timestamp'])
+    if doc.get('_op') == 'corroborate' and 'corroboration_id' not in doc:
+        # Spooled before corroborations carried ids; the same line always gets the same one
+        doc['corroboration_id'] = f"{doc['id']}@{doc['timestamp'].isoformat()}"
+    return doc
+
+
+class ReportIngestQueue:
+    def __init__(
+        self,
+        collection,
+        spool_dir: Path,
+        max_pending: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.25,
+        segment_size: int = 5000,
+        fsync: bool = True,
+        max_attempts: int = 5,
+        retry_delay: float = 0.5,
+    ):
+        self.collection = collection
+        self.spool_dir = Path(spool_dir)
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._backlog: List[Tuple[int, Dict[str, Any]]] = []  # replayed from spool, flushed first
+        self._pending_by_id: Dict[str, Dict[str, Any]] = {}
+        self._segment_pending: Dict[int, int] = {}
+        self._segment_id = 0
+        self._segment_count = 0
+        self._segment_file = None
+        self._spool_waiting: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._spool_writing = 0
+        self._spool_wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.flush_batches = 0
+        self.flush_errors = 0
+        self.duplicates_skipped = 0
+        self.dead_lettered = 0
+        self._latencies: Deque[float] = deque(maxlen=512)
+
+    # ---- spool ----
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.spool_dir / f"reports-{segment:010d}.jsonl"
+
+    async def _open_segment(self) -> None:
+        segment = self._segment_id + 1
+        segment_file = await asyncio.to_thread(open, self._segment_path(segment), 'a', encoding='utf-8')
+        previous, previous_file = self._segment_id, self._segment_file
+        self._segment_id, self._segment_count, self._segment_file = segment, 0, segment_file
+        self._segment_pending[segment] = 0
+        if previous_file:
+            await asyncio.to_thread(previous_file.close)
+            self._release(previous, 0)
+
+    def _append(self, lines: str) -> None:
+        self._segment_file.write(lines)
+        self._segment_file.flush()
+        if self.fsync:
+            os.fsync(self._segment_file.fileno())
+
+    async def _write_spool(self) -> None:
+        """Group commit: every report waiting when a write starts shares it"""
+        while True:
+            await self._spool_wakeup.wait()
+            self._spool_wakeup.clear()
+            while self._spool_waiting:
+                group, self._spool_waiting = self._spool_waiting, []
+                self._spool_writing = len(group)
+                try:
+                    if self._segment_count >= self.segment_size:
+                        await self._open_segment()
+                    await asyncio.to_thread(self._append, ''.join(_encode(doc) + "\n" for doc, _ in group))
+                except Exception as e:
+                    logger.error(f"Unable to spool {len(group)} community reports: {str(e)}")
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                finally:
+                    self._spool_writing = 0
+                self._segment_count += len(group)
+                self._segment_pending[self._segment_id] += len(group)
+                for doc, future in group:
+                    self._queue.put_nowait((self._segment_id, doc))
+                    self.accepted += 1
+                    if not future.done():
+                        future.set_result(None)
+
+    def _release(self, segment: int, flushed: int) -> None:
+        """Drop a segment file once it is closed and everything in it is stored"""
+        remaining = self._segment_pending.get(segment, 0) - flushed
+        self._segment_pending[segment] = remaining
+        if remaining <= 0 and (segment != self._segment_id or self._segment_file is None):
+            self._segment_pending.pop(segment, None)
+            try:
+                self._segment_path(segment).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _replay(self) -> None:
+        for path in sorted(self.spool_dir.glob('reports-*.jsonl')):
+            segment = int(path.stem.split('-')[1])
+            self._segment_id = max(self._segment_id, segment)
+            docs = []
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        docs.append(_decode(line))
+                    except ValueError:
+                        logger.error(f"Skipping corrupt spooled report in {path.name}")
+            self._segment_pending[segment] = len(docs)
+            self._backlog.extend((segment, doc) for doc in docs)
+            # Readable by id until flushed, like a fresh submission
+            self._pending_by_id.update((doc['id'], doc) for doc in docs if '_op' not in doc)
+            if not docs:
+                path.unlink()
+                self._segment_pending.pop(segment, None)
+        if self._backlog:
+            logger.info(f"Replaying {len(self._backlog)} spooled community reports")
+
+    # ---- lifecycle ----
+
+    async def start(self) -> None:
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._spool_wakeup = asyncio.Event()
+        self._replay()
+        await self._open_segment()
+        self._writer = asyncio.create_task(self._write_spool())
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush what is queued (best effort within timeout); the spool covers the rest"""
+        if self._task is None:
+            return
+        deadline = time.monotonic() + timeout
+        while (self._spool_waiting or self._spool_writing or self._backlog or self._queue.qsize()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in (self._writer, self._task):
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._writer = self._task = None
+        if self._segment_file:
+            await asyncio.to_thread(self._segment_file.close)
+            self._segment_file = None
+            self._release(self._segment_id, 0)
+
+    # ---- producer side ----
+
+    async def submit(self, doc: Dict[str, Any]) -> None:
+        """Spool and enqueue a report; raises IngestQueueFull when at capacity"""
+        # Registered first: the flusher may store it before this coroutine resumes
+        self._pending_by_id[doc['id']] = doc
+        try:
+            await self._enqueue(doc)
+        except Exception:
+            self._pending_by_id.pop(doc['id'], None)
+            raise
+
+    async def corroborate(self, report_id: str, corroboration_id: str, at: datetime) -> None:
+        """Spool and enqueue one more corroboration of a stored (or queued) report"""
+        await self._enqueue({"_op": "corroborate", "id": report_id, "corroboration_id": corroboration_id, "timestamp": at})
+
+    async def _enqueue(self, doc: Dict[str, Any]) -> None:
+        """Returns once the document is in the spool and queued for Mongo"""
+        if self._queue is None:
+            raise RuntimeError("ingest queue is not started")
+        if self._queue.qsize() + len(self._spool_waiting) + self._spool_writing >= self.max_pending:
+            self.rejected += 1
+            raise IngestQueueFull()
+        future = asyncio.get_running_loop().create_future()
+        self._spool_waiting.append((doc, future))
+        self._spool_wakeup.set()
+        await future
+
+    def pending(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """An accepted report that is not in Mongo yet"""
+        return self._pending_by_id.get(report_id)
+
+    # ---- flusher ----
+
+    async def _collect(self) -> List[Tuple[int, Dict[str, Any]]]:
+        if self._backlog:
+            batch = self._backlog[:self.batch_size]
+            del self._backlog[:self.batch_size]
+            return batch
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, docs: List[Dict[str, Any]]) -> None:
+        inserts = [doc for doc in docs if '_op' not in doc]
+        corroborations: Dict[str, List[Any]] = {}
+        for doc in docs:
+            if doc.get('_op') == 'corroborate':
+                ids_and_last = corroborations.setdefault(doc['id'], [[], doc['timestamp']])
+                ids_and_last[0].append(doc['corroboration_id'])
+                ids_and_last[1] = max(ids_and_last[1], doc['timestamp'])
+
+        if inserts:
+            # insert_many adds _id to the dicts; give Mongo copies so pending lookups stay clean
+            try:
+                await self.collection.insert_many([dict(doc) for doc in inserts], ordered=False)
+            except BulkWriteError as e:
+                errors = e.details.get('writeErrors', [])
+                if any(err.get('code') != DUPLICATE_KEY for err in errors):
+                    raise
+                # Already stored by an earlier attempt (e.g. spool replay after a crash)
+                self.duplicates_skipped += len(errors)
+        if corroborations:
+            await self.collection.bulk_write([
+                UpdateOne({"id": report_id}, [
+                    {"$set": {"corroborated_by": {"$setUnion": [{"$ifNull": ["$corroborated_by", []]}, ids]}}},
+                    {"$set": {
+                        "corroboration_count": {"$size": "$corroborated_by"},
+                        "last_corroborated_at": {"$max": ["$last_corroborated_at", last]},
+                    }},
+                ])
+                for report_id, (ids, last) in corroborations.items()
+            ], ordered=False)
+
+    async def _write_each(self, docs: List[Dict[str, Any]]) -> None:
+        """Write documents one at a time; those Mongo still refuses are dead-lettered"""
+        for doc in docs:
+            try:
+                await self._write([doc])
+            except Exception as e:
+                if _transient(e):
+                    raise
+                await asyncio.to_thread(self._dead_letter, doc, e)
+
+    def _dead_letter(self, doc: Dict[str, Any], error: Exception) -> None:
+        line = _encode({"doc": doc, "error": str(error), "failed_at": datetime.now(timezone.utc)})
+        with open(self.spool_dir / DEAD_LETTER, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+        self.dead_lettered += 1
+        logger.error(f"Community report {doc.get('id')} moved to {DEAD_LETTER}: {str(error)}")
+
+    async def _run(self) -> None:
+        backoff = self.retry_delay
+        while True:
+            batch = await self._collect()
+            docs = [doc for _, doc in batch]
+            rejections = 0
+            while True:
+                started = time.perf_counter()
+                try:
+                    if rejections < self.max_attempts:
+                        await self._write(docs)
+                    else:
+                        await self._write_each(docs)
+                    break
+                except Exception as e:
+                    self.flush_errors += 1
+                    if not _transient(e):
+                        rejections += 1
+                    logger.error(f"Community report flush failed ({len(docs)} reports), retrying: {str(e)}")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+            backoff = self.retry_delay
+            self._latencies.append(time.perf_counter() - started)
+            self.flushed += len(docs)
+            self.flush_batches += 1
+
+            per_segment: Dict[int, int] = {}
+            for segment, doc in batch:
+                per_segment[segment] = per_segment.get(segment, 0) + 1
+                if '_op' not in doc:
+                    self._pending_by_id.pop(doc['id'], None)
+            for segment, count in per_segment.items():
+                self._release(segment, count)
+
+    # ---- metrics ----
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "replay_backlog": len(self._backlog),
+            "max_pending": self.max_pending,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "flushed": self.flushed,
+            "flush_batches": self.flush_batches,
+            "flush_errors": self.flush_errors,
+            "duplicates_skipped": self.duplicates_skipped,
+            "dead_lettered": self.dead_lettered,
+            "flush_latency_ms": {
+                "last": round(self._latencies[-1] * 1000, 3) if self._latencies else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": percentile(1.0),
+            },
+            "spool_segments": len(self._segment_pending),
+        }
@@ -0,0 +1,245 @@
+"""Pre-serialized JSON responses with ETag / If-None-Match support.
+
+A (dataset, sub-path) response is encoded to bytes once per dataset version
+and reused until the dataset is reloaded. Clients that send back the ETag
+they already hold get an empty 304.
+
+The same response can also be served as MessagePack or CBOR (chosen by the
+Accept header) and gzip- or brotli-compressed (chosen by Accept-Encoding).
+Each variant is encoded once per ETag and cached, and it gets its own ETag.
+The binary formats and brotli are optional dependencies; a client asking
+for one that is not installed gets JSON or gzip instead.
+"""
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+from starlette.requests import Request
+from starlette.responses import Response
+
+from data_store import DatasetSnapshot, DatasetStore
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_MISSING = object()
+
+# Bodies smaller than this are sent uncompressed; the framing overhead outweighs the gain
+MIN_COMPRESS_SIZE = 512
+
+
+@dataclass(frozen=True)
+class EncodedResponse:
+    body: bytes  # or a memoryview into a mapped data plane snapshot
+    etag: str
+    version: int
+
+
+class BufferResponse(Response):
+    """Response whose body may be a memoryview, sent without copying"""
+
+    def render(self, content: Any) -> bytes:
+        return content if isinstance(content, memoryview) else super().render(content)
+
+
+def encode_json(data: Any) -> bytes:
+    """Encode exactly as FastAPI's JSONResponse does"""
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def resolve_path(data: Any, path: str, default: Any = None) -> Any:
+    """Follow a dotted path like 'active_cyclone.forecast_track'"""
+    if not path:
+        return data
+    value = data
+    for key in path.split("."):
+        value = value.get(key, _MISSING) if isinstance(value, dict) else _MISSING
+        if value is _MISSING:
+            return default
+    return value
+
+
+# media type -> (format name, encoder from the decoded JSON value)
+FORMATS: Dict[str, Tuple[str, Optional[Callable[[Any], bytes]]]] = {
+    "application/json": ("json", None),
+    "application/msgpack": ("msgpack", msgpack.packb if msgpack else None),
+    "application/x-msgpack": ("msgpack", msgpack.packb if msgpack else None),
+    "application/vnd.msgpack": ("msgpack", msgpack.packb if msgpack else None),
+    "application/cbor": ("cbor", cbor2.dumps if cbor2 else None),
+}
+
+# content coding -> compressor
+CODINGS: Dict[str, Optional[Callable[[bytes], bytes]]] = {
+    "br": (lambda body: brotli.compress(body, quality=9)) if brotli else None,
+    "gzip": lambda body: gzip.compress(body, compresslevel=9, mtime=0),
+}
+
+
+def _ranked(header: Optional[str]) -> List[str]:
+    """Values of an Accept-style header, highest q first (q=0 dropped)"""
+    ranked = []
+    for position, item in enumerate((header or "").split(",")):
+        value, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, number = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        if value and q > 0:
+            ranked.append((-q, position, value.strip().lower()))
+    return [value for _, _, value in sorted(ranked)]
+
+
+def negotiate(request: Request) -> Tuple[str, str, Optional[str]]:
+    """(media type, format name, content coding or None) for a request"""
+    media_type, fmt = "application/json", "json"
+    for candidate in _ranked(request.headers.get("accept")):
+        if candidate in FORMATS and (FORMATS[candidate][1] or candidate == "application/json"):
+            media_type, fmt = candidate, FORMATS[candidate][0]
+            break
+        if candidate in ("*/*", "application/*"):
+            break
+    coding = None
+    for candidate in _ranked(request.headers.get("accept-encoding")):
+        if CODINGS.get(candidate):
+            coding = candidate
+            break
+    return media_type, fmt, coding
+
+
+class VariantCache:
+    """Binary-format and compressed renditions of encoded responses, keyed by ETag"""
+
+    def __init__(self, maxsize: int = 256):
+        self._entries: LRUCache = LRUCache(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, encoded: EncodedResponse, media_type: str, fmt: str, coding: Optional[str]) -> Tuple[bytes, str, Optional[str]]:
+        """(body, etag, applied coding) of one variant"""
+        key = (encoded.etag, fmt, coding)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        body = encoded.body
+        if fmt != "json":
+            body = self._format(encoded, fmt, FORMATS[media_type][1])
+        applied = coding if coding and len(body) >= MIN_COMPRESS_SIZE else None
+        if applied:
+            body = CODINGS[applied](body)
+        suffix = "-".join(part for part in (fmt if fmt != "json" else None, applied) if part)
+        etag = encoded.etag[:-1] + "-" + suffix + '"' if suffix else encoded.etag
+        self._entries[key] = (body, etag, applied)
+        return body, etag, applied
+
+    def _format(self, encoded: EncodedResponse, fmt: str, encoder: Callable[[Any], bytes]) -> bytes:
+        key = (encoded.etag, fmt, None)
+        cached = self._entries.get(key)
+        if cached is not None:
+            return cached[0]
+        body = encoder(json.loads(bytes(encoded.body)))
+        self._entries[key] = (body, encoded.etag[:-1] + "-" + fmt + '"', None)
+        return body
+
+
+variants = VariantCache()
+
+
+def json_response(request: Request, encoded: EncodedResponse) -> Response:
+    """200/304 for an encoded response, in the format and content coding the client accepts"""
+    media_type, fmt, coding = negotiate(request)
+    if fmt == "json" and coding is None:
+        body, etag, applied = encoded.body, encoded.etag, None
+    else:
+        body, etag, applied = variants.get(encoded, media_type, fmt, coding)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if applied:
+        headers["Content-Encoding"] = applied
+    return BufferResponse(content=body, media_type=media_type, headers=headers)
+
+
+class ResponseCache:
+    """Caches encoded responses per dataset sub-path and data version"""
+
+    def __init__(self, store: DatasetStore):
+        self.store = store
+        self._entries: Dict[Tuple[str, str], EncodedResponse] = {}
+        self.hits = 0
+        self.misses = 0
+        store.subscribe(self._invalidate)
+
+    def _invalidate(self, snapshot: DatasetSnapshot, previous: Optional[DatasetSnapshot]) -> None:
+        for key in [key for key in self._entries if key[0] == snapshot.name]:
+            del self._entries[key]
+
+    def get(self, name: str, path: str = "", default: Any = None) -> Optional[EncodedResponse]:
+        snapshot = self.store.get(name)
+        if snapshot is None:
+            return None
+        shared = self.store.encoded_part(name, path, snapshot.version)
+        if shared is not None:
+            # Pre-encoded by the data plane loader; not kept here, so old snapshot files can be unmapped
+            self.hits += 1
+            return EncodedResponse(body=shared[0], etag=shared[1], version=snapshot.version)
+        key = (name, path)
+        encoded = self._entries.get(key)
+        if encoded is None or encoded.version != snapshot.version:
+            self.misses += 1
+            body = encode_json(resolve_path(snapshot.data, path, default))
+            encoded = EncodedResponse(body=body, etag=make_etag(body), version=snapshot.version)
+            self._entries[key] = encoded
+        else:
+            self.hits += 1
+        return encoded
+
+    def respond(self, request: Request, name: str, path: str = "", default: Any = None) -> Optional[Response]:
+        """Build a 200/304 response for a dataset sub-path, or None if the dataset is unavailable"""
+        encoded = self.get(name, path, default)
+        if encoded is None:
+            return None
+        return json_response(request, encoded)
@@ -0,0 +1,266 @@
+"""Full-text search over knowledge cards, alerts and disasters.
+
+Each dataset gets its own inverted index segment (term -> doc positions and
+term frequencies). The segment is built with the dataset's snapshot, so a
+reload re-indexes only that dataset. Queries are ranked with BM25, using
+collection statistics summed over the segments at query time.
+
+Tokens are folded so that spelling variants meet:
+- Devanagari and Odia text is transliterated to Latin.
+- Latin text is reduced phonetically: aspirates, long vowels, v/w/b, sh/s,
+  hard c/k and doubled letters are merged, and the u of anglicized names
+  (Cuttack) is read as the short a it stands for.
+
+So "Bhubaneswar", "Bhubaneshwar" and "ଭୁବନେଶ୍ୱର" index to the same term, as do
+"Cuttack" and "କଟକ". The last query word also matches as a prefix, for
+type-ahead.
+"""
+import bisect
+import functools
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+K1 = 1.2
+B = 0.75
+PREFIX_EXPANSIONS = 30
+MIN_PREFIX = 3
+PREFIX_WEIGHT = 0.7  # a prefix hit ranks below a whole-word hit
+
+# Indic vowel signs and viramas are combining marks, not \w; keep them inside words (dandas excluded)
+_WORD = re.compile(r"(?:[^\W_]|[\u0900-\u0963\u0966-\u0D7F])+", re.UNICODE)
+
+# ---- transliteration (Devanagari; Odia is mapped onto it by code point offset) ----
+
+_ODIA_OFFSET = 0x0B00 - 0x0900
+_ODIA_EXTRA = {'ୟ': 'य', 'ୱ': 'व'}  # Odia-only YYA and WA
+_VIRAMA = '्'
+_VOWELS = {
+    'अ': 'a', 'आ': 'aa', 'इ': 'i', 'ई': 'ii', 'उ': 'u', 'ऊ': 'uu', 'ऋ': 'ri',
+    'ए': 'e', 'ऐ': 'ai', 'ओ': 'o', 'औ': 'au',
+}
+_MATRAS = {
+    'ा': 'aa', 'ि': 'i', 'ी': 'ii', 'ु': 'u', 'ू': 'uu', 'ृ': 'ri',
+    'े': 'e', 'ै': 'ai', 'ो': 'o', 'ौ': 'au',
+}
+_CONSONANTS = {
+    'क': 'k', 'ख': 'kh', 'ग': 'g', 'घ': 'gh', 'ङ': 'n',
+    'च': 'ch', 'छ': 'chh', 'ज': 'j', 'झ': 'jh', 'ञ': 'n',
+    'ट': 't', 'ठ': 'th', 'ड': 'd', 'ढ': 'dh', 'ण': 'n',
+    'त': 't', 'थ': 'th', 'द': 'd', 'ध': 'dh', 'न': 'n',
+    'प': 'p', 'फ': 'ph', 'ब': 'b', 'भ': 'bh', 'म': 'm',
+    'य': 'y', 'र': 'r', 'ल': 'l', 'ळ': 'l', 'व': 'v',
+    'श': 'sh', 'ष': 'sh', 'स': 's', 'ह': 'h',
+}
+_SIGNS = {'ं': 'n', 'ँ': 'n', 'ः': 'h'}
+
+
+def _to_devanagari(ch: str) -> str:
+    if ch in _ODIA_EXTRA:
+        return _ODIA_EXTRA[ch]
+    if '଀' <= ch <= '୿':
+        return chr(ord(ch) - _ODIA_OFFSET)
+    return ch
+
+
+def transliterate(word: str) -> str:
+    """Devanagari/Odia word -> rough Latin spelling; other scripts pass through"""
+    chars = [_to_devanagari(ch) for ch in unicodedata.normalize('NFC', word)]
+    out: List[str] = []
+    for i, ch in enumerate(chars):
+        following = [c for c in chars[i + 1:i + 3] if c != '़']  # look past a nukta
+        nxt = following[0] if following else ''
+        if ch in _CONSONANTS:
+            out.append(_CONSONANTS[ch])
+            if nxt != _VIRAMA and nxt not in _MATRAS:
+                out.append('a')  # inherent vowel
+        elif ch in _VOWELS:
+            out.append(_VOWELS[ch])
+        elif ch in _MATRAS:
+            out.append(_MATRAS[ch])
+        elif ch in _SIGNS:
+            out.append(_SIGNS[ch])
+        elif '०' <= ch <= '९':
+            out.append(str(ord(ch) - 0x0966))
+        elif ch in (_VIRAMA, '़'):  # virama, nukta
+            continue
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+_FOLDS = [
+    (re.compile(r'c(?=[aou])|ck'), 'k'),  # hard c; "ch" and soft c (ce, ci) stay
+    (re.compile(r'(?<=[^aeiou])u(?=([^aeiou])\1)'), 'a'),  # u before a doubled consonant: Cuttack -> Kattak
+    (re.compile(r'([bcdgjkpt])h+'), r'\1'),  # aspirates: bh -> b, chh -> c
+    (re.compile(r'sh'), 's'),
+    (re.compile(r'ph'), 'f'),
+    (re.compile(r'[vw]'), 'b'),
+    (re.compile(r'q'), 'k'),
+    (re.compile(r'z'), 'j'),
+    (re.compile(r'ee'), 'i'),
+    (re.compile(r'oo'), 'u'),
+    (re.compile(r'(.)\1+'), r'\1'),  # doubled letters, incl. long vowels aa/ii/uu
+]
+
+
+@functools.lru_cache(maxsize=65536)
+def fold(word: str) -> str:
+    # Vocabularies are small next to token counts, so indexing mostly hits the cache
+    word = transliterate(word.lower())
+    word = ''.join(ch for ch in unicodedata.normalize('NFKD', word) if not unicodedata.combining(ch))
+    for pattern, replacement in _FOLDS:
+        word = pattern.sub(replacement, word)
+    if len(word) > 3 and word.endswith('a'):
+        word = word[:-1]  # final schwa: "Kataka" / "Katak"
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [folded for folded in (fold(w) for w in _WORD.findall(text)) if folded]
+
+
+def _strings(value: Any) -> Iterable[str]:
+    """Every string inside a (nested) JSON value"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    kind: str                   # result type, e.g. 'knowledge_card'
+    title_field: str
+    fields: Tuple[str, ...]     # other searchable fields (nested strings included)
+    title_boost: int = 2
+
+
+SEARCH_SOURCES: Dict[str, SearchSource] = {
+    'knowledge_cards.json': SearchSource('knowledge_card', 'title', ('category', 'content')),
+    'alerts.json': SearchSource('alert', 'title', ('type', 'description', 'affected_areas', 'action_required')),
+    'disasters.json': SearchSource('disaster', 'name', ('type', 'location', 'description')),
+}
+
+
+class SearchSegment:
+    """Inverted index of one dataset"""
+
+    def __init__(self, records: Sequence[Dict[str, Any]], source: SearchSource):
+        self.records = records
+        self.source = source
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for position, record in enumerate(records):
+            tokens = tokenize(' '.join(_strings(record.get(source.title_field)))) * source.title_boost
+            for name in source.fields:
+                tokens += tokenize(' '.join(_strings(record.get(name))))
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((position, tf))
+        self.lengths = np.asarray(lengths, dtype=np.float64)
+        self.postings = {
+            term: (np.array([p for p, _ in entries], dtype=np.int64), np.array([tf for _, tf in entries], dtype=np.float64))
+            for term, entries in postings.items()
+        }
+        self.terms = sorted(self.postings)
+
+    def df(self, term: str) -> int:
+        entry = self.postings.get(term)
+        return len(entry[0]) if entry else 0
+
+    def expand(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + '￿')
+        return self.terms[start:min(end, start + PREFIX_EXPANSIONS)]
+
+
+class SearchIndex:
+    def __init__(self, store, sources: Dict[str, SearchSource] = SEARCH_SOURCES):
+        self.store = store
+        self.sources = sources
+        for name, source in sources.items():
+            store.register(name, 'search', lambda data, source=source: SearchSegment(data or (), source))
+
+    def _segments(self, kinds: Optional[Sequence[str]]) -> List[SearchSegment]:
+        segments = []
+        for name, source in self.sources.items():
+            if kinds and source.kind not in kinds:
+                continue
+            segment = self.store.derived(name, 'search')
+            if segment is not None:
+                segments.append(segment)
+        return segments
+
+    def search(self, query: str, kinds: Optional[Sequence[str]] = None, limit: int = 10, prefix: bool = True) -> List[Dict[str, Any]]:
+        segments = self._segments(kinds)
+        terms = tokenize(query)
+        if not segments or not terms:
+            return []
+
+        # Weighted query terms: whole words, plus completions of the last word
+        weighted: Dict[str, float] = {term: 1.0 for term in terms}
+        if prefix and len(terms[-1]) >= MIN_PREFIX:
+            for segment in segments:
+                for term in segment.expand(terms[-1]):
+                    weighted.setdefault(term, PREFIX_WEIGHT)
+
+        total_docs = sum(len(segment.records) for segment in segments)
+        avgdl = max(sum(float(segment.lengths.sum()) for segment in segments) / max(total_docs, 1), 1.0)
+        scored: List[Tuple[float, int, SearchSegment]] = []
+        for segment in segments:
+            scores = np.zeros(len(segment.records))
+            norm = K1 * (1 - B + B * segment.lengths / avgdl)
+            for term, weight in weighted.items():
+                entry = segment.postings.get(term)
+                if entry is None:
+                    continue
+                df = sum(s.df(term) for s in segments)
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                positions, tf = entry
+                scores[positions] += weight * idf * tf * (K1 + 1) / (tf + norm[positions])
+            for position in np.flatnonzero(scores):
+                scored.append((float(scores[position]), int(position), segment))
+
+        scored.sort(key=lambda hit: -hit[0])
+        return [
+            {
+                "type": segment.source.kind,
+                "id": segment.records[position].get('id'),
+                "title": segment.records[position].get(segment.source.title_field),
+                "score": round(score, 4),
+                "record": segment.records[position],
+            }
+            for score, position, segment in scored[:limit]
+        ]
+
+    @property
+    def kinds(self) -> List[str]:
+        return [source.kind for source in self.sources.values()]
+
+    def context(self, query: str, limit: int = 3, max_chars: int = 600) -> Tuple[str, List[Dict[str, Any]]]:
+        """Prompt snippet of the best matching records, plus their references"""
+        hits = self.search(query, limit=limit, prefix=False)
+        blocks, sources = [], []
+        for hit in hits:
+            source = next(s for s in self.sources.values() if s.kind == hit["type"])
+            body = ' '.join(text for name in source.fields for text in _strings(hit["record"].get(name)))
+            if len(body) > max_chars:
+                body = body[:max_chars].rsplit(' ', 1)[0] + '...'
+            blocks.append(f"- [{hit['type']}] {hit['title']}: {body}")
+            sources.append({"type": hit["type"], "id": hit["id"], "title": hit["title"]})
+        return '\n'.join(blocks), sources
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
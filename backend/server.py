@@ -1,23 +1,73 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
-from datetime import datetime, timezone
-import json
+from functools import partial
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
 import google.generativeai as genai
 
+from data_store import DatasetStore, split_regional
+from data_plane import MappedDatasetStore
+from response_cache import ResponseCache, json_response, variants as response_variants
+from indexes import RecordIndex
+from spatial import CAPACITY_RANK_RADIUS_KM, SHELTER_RANKS, ShelterIndex, SpatialIndex
+from flood_risk import FloodZoneIndex
+from ai_client import AIClient, AITimeoutError, FakeGenerativeModel, normalize_text
+from recommendations import RecommendationService
+from dashboard import DashboardView, RegionalDashboards, SUMMARY_INPUTS
+from stream import DatasetEventPublisher, StreamBroker, TOPICS
+from community_reports import (
+    DEFAULT_PROJECTION as DEFAULT_REPORT_PROJECTION,
+    build_query as build_report_query,
+    ensure_indexes as ensure_report_indexes,
+    find_page as find_report_page,
+    parse_fields as parse_report_fields,
+)
+from cursors import InvalidCursor
+from disaster_stats import (
+    AGGREGATIONS as DISASTER_AGGREGATIONS,
+    BUCKETS as DISASTER_BUCKETS,
+    GROUP_FIELDS as DISASTER_GROUP_FIELDS,
+    METRICS as DISASTER_METRICS,
+    DisasterStatsEngine,
+)
+from report_ingest import IngestQueueFull, ReportIngestQueue
+from report_dedup import DuplicateIndex
+from hotspots import MAX_ZOOM as HOTSPOT_MAX_ZOOM, HotspotIndex
+from offline_sync import InvalidVersion, OfflineSync
+from search import SearchIndex, fingerprint as text_fingerprint
+from earthquake_feed import BUCKETS as EARTHQUAKE_BUCKETS, EarthquakeFeed
+from cyclone_eta import ETA_LAYERS, WIND_THRESHOLDS, CycloneImpact, CycloneTrack
+from timeseries import AGGREGATIONS as SERIES_AGGREGATIONS, SERIES_SOURCES, TimeSeriesStore, parse_duration
+from metrics import (
+    AI_BUCKETS,
+    HttpMetrics,
+    LoopLagMonitor,
+    MetricsMiddleware,
+    MetricsRegistry,
+    MongoCommandMetrics,
+    SlowRequestProfiler,
+)
+from bundle import Bundle, dataset_part, encoded_part, handler_part, int_between, value_part
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Request, event loop, dataset, cache, Mongo and AI metrics, served at /metrics
+metrics_registry = MetricsRegistry()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[MongoCommandMetrics(metrics_registry)])
 db = client[os.environ['DB_NAME']]
 
 # Configure Gemini AI
@@ -25,10 +75,22 @@ GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
     gemini_model = genai.GenerativeModel('gemini-2.0-flash-exp')
+elif os.environ.get('GEMINI_FAKE_MODEL'):
+    gemini_model = FakeGenerativeModel(latency=float(os.environ.get('GEMINI_FAKE_LATENCY', '0.5')))
+    logging.warning("Using the offline fake Gemini model.")
 else:
     gemini_model = None
     logging.warning("Gemini API key not found. AI features will be disabled.")
 
+# Model calls run on a bounded thread pool, coalesced and cached, never on the event loop
+ai_client = AIClient(
+    gemini_model,
+    max_concurrency=int(os.environ.get('AI_MAX_CONCURRENCY', '4')),
+    timeout=float(os.environ.get('AI_TIMEOUT_SECONDS', '20')),
+    cache_size=int(os.environ.get('AI_CACHE_SIZE', '512')),
+    cache_ttl=float(os.environ.get('AI_CACHE_TTL_SECONDS', '600')),
+) if gemini_model else None
+
 # Create the main app without a prefix
 app = FastAPI(title="Suraksha Setu API", version="1.0.0")
 
@@ -36,17 +98,187 @@ app = FastAPI(title="Suraksha Setu API", version="1.0.0")
 api_router = APIRouter(prefix="/api")
 
 # Load mock data
-MOCK_DATA_DIR = ROOT_DIR / 'mock_data'
+MOCK_DATA_DIR = Path(os.environ.get('MOCK_DATA_DIR', str(ROOT_DIR / 'mock_data')))
 
-def load_json_file(filename: str):
-    """Helper function to load JSON mock data files"""
-    try:
-        file_path = MOCK_DATA_DIR / filename
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        logging.error(f"Error loading {filename}: {str(e)}")
+DATA_RELOAD_INTERVAL = float(os.environ.get('DATA_RELOAD_INTERVAL', '2'))
+# Pins this worker to a comma-separated subset of mock_data/regions/
+WORKER_REGIONS = [r.strip().lower() for r in os.environ.get('WORKER_REGIONS', '').split(',') if r.strip()]
+DATA_PLANE_DIR = os.environ.get('DATA_PLANE_DIR')
+
+if DATA_PLANE_DIR and os.environ.get('DATA_PLANE_ROLE') != 'loader':
+    # Fed by data_plane_loader.py: snapshots mapped read-only, indexes unpickled rather than rebuilt
+    dataset_store = MappedDatasetStore(Path(DATA_PLANE_DIR), poll_interval=DATA_RELOAD_INTERVAL, regions=WORKER_REGIONS)
+else:
+    # Parsed once at startup and hot-reloaded in the background when a file changes
+    dataset_store = DatasetStore(MOCK_DATA_DIR, poll_interval=DATA_RELOAD_INTERVAL, regions=WORKER_REGIONS)
+
+# Read endpoints serve pre-encoded bytes with an ETag, re-encoded only when the data changes
+response_cache = ResponseCache(dataset_store)
+
+# Columnar disaster table (pandas) rebuilt per version; aggregates cached per query
+disaster_stats = DisasterStatsEngine(dataset_store)
+
+# Dashboard summary and Suraksha score, kept as a materialized view over five datasets
+dashboard_view = DashboardView(dataset_store)
+
+# The same per region, each recomputed only when that region's inputs change
+regional_dashboards = RegionalDashboards(dataset_store)
+
+# Alert / cyclone / dashboard deltas pushed to SSE and WebSocket subscribers
+stream_broker = StreamBroker(max_queue=int(os.environ.get('STREAM_QUEUE_SIZE', '64')))
+stream_publisher = DatasetEventPublisher(dataset_store, stream_broker, dashboard_view, SUMMARY_INPUTS)
+STREAM_HEARTBEAT_SECONDS = float(os.environ.get('STREAM_HEARTBEAT_SECONDS', '15'))
+
+# Community reports are spooled to disk and written to Mongo in batches behind the request
+report_queue = ReportIngestQueue(
+    db.community_reports,
+    Path(os.environ.get('REPORT_SPOOL_DIR', str(ROOT_DIR / 'spool'))),
+    max_pending=int(os.environ.get('REPORT_QUEUE_SIZE', '10000')),
+    batch_size=int(os.environ.get('REPORT_BATCH_SIZE', '500')),
+    flush_interval=float(os.environ.get('REPORT_FLUSH_INTERVAL', '0.25')),
+    fsync=os.environ.get('REPORT_SPOOL_FSYNC', 'true').lower() in ('1', 'true', 'yes'),
+    max_attempts=int(os.environ.get('REPORT_FLUSH_MAX_ATTEMPTS', '5')),
+)
+REPORT_RETRY_AFTER_SECONDS = os.environ.get('REPORT_RETRY_AFTER_SECONDS', '5')
+
+# Recent reports by type, place and description SimHash; near-duplicates corroborate the original
+report_dedup = DuplicateIndex(
+    window=timedelta(minutes=int(os.environ.get('REPORT_DEDUP_WINDOW_MINUTES', '360'))),
+    max_distance=int(os.environ.get('REPORT_DEDUP_MAX_DISTANCE', '12')),
+)
+
+# Report counts per (hour, grid cell), updated on ingest and bootstrapped from Mongo at startup
+report_hotspots = HotspotIndex(retention_hours=int(os.environ.get('HOTSPOT_RETENTION_HOURS', '720')))
+
+# BM25 inverted index over knowledge cards, alerts and disasters, one segment per dataset
+search_index = SearchIndex(dataset_store)
+
+# Earthquakes kept sorted by time, with hourly/daily aggregates per region updated as events arrive
+earthquake_feed = EarthquakeFeed(
+    dataset_store,
+    hour_retention=int(os.environ.get('EARTHQUAKE_HOURLY_RETENTION', '168')),
+    day_retention=int(os.environ.get('EARTHQUAKE_DAILY_RETENTION', '365')),
+)
+
+# Cyclone path interpolated per track version; closest approach and wind impact per point
+cyclone_impact = CycloneImpact(dataset_store)
+
+# AQI / weather series as contiguous NumPy arrays per (station, metric), rebuilt per dataset version
+timeseries_store = TimeSeriesStore(dataset_store)
+
+# Offline bundle versions (alerts, shelters, flood zones, cards, cyclone) with deltas between them
+offline_sync = OfflineSync(dataset_store, history=int(os.environ.get('SYNC_HISTORY', '32')))
+
+# Last good AI recommendations, regenerated only when their inputs change
+recommendation_service = RecommendationService(dataset_store, ai_client) if ai_client else None
+
+# Dataset load timings, AI call timings and cache hit/miss counters
+dataset_load_latency = metrics_registry.histogram(
+    "dataset_load_duration_seconds", "Parse and derived-structure build time per dataset load", ("dataset", "outcome")
+)
+dataset_store.observe_loads(lambda name, seconds, ok: dataset_load_latency.observe((name, "success" if ok else "failure"), seconds))
+metrics_registry.gauge_callback(
+    "dataset_version", "Loaded version of each dataset (reloads + 1)", ("dataset",),
+    lambda: [((snapshot.name,), snapshot.version) for snapshot in dataset_store.snapshots()]
+)
+if isinstance(dataset_store, MappedDatasetStore):
+    metrics_registry.gauge_callback(
+        "data_plane_generation", "Loader snapshot generation this worker has mapped", (),
+        lambda: [((), dataset_store.generation)] if dataset_store.generation is not None else []
+    )
+
+ai_call_latency = metrics_registry.histogram(
+    "ai_call_duration_seconds", "Gemini calls by outcome (ok, timeout, error)", ("outcome",), buckets=AI_BUCKETS
+)
+if ai_client:
+    ai_client.observe_calls(lambda outcome, seconds: ai_call_latency.observe((outcome,), seconds))
+
+def cache_samples():
+    caches = {'response': response_cache, 'variant': response_variants, 'disaster_stats': disaster_stats}
+    if ai_client:
+        caches['ai'] = ai_client
+    for name, cache in caches.items():
+        yield (name, 'hit'), cache.hits
+        yield (name, 'miss'), cache.misses
+
+metrics_registry.counter_callback("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"), cache_samples)
+metrics_registry.gauge_callback(
+    "report_ingest_queue_depth", "Community reports accepted but not yet written to Mongo", (),
+    lambda: [((), report_queue.stats()["queue_depth"])]
+)
+
+loop_lag_monitor = LoopLagMonitor(metrics_registry, interval=float(os.environ.get('METRICS_LOOP_LAG_INTERVAL', '0.5')))
+
+# Opt-in: sample the event loop's stack during a fraction of requests and keep those slower than the threshold
+SLOW_REQUEST_MS = os.environ.get('METRICS_SLOW_REQUEST_MS')
+slow_request_profiler = SlowRequestProfiler(
+    float(SLOW_REQUEST_MS),
+    sample_rate=float(os.environ.get('METRICS_PROFILE_SAMPLE_RATE', '0.1')),
+) if SLOW_REQUEST_MS else None
+
+def get_dataset(filename: str):
+    """Return the in-memory (read-only) snapshot data of a JSON mock data file"""
+    return dataset_store.data(filename)
+
+# id and filter-field indexes, rebuilt whenever the dataset is reloaded
+RECORD_INDEXES = {
+    'alerts.json': ('severity',),
+    'disasters.json': ('type',),
+    'flood_zones.json': ('risk_level',),
+    'knowledge_cards.json': ('category',),
+    'evacuation_centers.json': ('type', 'status'),
+}
+
+# Datasets that can be partitioned by region under mock_data/regions/<region>/
+REGIONAL_DATASETS = ('weather_data.json', 'aqi_data.json', 'alerts.json', 'flood_zones.json')
+
+for _filename, _fields in RECORD_INDEXES.items():
+    dataset_store.register(
+        _filename, 'index', lambda data, fields=_fields: RecordIndex(data, fields),
+        regional=_filename in REGIONAL_DATASETS,
+    )
+
+def get_index(filename: str) -> Optional[RecordIndex]:
+    """Return the record index of a list dataset"""
+    return dataset_store.derived(filename, 'index')
+
+# Coordinate-bearing datasets, each with a spatial index built at load time
+GEO_LAYERS = {
+    'evacuation-centers': ('evacuation_centers.json', ShelterIndex),
+    'aqi-stations': ('aqi_data.json', lambda data: SpatialIndex(data.get('stations', []))),
+    'earthquakes': ('earthquake_data.json', SpatialIndex),
+    'disasters': ('disasters.json', SpatialIndex),
+}
+
+for _filename, _builder in GEO_LAYERS.values():
+    dataset_store.register(_filename, 'spatial', _builder)
+
+# Flood zone geometry (segments + R-tree of bounding boxes) for point risk lookups
+dataset_store.register('flood_zones.json', 'geometry', FloodZoneIndex, regional=True)
+
+def served_region(region: Optional[str]) -> Optional[str]:
+    """Normalized region key, raising 421 for regions pinned to other workers and 404 for unknown ones"""
+    if region is None:
         return None
+    region = region.strip().lower()
+    if not dataset_store.serves(region):
+        raise HTTPException(status_code=421, detail=f"Region '{region}' is not served by this worker")
+    if not dataset_store.has_region(region):
+        raise HTTPException(status_code=404, detail=f"Unknown region '{region}'")
+    return region
+
+def regional_dataset(filename: str, region: Optional[str]) -> str:
+    """Dataset to serve filename from for a region (its partition, else the global file)"""
+    return dataset_store.resolve(filename, served_region(region))
+
+def get_spatial_index(layer: str) -> SpatialIndex:
+    """Return the spatial index of a geo layer, raising 404/500 as appropriate"""
+    if layer not in GEO_LAYERS:
+        raise HTTPException(status_code=404, detail=f"Unknown geo layer '{layer}'")
+    index = dataset_store.derived(GEO_LAYERS[layer][0], 'spatial')
+    if index is None:
+        raise HTTPException(status_code=500, detail=f"Unable to load {layer} data")
+    return index
 
 # Define Models
 class StatusCheck(BaseModel):
@@ -81,6 +313,14 @@ class CommunityReport(BaseModel):
     coordinates: Optional[Dict[str, float]] = None
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     status: str = "pending"
+    corroboration_count: int = 0
+
+class FloodRiskBatchRequest(BaseModel):
+    points: List[Tuple[float, float]] = Field(..., max_length=200000, description="[lat, lon] pairs")
+    near_km: float = Field(default=5.0, gt=0, le=100)
+
+class CycloneEtaBatchRequest(BaseModel):
+    points: List[Tuple[float, float]] = Field(..., max_length=200000, description="[lat, lon] pairs")
 
 # ==================== BASIC ENDPOINTS ====================
 
@@ -101,7 +341,15 @@ async def root():
             "knowledge-cards": "/api/knowledge-cards",
             "evacuation-centers": "/api/evacuation-centers",
             "ai-assistant": "/api/ai-assistant",
-            "community-reports": "/api/community-reports"
+            "community-reports": "/api/community-reports",
+            "datasets": "/api/datasets",
+            "regions": "/api/regions",
+            "geo": "/api/geo",
+            "stream": "/api/stream",
+            "bundle": "/api/bundle",
+            "sync": "/api/sync",
+            "search": "/api/search",
+            "timeseries": "/api/timeseries"
         }
     }
 
@@ -126,62 +374,78 @@ async def get_status_checks():
     
     return status_checks
 
+# ==================== DATASET ENDPOINTS ====================
+
+@api_router.get("/datasets")
+async def get_datasets():
+    """Get version and load time of every in-memory dataset"""
+    return [snapshot.info() for snapshot in dataset_store.snapshots()]
+
+@api_router.get("/regions")
+async def get_regions():
+    """Get the regions served by this worker and the version of each regional dataset"""
+    return {
+        "pinned": sorted(dataset_store.pinned_regions) if dataset_store.pinned_regions else None,
+        "regional_datasets": list(REGIONAL_DATASETS),
+        "regions": {
+            region: {split_regional(snapshot.name)[1]: snapshot.version for snapshot in snapshots}
+            for region, snapshots in dataset_store.regions().items()
+        },
+    }
+
 # ==================== WEATHER ENDPOINTS ====================
 
 @api_router.get("/weather")
-async def get_weather():
+async def get_weather(request: Request, region: Optional[str] = None):
     """Get current weather data and forecasts"""
-    data = load_json_file('weather_data.json')
-    if data is None:
+    response = response_cache.respond(request, regional_dataset('weather_data.json', region))
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load weather data")
-    return data
+    return response
 
 @api_router.get("/weather/current")
-async def get_current_weather():
+async def get_current_weather(request: Request, region: Optional[str] = None):
     """Get only current weather conditions"""
-    data = load_json_file('weather_data.json')
-    if data is None:
+    response = response_cache.respond(request, regional_dataset('weather_data.json', region), 'current', {})
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load weather data")
-    return data.get('current', {})
+    return response
 
 @api_router.get("/weather/hourly")
-async def get_hourly_forecast():
+async def get_hourly_forecast(request: Request, region: Optional[str] = None):
     """Get hourly weather forecast"""
-    data = load_json_file('weather_data.json')
-    if data is None:
+    response = response_cache.respond(request, regional_dataset('weather_data.json', region), 'hourly', [])
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load weather data")
-    return data.get('hourly', [])
+    return response
 
 @api_router.get("/weather/daily")
-async def get_daily_forecast():
+async def get_daily_forecast(request: Request, region: Optional[str] = None):
     """Get daily weather forecast"""
-    data = load_json_file('weather_data.json')
-    if data is None:
+    response = response_cache.respond(request, regional_dataset('weather_data.json', region), 'daily', [])
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load weather data")
-    return data.get('daily', [])
+    return response
 
 # ==================== ALERTS ENDPOINTS ====================
 
 @api_router.get("/alerts")
-async def get_alerts(severity: Optional[str] = None):
+async def get_alerts(severity: Optional[str] = None, region: Optional[str] = None):
     """Get all active alerts, optionally filter by severity (red/orange/yellow)"""
-    data = load_json_file('alerts.json')
-    if data is None:
+    index = get_index(regional_dataset('alerts.json', region))
+    if index is None:
         raise HTTPException(status_code=500, detail="Unable to load alerts data")
     
-    if severity:
-        data = [alert for alert in data if alert.get('severity', '').lower() == severity.lower()]
-    
-    return data
+    return index.filter(severity=severity)
 
 @api_router.get("/alerts/{alert_id}")
-async def get_alert_by_id(alert_id: str):
+async def get_alert_by_id(alert_id: str, region: Optional[str] = None):
     """Get specific alert by ID"""
-    data = load_json_file('alerts.json')
-    if data is None:
+    index = get_index(regional_dataset('alerts.json', region))
+    if index is None:
         raise HTTPException(status_code=500, detail="Unable to load alerts data")
     
-    alert = next((a for a in data if a.get('id') == alert_id), None)
+    alert = index.get(alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
@@ -190,212 +454,365 @@ async def get_alert_by_id(alert_id: str):
 # ==================== AQI ENDPOINTS ====================
 
 @api_router.get("/aqi")
-async def get_aqi():
+async def get_aqi(request: Request, region: Optional[str] = None):
     """Get comprehensive AQI data including current, stations, historical, and forecast"""
-    data = load_json_file('aqi_data.json')
-    if data is None:
+    response = response_cache.respond(request, regional_dataset('aqi_data.json', region))
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load AQI data")
-    return data
+    return response
 
 @api_router.get("/aqi/current")
-async def get_current_aqi():
+async def get_current_aqi(request: Request, region: Optional[str] = None):
     """Get current AQI data"""
-    data = load_json_file('aqi_data.json')
-    if data is None:
+    response = response_cache.respond(request, regional_dataset('aqi_data.json', region), 'current', {})
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load AQI data")
-    return data.get('current', {})
+    return response
 
 @api_router.get("/aqi/stations")
-async def get_aqi_stations():
+async def get_aqi_stations(request: Request, region: Optional[str] = None):
     """Get AQI data from all monitoring stations"""
-    data = load_json_file('aqi_data.json')
-    if data is None:
+    response = response_cache.respond(request, regional_dataset('aqi_data.json', region), 'stations', [])
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load AQI data")
-    return data.get('stations', [])
+    return response
 
 @api_router.get("/aqi/historical")
-async def get_aqi_historical():
+async def get_aqi_historical(request: Request, region: Optional[str] = None):
     """Get historical AQI trends"""
-    data = load_json_file('aqi_data.json')
-    if data is None:
+    response = response_cache.respond(request, regional_dataset('aqi_data.json', region), 'historical', [])
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load AQI data")
-    return data.get('historical', [])
+    return response
 
 @api_router.get("/aqi/forecast")
-async def get_aqi_forecast():
+async def get_aqi_forecast(request: Request, region: Optional[str] = None):
     """Get AQI forecast"""
-    data = load_json_file('aqi_data.json')
-    if data is None:
+    response = response_cache.respond(request, regional_dataset('aqi_data.json', region), 'forecast', [])
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load AQI data")
-    return data.get('forecast', [])
+    return response
 
 # ==================== DISASTERS ENDPOINTS ====================
 
 @api_router.get("/disasters")
 async def get_disasters(disaster_type: Optional[str] = None, limit: int = Query(default=50, le=100)):
     """Get historical disaster data, optionally filter by type"""
-    data = load_json_file('disasters.json')
-    if data is None:
+    index = get_index('disasters.json')
+    if index is None:
         raise HTTPException(status_code=500, detail="Unable to load disasters data")
     
-    if disaster_type:
-        data = [d for d in data if d.get('type', '').lower() == disaster_type.lower()]
-    
-    return data[:limit]
+    return index.filter(type=disaster_type)[:limit]
 
 @api_router.get("/disasters/{disaster_id}")
 async def get_disaster_by_id(disaster_id: str):
     """Get specific disaster by ID"""
-    data = load_json_file('disasters.json')
-    if data is None:
+    index = get_index('disasters.json')
+    if index is None:
         raise HTTPException(status_code=500, detail="Unable to load disasters data")
     
-    disaster = next((d for d in data if d.get('id') == disaster_id), None)
+    disaster = index.get(disaster_id)
     if not disaster:
         raise HTTPException(status_code=404, detail="Disaster not found")
     
     return disaster
 
+def parse_choices(value: Optional[str], allowed, name: str) -> List[str]:
+    """Split a comma-separated query parameter and validate each entry"""
+    choices = [v.strip() for v in (value or '').split(',') if v.strip()]
+    invalid = [v for v in choices if v not in allowed]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid {name}: {', '.join(invalid)} (allowed: {', '.join(allowed)})"
+        )
+    return choices
+
 @api_router.get("/disasters/stats/summary")
 async def get_disaster_statistics():
     """Get statistical summary of disasters"""
-    data = load_json_file('disasters.json')
-    if data is None:
+    stats = disaster_stats.aggregate(group_by=['type'], metrics=['casualties', 'affected_population'])
+    if stats is None:
         raise HTTPException(status_code=500, detail="Unable to load disasters data")
     
-    total_disasters = len(data)
-    total_casualties = sum(d.get('casualties', 0) for d in data)
-    total_affected = sum(d.get('affected_population', 0) for d in data)
-    
-    by_type = {}
-    for disaster in data:
-        d_type = disaster.get('type', 'Unknown')
-        if d_type not in by_type:
-            by_type[d_type] = {'count': 0, 'casualties': 0, 'affected': 0}
-        by_type[d_type]['count'] += 1
-        by_type[d_type]['casualties'] += disaster.get('casualties', 0)
-        by_type[d_type]['affected'] += disaster.get('affected_population', 0)
-    
     return {
-        "total_disasters": total_disasters,
-        "total_casualties": total_casualties,
-        "total_affected_population": total_affected,
-        "by_type": by_type
+        "total_disasters": stats['totals']['count'],
+        "total_casualties": stats['totals']['casualties']['sum'],
+        "total_affected_population": stats['totals']['affected_population']['sum'],
+        "by_type": {
+            group['type']: {
+                'count': group['count'],
+                'casualties': group['casualties']['sum'],
+                'affected': group['affected_population']['sum']
+            }
+            for group in stats['groups']
+        }
     }
 
+@api_router.get("/disasters/stats/aggregate")
+async def get_disaster_aggregates(
+    group_by: Optional[str] = Query(default='type', description="Comma-separated: type, severity, location"),
+    bucket: Optional[str] = Query(default=None, description="Time bucket of 'date': year or month"),
+    metrics: Optional[str] = Query(default=','.join(DISASTER_METRICS), description="casualties, affected_population, economic_loss"),
+    aggs: Optional[str] = Query(default='sum', description="Comma-separated: sum, mean, max, min"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    """Aggregate disaster impact grouped by type/severity/location and year/month"""
+    group_fields = parse_choices(group_by, DISASTER_GROUP_FIELDS, 'group_by')
+    metric_fields = parse_choices(metrics, DISASTER_METRICS, 'metrics') or list(DISASTER_METRICS)
+    aggregations = parse_choices(aggs, DISASTER_AGGREGATIONS, 'aggs') or ['sum']
+    if bucket is not None and bucket not in DISASTER_BUCKETS:
+        raise HTTPException(status_code=400, detail="bucket must be 'year' or 'month'")
+    
+    stats = disaster_stats.aggregate(
+        group_by=group_fields,
+        bucket=bucket,
+        metrics=metric_fields,
+        aggregations=aggregations,
+        date_from=date_from.isoformat() if date_from else None,
+        date_to=date_to.isoformat() if date_to else None
+    )
+    if stats is None:
+        raise HTTPException(status_code=500, detail="Unable to load disasters data")
+    return stats
+
 # ==================== CYCLONE ENDPOINTS ====================
 
 @api_router.get("/cyclone")
-async def get_cyclone_data():
+async def get_cyclone_data(request: Request):
     """Get active cyclone tracking data"""
-    data = load_json_file('cyclone_data.json')
-    if data is None:
+    response = response_cache.respond(request, 'cyclone_data.json')
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load cyclone data")
-    return data
+    return response
 
 @api_router.get("/cyclone/active")
-async def get_active_cyclone():
+async def get_active_cyclone(request: Request):
     """Get current active cyclone information"""
-    data = load_json_file('cyclone_data.json')
-    if data is None:
+    response = response_cache.respond(request, 'cyclone_data.json', 'active_cyclone', {})
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load cyclone data")
-    return data.get('active_cyclone', {})
+    return response
 
 @api_router.get("/cyclone/track")
-async def get_cyclone_track():
+async def get_cyclone_track(request: Request):
     """Get forecast track of active cyclone"""
-    data = load_json_file('cyclone_data.json')
-    if data is None:
+    response = response_cache.respond(request, 'cyclone_data.json', 'active_cyclone.forecast_track', [])
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load cyclone data")
-    return data.get('active_cyclone', {}).get('forecast_track', [])
+    return response
+
+def get_cyclone_eta_track() -> CycloneTrack:
+    track = cyclone_impact.track()
+    if track is None:
+        raise HTTPException(status_code=500, detail="Unable to load cyclone data")
+    if not track.available:
+        raise HTTPException(status_code=404, detail="No active cyclone")
+    return track
+
+@api_router.get("/cyclone/eta")
+async def get_cyclone_eta(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180)
+):
+    """Get closest approach, peak wind and gale/storm/hurricane wind windows of the active cyclone at a point"""
+    track = get_cyclone_eta_track()
+    
+    return {"cyclone": track.info(), **track.score(np.array([lat]), np.array([lon]))[0]}
+
+@api_router.post("/cyclone/eta/batch")
+async def get_cyclone_eta_batch(request: CycloneEtaBatchRequest):
+    """Score many points against the active cyclone's path at once, in request order"""
+    track = get_cyclone_eta_track()
+    
+    points = np.asarray(request.points, dtype=np.float64).reshape(-1, 2)
+    return {"cyclone": track.info(), "results": track.score(points[:, 0], points[:, 1])}
+
+@api_router.get("/cyclone/eta/{layer}")
+async def get_cyclone_eta_layer(
+    layer: str,
+    min_impact: Optional[str] = Query(default=None, description="Only records reaching gale, storm or hurricane-force winds")
+):
+    """Score every evacuation center or flood zone against the active cyclone, nearest approach first"""
+    if layer not in ETA_LAYERS:
+        raise HTTPException(status_code=404, detail=f"Unknown layer '{layer}' (available: {', '.join(ETA_LAYERS)})")
+    if min_impact is not None and min_impact not in WIND_THRESHOLDS:
+        raise HTTPException(status_code=400, detail=f"Invalid min_impact: {min_impact} (allowed: {', '.join(WIND_THRESHOLDS)})")
+    track = get_cyclone_eta_track()
+    
+    results = cyclone_impact.layer(layer)
+    if results is None:
+        raise HTTPException(status_code=500, detail=f"Unable to load {layer} data")
+    if min_impact:
+        results = [result for result in results if result["wind_impact"][min_impact] is not None]
+    return {"cyclone": track.info(), "count": len(results), "results": results}
 
 @api_router.get("/cyclone/historical")
-async def get_historical_cyclones():
+async def get_historical_cyclones(request: Request):
     """Get historical cyclone data"""
-    data = load_json_file('cyclone_data.json')
-    if data is None:
+    response = response_cache.respond(request, 'cyclone_data.json', 'historical_cyclones', [])
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load cyclone data")
-    return data.get('historical_cyclones', [])
+    return response
 
 # ==================== FLOOD ENDPOINTS ====================
 
 @api_router.get("/flood-zones")
-async def get_flood_zones(risk_level: Optional[str] = None):
+async def get_flood_zones(risk_level: Optional[str] = None, region: Optional[str] = None):
     """Get flood zone data, optionally filter by risk level"""
-    data = load_json_file('flood_zones.json')
-    if data is None:
+    index = get_index(regional_dataset('flood_zones.json', region))
+    if index is None:
         raise HTTPException(status_code=500, detail="Unable to load flood zones data")
     
-    if risk_level:
-        data = [zone for zone in data if zone.get('risk_level', '').lower() == risk_level.lower()]
+    return index.filter(risk_level=risk_level)
+
+def get_flood_geometry(region: Optional[str] = None) -> FloodZoneIndex:
+    geometry = dataset_store.derived(regional_dataset('flood_zones.json', region), 'geometry')
+    if geometry is None:
+        raise HTTPException(status_code=500, detail="Unable to load flood zones data")
+    return geometry
+
+@api_router.get("/flood-zones/at")
+async def get_flood_risk_at_point(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    near_km: float = Query(default=5.0, gt=0, le=100),
+    region: Optional[str] = None
+):
+    """Get flood zones covering or within near_km of a point, with margin to danger level"""
+    return get_flood_geometry(region).at(lat, lon, near_km)
+
+@api_router.post("/flood-zones/at/batch")
+async def get_flood_risk_batch(request: FloodRiskBatchRequest, region: Optional[str] = None):
+    """Score many points at once; only points near at least one zone are returned"""
+    geometry = get_flood_geometry(region)
     
-    return data
+    points = np.asarray(request.points, dtype=np.float64).reshape(-1, 2)
+    results = geometry.score(points[:, 0], points[:, 1], request.near_km)
+    return {
+        "points_scored": len(points),
+        "points_at_risk": len(results),
+        "results": results
+    }
 
 # ==================== EARTHQUAKE ENDPOINTS ====================
 
 @api_router.get("/earthquakes")
-async def get_earthquakes(min_magnitude: Optional[float] = None, limit: int = Query(default=50, le=100)):
-    """Get earthquake data, optionally filter by minimum magnitude"""
-    data = load_json_file('earthquake_data.json')
-    if data is None:
+async def get_earthquakes(
+    response: Response,
+    min_magnitude: Optional[float] = None,
+    max_magnitude: Optional[float] = None,
+    min_depth: Optional[float] = Query(default=None, ge=0),
+    max_depth: Optional[float] = Query(default=None, ge=0),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    min_lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    min_lon: Optional[float] = Query(default=None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    max_lon: Optional[float] = Query(default=None, ge=-180, le=180),
+    lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    lon: Optional[float] = Query(default=None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(default=None, gt=0, le=20000),
+    limit: int = Query(default=50, ge=1, le=1000),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page")
+):
+    """Get earthquakes, most recent first, filtered by time, magnitude, depth and area, with pagination via X-Next-Cursor"""
+    if get_dataset('earthquake_data.json') is None:
         raise HTTPException(status_code=500, detail="Unable to load earthquake data")
     
-    if min_magnitude:
-        data = [eq for eq in data if eq.get('magnitude', 0) >= min_magnitude]
+    bounds = (min_lat, min_lon, max_lat, max_lon)
+    bbox = None
+    if any(v is not None for v in bounds):
+        if any(v is None for v in bounds):
+            raise HTTPException(status_code=400, detail="min_lat, min_lon, max_lat and max_lon must be given together")
+        if min_lat > max_lat or min_lon > max_lon:
+            raise HTTPException(status_code=400, detail="Bounding box minimums must not exceed maximums")
+        bbox = bounds
+    near = (lat, lon, radius_km)
+    if any(v is not None for v in near) and any(v is None for v in near):
+        raise HTTPException(status_code=400, detail="lat, lon and radius_km must be given together")
+    since = since.replace(tzinfo=timezone.utc) if since and since.tzinfo is None else since
+    until = until.replace(tzinfo=timezone.utc) if until and until.tzinfo is None else until
     
-    # Sort by time (most recent first)
-    data.sort(key=lambda x: x.get('time', ''), reverse=True)
+    try:
+        events, next_cursor = earthquake_feed.query(
+            since, until, min_magnitude, max_magnitude, min_depth, max_depth,
+            bbox, near if radius_km is not None else None, cursor, limit
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
     
-    return data[:limit]
+    return events
+
+async def get_earthquake_page(min_magnitude: Optional[float] = None, limit: int = 50):
+    """First page of earthquakes (bundle part)"""
+    return earthquake_feed.query(min_magnitude=min_magnitude, limit=limit)[0]
+
+@api_router.get("/earthquakes/aggregates")
+async def get_earthquake_aggregates(
+    bucket: str = Query(default='day', description="hour or day"),
+    region: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Get rolling earthquake counts and energy release per hour or day and region"""
+    if bucket not in EARTHQUAKE_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Invalid bucket: {bucket} (allowed: {', '.join(EARTHQUAKE_BUCKETS)})")
+    if get_dataset('earthquake_data.json') is None:
+        raise HTTPException(status_code=500, detail="Unable to load earthquake data")
+    since = since.replace(tzinfo=timezone.utc) if since and since.tzinfo is None else since
+    until = until.replace(tzinfo=timezone.utc) if until and until.tzinfo is None else until
+    
+    return {**earthquake_feed.stats(), **earthquake_feed.rolling(bucket, since, until, region)}
 
 # ==================== AGRICULTURE ENDPOINTS ====================
 
 @api_router.get("/agriculture")
-async def get_agriculture_data():
+async def get_agriculture_data(request: Request):
     """Get comprehensive agriculture advisory data"""
-    data = load_json_file('agriculture_data.json')
-    if data is None:
+    response = response_cache.respond(request, 'agriculture_data.json')
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load agriculture data")
-    return data
+    return response
 
 @api_router.get("/agriculture/advisory")
-async def get_crop_advisory():
+async def get_crop_advisory(request: Request):
     """Get crop-wise advisory"""
-    data = load_json_file('agriculture_data.json')
-    if data is None:
+    response = response_cache.respond(request, 'agriculture_data.json', 'crop_advisory', [])
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load agriculture data")
-    return data.get('crop_advisory', [])
+    return response
 
 @api_router.get("/agriculture/prices")
-async def get_market_prices():
+async def get_market_prices(request: Request):
     """Get current market prices"""
-    data = load_json_file('agriculture_data.json')
-    if data is None:
+    response = response_cache.respond(request, 'agriculture_data.json', 'market_prices', [])
+    if response is None:
         raise HTTPException(status_code=500, detail="Unable to load agriculture data")
-    return data.get('market_prices', [])
+    return response
 
 # ==================== KNOWLEDGE CARDS ENDPOINTS ====================
 
 @api_router.get("/knowledge-cards")
 async def get_knowledge_cards(category: Optional[str] = None):
     """Get knowledge cards for disaster preparedness"""
-    data = load_json_file('knowledge_cards.json')
-    if data is None:
+    index = get_index('knowledge_cards.json')
+    if index is None:
         raise HTTPException(status_code=500, detail="Unable to load knowledge cards")
     
-    if category:
-        data = [card for card in data if card.get('category', '').lower() == category.lower()]
-    
-    return data
+    return index.filter(category=category)
 
 @api_router.get("/knowledge-cards/{card_id}")
 async def get_knowledge_card_by_id(card_id: str):
     """Get specific knowledge card by ID"""
-    data = load_json_file('knowledge_cards.json')
-    if data is None:
+    index = get_index('knowledge_cards.json')
+    if index is None:
         raise HTTPException(status_code=500, detail="Unable to load knowledge cards")
     
-    card = next((c for c in data if c.get('id') == card_id), None)
+    card = index.get(card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Knowledge card not found")
     
@@ -406,57 +823,178 @@ async def get_knowledge_card_by_id(card_id: str):
 @api_router.get("/evacuation-centers")
 async def get_evacuation_centers(shelter_type: Optional[str] = None, status: Optional[str] = None):
     """Get evacuation center information"""
-    data = load_json_file('evacuation_centers.json')
-    if data is None:
+    index = get_index('evacuation_centers.json')
+    if index is None:
         raise HTTPException(status_code=500, detail="Unable to load evacuation centers data")
     
-    if shelter_type:
-        data = [center for center in data if center.get('type', '').lower() == shelter_type.lower()]
-    
-    if status:
-        data = [center for center in data if center.get('status', '').lower() == status.lower()]
+    # Combined filters are served by intersecting the type and status indexes
+    return index.filter(type=shelter_type, status=status)
+
+@api_router.get("/evacuation-centers/nearest")
+async def get_nearest_evacuation_centers(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(default=5, ge=1, le=50),
+    min_free_capacity: int = Query(default=1, ge=0),
+    max_distance_km: Optional[float] = Query(default=None, gt=0),
+    rank: str = Query(
+        default="distance",
+        description=f"distance (nearest first) or capacity (most free places first, within max_distance_km or {CAPACITY_RANK_RADIUS_KM:g} km)"
+    )
+):
+    """Get the k nearest open evacuation centers with at least min_free_capacity places left"""
+    if rank not in SHELTER_RANKS:
+        raise HTTPException(status_code=400, detail=f"Invalid rank: {rank} (allowed: {', '.join(SHELTER_RANKS)})")
+    index = get_spatial_index('evacuation-centers')
     
-    return data
+    hits = index.nearest_shelters(lat, lon, k, min_free_capacity, max_distance_km, rank)
+    return [
+        {**index.records[position], "distance_km": round(distance, 3), "free_capacity": free}
+        for position, distance, free in hits
+    ]
 
 @api_router.get("/evacuation-centers/{center_id}")
 async def get_evacuation_center_by_id(center_id: str):
     """Get specific evacuation center by ID"""
-    data = load_json_file('evacuation_centers.json')
-    if data is None:
+    index = get_index('evacuation_centers.json')
+    if index is None:
         raise HTTPException(status_code=500, detail="Unable to load evacuation centers data")
     
-    center = next((c for c in data if c.get('id') == center_id), None)
+    center = index.get(center_id)
     if not center:
         raise HTTPException(status_code=404, detail="Evacuation center not found")
     
     return center
 
+# ==================== GEO QUERY ENDPOINTS ====================
+
+@api_router.get("/geo")
+async def get_geo_layers():
+    """List the geo layers available to radius and bounding-box queries"""
+    return {layer: len(get_spatial_index(layer)) for layer in GEO_LAYERS}
+
+@api_router.get("/geo/{layer}/within")
+async def get_geo_within_radius(
+    layer: str,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(..., gt=0, le=2000),
+    limit: int = Query(default=100, ge=1, le=1000)
+):
+    """Get records of a geo layer within radius_km of a point, nearest first"""
+    index = get_spatial_index(layer)
+    
+    hits = index.within(lat, lon, radius_km)[:limit]
+    return [{**index.records[position], "distance_km": round(distance, 3)} for position, distance in hits]
+
+@api_router.get("/geo/{layer}/bbox")
+async def get_geo_bounding_box(
+    layer: str,
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    limit: int = Query(default=100, ge=1, le=1000)
+):
+    """Get records of a geo layer inside a lat/lon bounding box"""
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Bounding box minimums must not exceed maximums")
+    index = get_spatial_index(layer)
+    
+    return [index.records[position] for position in index.bbox(min_lat, min_lon, max_lat, max_lon)[:limit]]
+
+# ==================== TIME SERIES ENDPOINTS ====================
+
+@api_router.get("/timeseries")
+async def get_timeseries_catalog():
+    """List the available series (source, station, metric) with their time span"""
+    return timeseries_store.catalog()
+
+@api_router.get("/timeseries/{source}")
+async def get_timeseries(
+    source: str,
+    metric: str = Query(..., description="e.g. aqi, temp, rain"),
+    station: Optional[str] = None,
+    start: Optional[datetime] = Query(default=None, alias="from"),
+    end: Optional[datetime] = Query(default=None, alias="to"),
+    bucket: Optional[str] = Query(default=None, description="Resample into buckets: seconds or 15m, 1h, 1d"),
+    aggs: Optional[str] = Query(default='mean', description="Comma-separated: mean, min, max (with bucket)"),
+    points: Optional[int] = Query(default=None, ge=3, le=10000, description="Downsample to this many points with LTTB")
+):
+    """Get a time range of a series, raw, resampled per bucket, or LTTB-downsampled for charts"""
+    if source not in SERIES_SOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown series source '{source}'")
+    if bucket and points:
+        raise HTTPException(status_code=400, detail="Use either bucket or points, not both")
+    try:
+        bucket_seconds = parse_duration(bucket) if bucket else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    aggregations = parse_choices(aggs, SERIES_AGGREGATIONS, 'aggs') or ['mean']
+    start = start.replace(tzinfo=timezone.utc) if start and start.tzinfo is None else start
+    end = end.replace(tzinfo=timezone.utc) if end and end.tzinfo is None else end
+    
+    results = timeseries_store.query(source, metric, station, start, end, bucket_seconds, aggregations, points)
+    if results is None:
+        raise HTTPException(status_code=500, detail="Unable to load time series data")
+    if not results:
+        raise HTTPException(status_code=404, detail="No matching series")
+    
+    return {"source": source, "series": results}
+
+# ==================== SEARCH ENDPOINTS ====================
+
+@api_router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = Query(default=None, description="Comma-separated: knowledge_card, alert, disaster"),
+    limit: int = Query(default=10, ge=1, le=50),
+    prefix: bool = Query(default=True, description="Also match the last word as a prefix (type-ahead)")
+):
+    """Search knowledge cards, alerts and disasters (BM25, transliteration-insensitive for Hindi/Odia)"""
+    kinds = parse_choices(types, search_index.kinds, 'types')
+    
+    return {
+        "query": q,
+        "results": search_index.search(q, kinds=kinds, limit=limit, prefix=prefix)
+    }
+
 # ==================== AI ASSISTANT ENDPOINTS ====================
 
 @api_router.post("/ai-assistant")
 async def ai_assistant(request: AIQueryRequest):
     """AI-powered assistant using Gemini for disaster-related queries"""
-    if not gemini_model:
+    if not ai_client:
         raise HTTPException(status_code=503, detail="AI service is not available")
     
     try:
-        # Build context-aware prompt
+        # Build context-aware prompt, grounded in the best matching cards/alerts/disasters
         context = request.context or "disaster management and safety"
+        reference, sources = search_index.context(request.query)
         prompt = f"""You are Suraksha Setu AI Assistant, an expert in disaster management, environmental safety, and emergency response in India.
 
 Context: {context}
 
+Relevant information:
+{reference or "- none found"}
+
 User Query: {request.query}
 
 Provide a helpful, accurate, and actionable response. Keep it concise but informative. If it's about an emergency, prioritize safety instructions."""
 
-        response = gemini_model.generate_content(prompt)
+        # Same question in the same context (ignoring case/whitespace) shares one answer
+        cache_key = f"assistant|{normalize_text(context)}|{normalize_text(request.query)}|{text_fingerprint(reference)}"
+        text = await ai_client.generate(prompt, cache_key=cache_key)
         
         return {
             "query": request.query,
-            "response": response.text,
+            "response": text,
+            "sources": sources,
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
+    except AITimeoutError as e:
+        logging.error(f"AI Assistant timeout: {str(e)}")
+        raise HTTPException(status_code=504, detail="AI service timed out")
     except Exception as e:
         logging.error(f"AI Assistant error: {str(e)}")
         raise HTTPException(status_code=500, detail="Error processing AI request")
@@ -464,7 +1002,7 @@ Provide a helpful, accurate, and actionable response. Keep it concise but inform
 @api_router.get("/ai-assistant/recommendations")
 async def get_ai_recommendations():
     """Get AI-powered safety recommendations based on current conditions"""
-    if not gemini_model:
+    if not recommendation_service:
         return {
             "recommendations": [
                 {"type": "weather", "message": "Carry an umbrella, 80% chance of rain at 4 PM.", "priority": "medium"},
@@ -473,148 +1011,290 @@ async def get_ai_recommendations():
             ]
         }
     
-    try:
-        # Get current data
-        weather = load_json_file('weather_data.json')
-        aqi = load_json_file('aqi_data.json')
-        alerts = load_json_file('alerts.json')
-        
-        prompt = f"""Based on the following current conditions, provide 3-5 actionable safety recommendations for citizens:
-
-Weather: Temperature {weather['current']['temperature']}°C, {weather['current']['condition']}, Rain probability {weather['current']['rain_probability']}%
-AQI: {aqi['current']['aqi']} ({aqi['current']['category']})
-Active Alerts: {len(alerts)} alerts including severity levels
-
-Provide recommendations as a JSON array with format: {{"type": "category", "message": "recommendation text", "priority": "high/medium/low"}}"""
-
-        response = gemini_model.generate_content(prompt)
-        
-        # Try to parse JSON from response
-        import re
-        json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
-        if json_match:
-            recommendations = json.loads(json_match.group())
-        else:
-            # Fallback to mock data
-            recommendations = [
-                {"type": "weather", "message": "Carry an umbrella, high chance of rain expected.", "priority": "medium"},
-                {"type": "cyclone", "message": "Cyclone approaching coast. Follow evacuation orders.", "priority": "high"},
-                {"type": "aqi", "message": "Air quality moderate. Sensitive groups should limit outdoor activities.", "priority": "medium"}
-            ]
-        
-        return {"recommendations": recommendations}
-    except Exception as e:
-        logging.error(f"AI Recommendations error: {str(e)}")
-        # Return fallback recommendations
-        return {
-            "recommendations": [
-                {"type": "weather", "message": "Monitor weather updates regularly.", "priority": "medium"},
-                {"type": "safety", "message": "Keep emergency contacts handy.", "priority": "high"}
-            ]
-        }
+    # Generated once per change in weather/AQI/alert inputs; refreshed in the background
+    return await recommendation_service.get()
 
 # ==================== COMMUNITY REPORTS ENDPOINTS ====================
 
-@api_router.post("/community-reports", response_model=CommunityReport)
-async def create_community_report(report: CommunityReportCreate):
-    """Submit a community disaster report"""
+@api_router.post("/community-reports", response_model=CommunityReport, status_code=202)
+async def create_community_report(report: CommunityReportCreate, response: Response):
+    """Submit a community disaster report (accepted now, stored by the next batch flush)"""
     report_obj = CommunityReport(**report.model_dump())
     
+    # timestamp stays a datetime so Mongo stores a native date (indexed sort and range filters)
     doc = report_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
+    canonical = report_dedup.match(doc)
+    
+    try:
+        if canonical:
+            await report_queue.corroborate(canonical.report['id'], doc['id'], doc['timestamp'])
+        else:
+            await report_queue.submit(doc)
+    except IngestQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many reports being processed, please retry shortly",
+            headers={"Retry-After": REPORT_RETRY_AFTER_SECONDS},
+        )
+    
+    # Corroborations count towards density too: heavily confirmed incidents are the hotspots
+    report_hotspots.add(doc)
+    
+    if canonical:
+        # Same place, type and (nearly) the same description: merged into the earlier report
+        response.headers['X-Duplicate-Of'] = canonical.report['id']
+        return report_dedup.corroborate(canonical)
     
-    await db.community_reports.insert_one(doc)
+    report_dedup.add(doc)
     
     return report_obj
 
+@api_router.get("/community-reports/hotspots")
+async def get_community_report_hotspots(
+    zoom: int = Query(default=10, ge=0, le=HOTSPOT_MAX_ZOOM),
+    hours: int = Query(default=24, ge=1, le=24 * 90, description="Window ending now, if since/until are not given"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    min_lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    min_lon: Optional[float] = Query(default=None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    max_lon: Optional[float] = Query(default=None, ge=-180, le=180),
+    limit: int = Query(default=500, ge=1, le=5000)
+):
+    """Get clustered report hotspots (count, dominant type, max severity) for a map zoom, time window and bounding box"""
+    bounds = (min_lat, min_lon, max_lat, max_lon)
+    bbox = None
+    if any(v is not None for v in bounds):
+        if any(v is None for v in bounds):
+            raise HTTPException(status_code=400, detail="min_lat, min_lon, max_lat and max_lon must be given together")
+        if min_lat > max_lat or min_lon > max_lon:
+            raise HTTPException(status_code=400, detail="Bounding box minimums must not exceed maximums")
+        bbox = bounds
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(hours=hours)
+    
+    return {
+        "zoom": zoom,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "hotspots": report_hotspots.query(zoom, since, until, bbox, limit),
+    }
+
+@api_router.get("/community-reports/ingest/stats")
+async def get_report_ingest_stats():
+    """Queue depth, throughput, flush latency and duplicate suppression of the report ingestion pipeline"""
+    return {**report_queue.stats(), "duplicates": report_dedup.stats()}
+
 @api_router.get("/community-reports")
 async def get_community_reports(
+    response: Response,
     status: Optional[str] = None,
     report_type: Optional[str] = None,
-    limit: int = Query(default=50, le=100)
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
 ):
-    """Get community reports with optional filters"""
-    query = {}
-    if status:
-        query['status'] = status
-    if report_type:
-        query['report_type'] = report_type
-    
-    reports = await db.community_reports.find(query, {"_id": 0}).sort("timestamp", -1).to_list(limit)
+    """Get community reports, newest first, with keyset pagination via the X-Next-Cursor header"""
+    try:
+        query = build_report_query(status, report_type, since, until, cursor)
+        projection = parse_report_fields(fields)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    for report in reports:
-        if isinstance(report.get('timestamp'), str):
-            report['timestamp'] = datetime.fromisoformat(report['timestamp'])
+    reports, next_cursor = await find_report_page(db.community_reports, query, projection, limit)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
     
     return reports
 
 @api_router.get("/community-reports/{report_id}")
 async def get_community_report_by_id(report_id: str):
     """Get specific community report by ID"""
-    report = await db.community_reports.find_one({"id": report_id}, {"_id": 0})
+    report = await db.community_reports.find_one({"id": report_id}, DEFAULT_REPORT_PROJECTION)
     
     if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
+        # Accepted but not flushed yet
+        report = report_queue.pending(report_id)
     
-    if isinstance(report.get('timestamp'), str):
-        report['timestamp'] = datetime.fromisoformat(report['timestamp'])
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
     
     return report
 
 # ==================== DASHBOARD SUMMARY ENDPOINT ====================
 
 @api_router.get("/dashboard/summary")
-async def get_dashboard_summary():
+async def get_dashboard_summary(request: Request, region: Optional[str] = None):
     """Get comprehensive dashboard summary with all key metrics"""
+    region = served_region(region)
+    view = dashboard_view if region is None else regional_dashboards.view(region)
     try:
-        weather = load_json_file('weather_data.json')
-        aqi = load_json_file('aqi_data.json')
-        alerts = load_json_file('alerts.json')
-        disasters = load_json_file('disasters.json')
-        cyclone = load_json_file('cyclone_data.json')
-        
-        # Calculate Suraksha Score (simplified algorithm)
-        score = 100
-        
-        # Reduce score based on active alerts
-        red_alerts = len([a for a in alerts if a.get('severity') == 'red'])
-        orange_alerts = len([a for a in alerts if a.get('severity') == 'orange'])
-        yellow_alerts = len([a for a in alerts if a.get('severity') == 'yellow'])
-        
-        score -= (red_alerts * 15 + orange_alerts * 10 + yellow_alerts * 5)
-        
-        # Reduce score based on AQI
-        aqi_value = aqi['current']['aqi']
-        if aqi_value > 300:
-            score -= 20
-        elif aqi_value > 200:
-            score -= 15
-        elif aqi_value > 100:
-            score -= 10
-        
-        # Reduce score if cyclone is active
-        if cyclone.get('active_cyclone'):
-            score -= 25
-        
-        score = max(0, min(100, score))  # Clamp between 0-100
-        
-        return {
-            "suraksha_score": score,
-            "weather": weather['current'],
-            "aqi": aqi['current'],
-            "active_alerts_count": len(alerts),
-            "alerts_by_severity": {
-                "red": red_alerts,
-                "orange": orange_alerts,
-                "yellow": yellow_alerts
-            },
-            "total_historical_disasters": len(disasters),
-            "active_cyclone": cyclone.get('active_cyclone') is not None,
-            "last_updated": datetime.now(timezone.utc).isoformat()
-        }
+        # Recomputed only when alerts, AQI, weather, cyclone or disasters data changes
+        encoded = view.encoded()
     except Exception as e:
         logging.error(f"Dashboard summary error: {str(e)}")
         raise HTTPException(status_code=500, detail="Error generating dashboard summary")
+    
+    return json_response(request, encoded)
+
+# ==================== BUNDLE ENDPOINT ====================
+
+# Sub-resources a bundle can include; filters reuse the handlers of the individual endpoints
+bundle = Bundle({
+    'weather': dataset_part(response_cache, 'weather_data.json'),
+    'weather.current': dataset_part(response_cache, 'weather_data.json', 'current', {}),
+    'weather.hourly': dataset_part(response_cache, 'weather_data.json', 'hourly', []),
+    'weather.daily': dataset_part(response_cache, 'weather_data.json', 'daily', []),
+    'aqi': dataset_part(response_cache, 'aqi_data.json'),
+    'aqi.current': dataset_part(response_cache, 'aqi_data.json', 'current', {}),
+    'aqi.stations': dataset_part(response_cache, 'aqi_data.json', 'stations', []),
+    'aqi.historical': dataset_part(response_cache, 'aqi_data.json', 'historical', []),
+    'aqi.forecast': dataset_part(response_cache, 'aqi_data.json', 'forecast', []),
+    'cyclone': dataset_part(response_cache, 'cyclone_data.json'),
+    'cyclone.active': dataset_part(response_cache, 'cyclone_data.json', 'active_cyclone', {}),
+    'cyclone.track': dataset_part(response_cache, 'cyclone_data.json', 'active_cyclone.forecast_track', []),
+    'cyclone.historical': dataset_part(response_cache, 'cyclone_data.json', 'historical_cyclones', []),
+    'agriculture': dataset_part(response_cache, 'agriculture_data.json'),
+    'agriculture.advisory': dataset_part(response_cache, 'agriculture_data.json', 'crop_advisory', []),
+    'agriculture.prices': dataset_part(response_cache, 'agriculture_data.json', 'market_prices', []),
+    'alerts': handler_part(dataset_store, 'alerts.json', partial(get_alerts, severity=None), {'severity': str}),
+    'disasters': handler_part(
+        dataset_store, 'disasters.json',
+        partial(get_disasters, disaster_type=None, limit=50),
+        {'disaster_type': str, 'limit': int_between(0, 100)},
+    ),
+    'earthquakes': handler_part(
+        dataset_store, 'earthquake_data.json',
+        partial(get_earthquake_page, min_magnitude=None, limit=50),
+        {'min_magnitude': float, 'limit': int_between(1, 1000)},
+    ),
+    'flood-zones': handler_part(dataset_store, 'flood_zones.json', partial(get_flood_zones, risk_level=None), {'risk_level': str}),
+    'knowledge-cards': handler_part(dataset_store, 'knowledge_cards.json', partial(get_knowledge_cards, category=None), {'category': str}),
+    'evacuation-centers': handler_part(
+        dataset_store, 'evacuation_centers.json',
+        partial(get_evacuation_centers, shelter_type=None, status=None),
+        {'shelter_type': str, 'status': str},
+    ),
+    'dashboard': encoded_part(dashboard_view.encoded),
+    'recommendations': value_part(get_ai_recommendations),
+})
+
+@api_router.get("/bundle")
+async def get_bundle(
+    request: Request,
+    include: Optional[str] = Query(default=None, description="Comma-separated parts, e.g. weather.current,aqi.current,alerts,cyclone.active")
+):
+    """Get several resources in one response; filters as <part>.<param> (alerts.severity=red), per-part ETags via If-None-Match"""
+    return await bundle.respond(request, include)
+
+# ==================== OFFLINE SYNC ENDPOINT ====================
+
+@api_router.get("/sync")
+async def get_offline_sync(
+    request: Request,
+    since: Optional[str] = Query(default=None, description="version returned by the previous sync")
+):
+    """Get the offline bundle (alerts, evacuation centers, flood zones, knowledge cards, active cyclone), or only the changes since a version"""
+    try:
+        encoded = offline_sync.sync(since)
+    except InvalidVersion:
+        raise HTTPException(status_code=400, detail="Invalid sync version")
+    if encoded is None:
+        raise HTTPException(status_code=500, detail="Unable to load sync data")
+    
+    return json_response(request, encoded)
+
+# ==================== STREAMING ENDPOINTS ====================
+
+def parse_topics(topics: Optional[str]) -> List[str]:
+    """Comma-separated topic list; all topics when omitted"""
+    if not topics:
+        return list(TOPICS)
+    requested = [t.strip() for t in topics.split(',') if t.strip()]
+    unknown = [t for t in requested if t not in TOPICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topics: {', '.join(unknown)}")
+    return requested
+
+@api_router.get("/stream")
+async def stream_events(request: Request, topics: Optional[str] = None):
+    """Server-Sent Events stream of alert, cyclone and dashboard changes"""
+    topic_list = parse_topics(topics)
+    last_event_id = request.headers.get('last-event-id', '')
+    subscriber = stream_broker.subscribe(topic_list, int(last_event_id) if last_event_id.isdigit() else None)
+    
+    async def events():
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield event.sse
+        finally:
+            stream_broker.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.websocket("/stream/ws")
+async def stream_websocket(websocket: WebSocket, topics: Optional[str] = None):
+    """WebSocket variant of /stream; send {"topics": [...]} to change the subscription"""
+    try:
+        topic_list = parse_topics(topics)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    
+    await websocket.accept()
+    subscriber = stream_broker.subscribe(topic_list)
+    
+    async def receive():
+        while True:
+            message = await websocket.receive_json()
+            requested = message.get('topics') if isinstance(message, dict) else None
+            if isinstance(requested, list):
+                stream_broker.update_topics(subscriber, [t for t in requested if t in TOPICS])
+    
+    async def send():
+        while True:
+            event = await subscriber.queue.get()
+            await websocket.send_text(event.payload)
+    
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        # Either side finishing (usually a disconnect) ends the session
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception():
+                logging.debug(f"Stream websocket closed: {task.exception()!r}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        stream_broker.unsubscribe(subscriber)
+
+# ==================== METRICS ENDPOINTS ====================
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of all metrics"""
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/slow-requests", include_in_schema=False)
+async def get_slow_requests():
+    """Stack samples of recent slow requests (METRICS_SLOW_REQUEST_MS enables the profiler)"""
+    if slow_request_profiler is None:
+        raise HTTPException(status_code=404, detail="Slow request profiling is disabled")
+    return list(slow_request_profiler.slow)
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -625,8 +1305,12 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Duplicate-Of"],
 )
 
+# Outermost, so CORS preflights are counted too
+app.add_middleware(MetricsMiddleware, metrics=HttpMetrics(metrics_registry), profiler=slow_request_profiler)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -634,6 +1318,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def load_datasets():
+    dataset_store.load_all()
+    stream_publisher.prime()
+    dataset_store.start_watching()
+    loop_lag_monitor.start()
+
+@app.on_event("startup")
+async def prepare_community_reports():
+    # In the background so an unreachable Mongo does not hold up serving the datasets
+    app.state.report_indexes_task = asyncio.create_task(ensure_report_indexes(db.community_reports))
+    await report_queue.start()
+    app.state.report_dedup_task = asyncio.create_task(report_dedup.bootstrap(db.community_reports))
+    app.state.report_hotspots_task = asyncio.create_task(report_hotspots.bootstrap(db.community_reports))
+
+@app.on_event("shutdown")
+async def stop_dataset_watcher():
+    await dataset_store.stop_watching()
+    await loop_lag_monitor.stop()
+
+@app.on_event("shutdown")
+async def shutdown_ai_client():
+    if ai_client:
+        ai_client.close()
+
+@app.on_event("shutdown")
+async def stop_report_queue():
+    await report_queue.stop()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
@@ -0,0 +1,240 @@
+"""Grid-bucketed spatial index with haversine distances.
+
+Points are bucketed into fixed-size lat/lon cells at load time. Nearest
+queries search outward ring by ring and stop once no unsearched cell can
+hold a closer point; radius and bounding-box queries only touch the cells
+they overlap. Distance math over the candidates is vectorized with NumPy.
+"""
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+SHELTER_RANKS = ('distance', 'capacity')
+CAPACITY_RANK_RADIUS_KM = 25.0  # rank='capacity' without max_km: never send people further than this
+UNAVAILABLE_STATUSES = ('closed', 'full')
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to arrays of points (degrees in, km out)"""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def record_coordinates(record: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Read {'coordinates': {'lat', 'lon'}} or top-level lat/lon"""
+    coords = record.get('coordinates')
+    source = coords if isinstance(coords, dict) else record
+    lat, lon = source.get('lat'), source.get('lon')
+    if lat is None or lon is None:
+        return None
+    return float(lat), float(lon)
+
+
+class SpatialIndex:
+    def __init__(
+        self,
+        records: Sequence[Dict[str, Any]],
+        cell_degrees: float = 0.25,
+        locate: Callable[[Dict[str, Any]], Optional[Tuple[float, float]]] = record_coordinates,
+    ):
+        self.records = records
+        self.cell_degrees = cell_degrees
+        positions, lats, lons = [], [], []
+        for position, record in enumerate(records):
+            point = locate(record)
+            if point is not None:
+                positions.append(position)
+                lats.append(point[0])
+                lons.append(point[1])
+
+        # Parallel arrays over the records that have coordinates
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, (lat, lon) in enumerate(zip(lats, lons)):
+            cells.setdefault(self._cell(lat, lon), []).append(i)
+        self._cells = {cell: np.asarray(members, dtype=np.int64) for cell, members in cells.items()}
+        if cells:
+            rows = [cell[0] for cell in cells]
+            cols = [cell[1] for cell in cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        else:
+            self._bounds = (0, -1, 0, -1)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def _gather(self, row_range: range, col_range: range) -> np.ndarray:
+        row_lo, row_hi, col_lo, col_hi = self._bounds
+        chunks = []
+        for row in range(max(row_range.start, row_lo), min(row_range.stop, row_hi + 1)):
+            for col in range(max(col_range.start, col_lo), min(col_range.stop, col_hi + 1)):
+                members = self._cells.get((row, col))
+                if members is not None:
+                    chunks.append(members)
+        if not chunks:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(chunks)
+
+    def _ring(self, row: int, col: int, r: int) -> np.ndarray:
+        """Cells at Chebyshev distance exactly r from (row, col)"""
+        if r == 0:
+            return self._gather(range(row, row + 1), range(col, col + 1))
+        parts = [
+            self._gather(range(row - r, row - r + 1), range(col - r, col + r + 1)),
+            self._gather(range(row + r, row + r + 1), range(col - r, col + r + 1)),
+            self._gather(range(row - r + 1, row + r), range(col - r, col - r + 1)),
+            self._gather(range(row - r + 1, row + r), range(col + r, col + r + 1)),
+        ]
+        return np.concatenate(parts)
+
+    def _max_ring(self, row: int, col: int) -> int:
+        row_lo, row_hi, col_lo, col_hi = self._bounds
+        return max(abs(row - row_lo), abs(row - row_hi), abs(col - col_lo), abs(col - col_hi))
+
+    def _ring_clearance_km(self, lat: float, r: int) -> float:
+        """Lower bound on the distance to any point outside the first r rings"""
+        deg = r * self.cell_degrees
+        # Longitude degrees shrink towards the poles; use the widest latitude the ring reaches
+        cos_lat = math.cos(math.radians(min(89.9, abs(lat) + deg)))
+        return deg * KM_PER_DEGREE * cos_lat
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 5,
+        mask: Optional[np.ndarray] = None,
+        max_km: Optional[float] = None,
+    ) -> List[Tuple[int, float]]:
+        """k nearest (record position, distance km); mask is a bool array over indexed points"""
+        if len(self) == 0 or k <= 0:
+            return []
+        row, col = self._cell(lat, lon)
+        found_idx: List[np.ndarray] = []
+        found_dist: List[np.ndarray] = []
+        best: Optional[np.ndarray] = None
+        for r in range(self._max_ring(row, col) + 1):
+            candidates = self._ring(row, col, r)
+            if mask is not None and len(candidates):
+                candidates = candidates[mask[candidates]]
+            if len(candidates):
+                found_idx.append(candidates)
+                found_dist.append(haversine_km(lat, lon, self.lats[candidates], self.lons[candidates]))
+                best = None
+            clearance = self._ring_clearance_km(lat, r)
+            if max_km is not None and clearance > max_km:
+                break
+            if found_idx:
+                if best is None:
+                    best = np.sort(np.concatenate(found_dist))
+                if len(best) >= k and best[k - 1] <= clearance:
+                    break
+
+        if not found_idx:
+            return []
+        idx = np.concatenate(found_idx)
+        dist = np.concatenate(found_dist)
+        if max_km is not None:
+            keep = dist <= max_km
+            idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")[:k]
+        return [(int(self.positions[idx[i]]), float(dist[i])) for i in order]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[int, float]]:
+        """All (record position, distance km) within radius_km, nearest first"""
+        if len(self) == 0:
+            return []
+        dlat = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(89.9, abs(lat) + dlat)))
+        dlon = min(180.0, dlat / max(cos_lat, 1e-6))
+        candidates = self._gather(
+            range(math.floor((lat - dlat) / self.cell_degrees), math.floor((lat + dlat) / self.cell_degrees) + 1),
+            range(math.floor((lon - dlon) / self.cell_degrees), math.floor((lon + dlon) / self.cell_degrees) + 1),
+        )
+        if not len(candidates):
+            return []
+        dist = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        keep = dist <= radius_km
+        candidates, dist = candidates[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return [(int(self.positions[candidates[i]]), float(dist[i])) for i in order]
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[int]:
+        """Record positions inside a lat/lon box, in dataset order"""
+        if len(self) == 0:
+            return []
+        candidates = self._gather(
+            range(math.floor(min_lat / self.cell_degrees), math.floor(max_lat / self.cell_degrees) + 1),
+            range(math.floor(min_lon / self.cell_degrees), math.floor(max_lon / self.cell_degrees) + 1),
+        )
+        lats, lons = self.lats[candidates], self.lons[candidates]
+        keep = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        return sorted(int(self.positions[i]) for i in candidates[keep])
+
+
+class ShelterIndex(SpatialIndex):
+    """Evacuation centers with their free capacity precomputed for filtering and ranking"""
+
+    def __init__(self, records: Sequence[Dict[str, Any]], cell_degrees: float = 0.25):
+        super().__init__(records, cell_degrees)
+        shelters = [records[p] for p in self.positions.tolist()]
+        self.free_capacity = np.asarray([free_capacity(center) for center in shelters], dtype=np.int64)
+        self.available = np.asarray([is_available(center) for center in shelters], dtype=bool)
+        self._free_by_position = dict(zip(self.positions.tolist(), self.free_capacity.tolist()))
+
+    def nearest_shelters(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 5,
+        min_free_capacity: int = 1,
+        max_km: Optional[float] = None,
+        rank: str = 'distance',
+    ) -> List[Tuple[int, float, int]]:
+        """k open shelters (position, distance km, free capacity) with enough room.
+
+        rank='distance': nearest first; free capacity only breaks ties within 1 m.
+        rank='capacity': most free places first among the matches within max_km
+        (CAPACITY_RANK_RADIUS_KM if not given); distance breaks ties.
+        """
+        if rank not in SHELTER_RANKS:
+            raise ValueError(f"Unknown rank: {rank}")
+        mask = self.available & (self.free_capacity >= min_free_capacity)
+        if rank == 'capacity':
+            radius = max_km if max_km is not None else CAPACITY_RANK_RADIUS_KM
+            hits = self.nearest(lat, lon, len(self), mask=mask, max_km=radius)
+            ranked = [(position, dist, self._free_by_position[position]) for position, dist in hits]
+            ranked.sort(key=lambda hit: (-hit[2], hit[1]))
+            return ranked[:k]
+
+        # Fetch past k until the last hit is clearly further than the k-th, so ties at the cut can go to the roomier one
+        fetch = k + 1
+        while True:
+            hits = self.nearest(lat, lon, fetch, mask=mask, max_km=max_km)
+            if len(hits) < fetch or round(hits[-1][1], 3) > round(hits[k - 1][1], 3):
+                break
+            fetch *= 2
+        ranked = [(position, dist, self._free_by_position[position]) for position, dist in hits]
+        ranked.sort(key=lambda hit: (round(hit[1], 3), -hit[2]))
+        return ranked[:k]
+
+
+def free_capacity(center: Dict[str, Any]) -> int:
+    return max(0, int(center.get('capacity') or 0) - int(center.get('current_occupancy') or 0))
+
+
+def is_available(center: Dict[str, Any]) -> bool:
+    """Closed or full shelters are never suggested, whatever their occupancy figures say"""
+    return str(center.get('status') or '').lower() not in UNAVAILABLE_STATUSES
@@ -0,0 +1,203 @@
+"""Push channel for alert, cyclone and dashboard changes (SSE and WebSocket).
+
+Dataset reloads are diffed into small delta events. Each event is encoded
+once and the same bytes are fanned out to every subscriber of its topic, so
+an idle connection costs one bounded queue and nothing per event beyond a
+put. A subscriber whose queue fills up is not allowed to buffer more: its
+backlog is dropped and it receives a single 'resync' event telling it to
+refetch.
+"""
+import asyncio
+import itertools
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+from data_store import DatasetSnapshot, DatasetStore
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ('alerts', 'cyclone', 'dashboard')
+
+SEVERITY_RANK = {"yellow": 1, "orange": 2, "red": 3}
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    id: int
+    topic: str
+    payload: str  # JSON text, encoded once for all subscribers
+
+    @property
+    def sse(self) -> bytes:
+        # id 0 marks control events that must not move the client's Last-Event-ID
+        prefix = f"id: {self.id}\n" if self.id else ""
+        return f"{prefix}event: {self.topic}\ndata: {self.payload}\n\n".encode("utf-8")
+
+
+RESYNC = StreamEvent(id=0, topic="resync", payload=json.dumps({"topic": "resync", "type": "resync"}))
+
+
+class Subscriber:
+    __slots__ = ("topics", "queue", "dropped")
+
+    def __init__(self, topics: Set[str], max_queue: int):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, event: StreamEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: discard its backlog instead of growing memory
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class StreamBroker:
+    def __init__(self, max_queue: int = 64, replay: int = 256):
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Subscriber]] = {topic: set() for topic in TOPICS}
+        self._ids = itertools.count(1)
+        self._recent: Deque[StreamEvent] = deque(maxlen=replay)
+        self.published = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+    def subscribe(self, topics: Iterable[str], last_event_id: Optional[int] = None) -> Subscriber:
+        subscriber = Subscriber(set(topics), self.max_queue)
+        for topic in subscriber.topics:
+            self._subscribers[topic].add(subscriber)
+        if last_event_id is not None:
+            self._replay(subscriber, last_event_id)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        for topic in subscriber.topics:
+            self._subscribers[topic].discard(subscriber)
+
+    def update_topics(self, subscriber: Subscriber, topics: Iterable[str]) -> None:
+        self.unsubscribe(subscriber)
+        subscriber.topics = set(topics)
+        for topic in subscriber.topics:
+            self._subscribers[topic].add(subscriber)
+
+    def _replay(self, subscriber: Subscriber, last_event_id: int) -> None:
+        """Resend missed events if still buffered, otherwise ask the client to resync"""
+        if self._recent and self._recent[0].id > last_event_id + 1:
+            subscriber.offer(RESYNC)
+            return
+        for event in self._recent:
+            if event.id > last_event_id and event.topic in subscriber.topics:
+                subscriber.offer(event)
+
+    def publish(self, topic: str, payload: Dict[str, Any]) -> StreamEvent:
+        event = StreamEvent(
+            id=next(self._ids),
+            topic=topic,
+            payload=json.dumps({"topic": topic, **payload}, ensure_ascii=False, separators=(",", ":")),
+        )
+        self._recent.append(event)
+        self.published += 1
+        for subscriber in self._subscribers.get(topic, ()):
+            subscriber.offer(event)
+        return event
+
+
+# ---- dataset deltas ----
+
+def diff_alerts(previous: Iterable[Dict[str, Any]], current: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    before = {a.get('id'): a for a in previous}
+    after = {a.get('id'): a for a in current}
+    added = [after[i] for i in after if i not in before]
+    removed = [i for i in before if i not in after]
+    escalated, changed = [], []
+    for alert_id in after.keys() & before.keys():
+        old, new = before[alert_id], after[alert_id]
+        if old == new:
+            continue
+        old_rank = SEVERITY_RANK.get(str(old.get('severity')).lower(), 0)
+        new_rank = SEVERITY_RANK.get(str(new.get('severity')).lower(), 0)
+        if new_rank > old_rank:
+            escalated.append({"id": alert_id, "from": old.get('severity'), "to": new.get('severity'), "alert": new})
+        else:
+            changed.append(new)
+    return {"added": added, "removed": removed, "escalated": escalated, "changed": changed}
+
+
+class DatasetEventPublisher:
+    """Turns dataset reloads into stream events"""
+
+    def __init__(self, store: DatasetStore, broker: StreamBroker, dashboard_view, dashboard_inputs: Iterable[str]):
+        self.broker = broker
+        self.dashboard_view = dashboard_view
+        self.dashboard_inputs = set(dashboard_inputs)
+        self._last_dashboard: Optional[Dict[str, Any]] = None
+        store.subscribe(self._on_reload)
+
+    def _on_reload(self, snapshot: DatasetSnapshot, previous: Optional[DatasetSnapshot]) -> None:
+        if previous is None:
+            return  # initial load, nothing to compare against
+        if snapshot.name == 'alerts.json':
+            self._alerts(snapshot, previous)
+        elif snapshot.name == 'cyclone_data.json':
+            self._cyclone(snapshot, previous)
+        if snapshot.name in self.dashboard_inputs:
+            self._dashboard()
+
+    def _alerts(self, snapshot: DatasetSnapshot, previous: DatasetSnapshot) -> None:
+        delta = diff_alerts(previous.data or (), snapshot.data or ())
+        if any(delta.values()):
+            self.broker.publish('alerts', {"type": "delta", "version": snapshot.version, **delta})
+
+    def _cyclone(self, snapshot: DatasetSnapshot, previous: DatasetSnapshot) -> None:
+        old = (previous.data or {}).get('active_cyclone') or {}
+        new = (snapshot.data or {}).get('active_cyclone') or {}
+        fields = ('forecast_track', 'current_position', 'intensity', 'landfall_estimate')
+        if bool(old) == bool(new) and all(old.get(f) == new.get(f) for f in fields):
+            return
+        self.broker.publish('cyclone', {
+            "type": "track",
+            "version": snapshot.version,
+            "active": bool(new),
+            "name": new.get('name'),
+            "current_position": new.get('current_position'),
+            "intensity": new.get('intensity'),
+            "forecast_track": new.get('forecast_track', []),
+        })
+
+    def _dashboard(self) -> None:
+        try:
+            summary = self.dashboard_view.summary()
+        except Exception as e:
+            logger.error(f"Dashboard stream update failed: {str(e)}")
+            return
+        state = {"suraksha_score": summary["suraksha_score"], "alerts_by_severity": summary["alerts_by_severity"]}
+        if self._last_dashboard is not None and state == self._last_dashboard:
+            return
+        previous_score = self._last_dashboard["suraksha_score"] if self._last_dashboard else None
+        self._last_dashboard = state
+        self.broker.publish('dashboard', {
+            "type": "score",
+            "previous_score": previous_score,
+            **state,
+            "versions": summary["versions"],
+        })
+
+    def prime(self) -> None:
+        """Remember the current score so the first change is reported against it"""
+        try:
+            summary = self.dashboard_view.summary()
+        except Exception:
+            return
+        self._last_dashboard = {
+            "suraksha_score": summary["suraksha_score"],
+            "alerts_by_severity": summary["alerts_by_severity"],
+        }
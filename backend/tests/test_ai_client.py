@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai_client import AIClient, AITimeoutError, FakeResponse
+
+
+class SlowModel:
+    """Blocking model that records how many calls run at once"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.latency)
+        with self._lock:
+            self.running -= 1
+        return FakeResponse(f"answer to {prompt}")
+
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_returns():
+    async def scenario():
+        model = SlowModel(latency=0.3)
+        client = AIClient(model, max_concurrency=1, timeout=0.05)
+        with pytest.raises(AITimeoutError):
+            await client.generate("first")
+        assert client._semaphore.locked()
+        # The first thread is still running: the next call waits for the slot instead of starting another
+        with pytest.raises(AITimeoutError):
+            await client.generate("second")
+        await asyncio.sleep(0.4)
+        assert not client._semaphore.locked()
+        assert model.peak == 1
+
+        client.timeout = 1.0
+        assert await client.generate("third") == "answer to third"
+        assert model.peak == 1
+        client.close()
+
+    asyncio.run(scenario())
+
+
+def test_identical_prompts_share_one_call_and_are_cached():
+    async def scenario():
+        model = SlowModel(latency=0.1)
+        client = AIClient(model, max_concurrency=4, timeout=1.0)
+        answers = await asyncio.gather(*[client.generate(prompt) for prompt in ("Flood  kit?", "flood kit?", "FLOOD KIT?")])
+        assert answers == ["answer to Flood  kit?"] * 3
+        assert model.calls == 1 and client.misses == 3
+
+        assert await client.generate(" flood   KIT? ") == "answer to Flood  kit?"
+        assert client.hits == 1
+        # A different prompt is a separate call
+        assert await client.generate("cyclone shelter?") == "answer to cyclone shelter?"
+        assert model.calls == 2
+        client.close()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    async def scenario():
+        model = SlowModel(latency=0.1)
+        client = AIClient(model, max_concurrency=2, timeout=1.0)
+        first = asyncio.ensure_future(client.generate("evacuation route"))
+        second = asyncio.ensure_future(client.generate("evacuation route"))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        assert await second == "answer to evacuation route"
+        assert client.cached("evacuation route") == "answer to evacuation route"
+        client.close()
+
+    asyncio.run(scenario())
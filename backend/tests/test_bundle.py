@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from bundle import Bundle, dataset_part, handler_part, int_between
+from data_store import DatasetStore
+from response_cache import ResponseCache
+
+
+def request(query="", **headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/bundle",
+        "query_string": query.encode(),
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def make_bundle(tmp_path):
+    alerts = [{"id": 1, "severity": "red"}, {"id": 2, "severity": "yellow"}]
+    (tmp_path / "alerts.json").write_text(json.dumps(alerts), encoding="utf-8")
+    (tmp_path / "weather_data.json").write_text(json.dumps({"current": {"temperature": 31}}), encoding="utf-8")
+    store = DatasetStore(tmp_path)
+    store.load_all()
+    calls = []
+
+    async def get_alerts(severity=None, limit=10):
+        calls.append((severity, limit))
+        if severity == "black":
+            raise HTTPException(status_code=404, detail="No such severity")
+        return [a for a in store.data("alerts.json") if severity in (None, a["severity"])][:limit]
+
+    return calls, Bundle({
+        "weather.current": dataset_part(ResponseCache(store), "weather_data.json", "current", {}),
+        "alerts": handler_part(store, "alerts.json", get_alerts, {"severity": str, "limit": int_between(1, 50)}),
+    })
+
+
+def respond(bundle, query, **headers):
+    include = dict(item.split("=", 1) for item in query.split("&")).get("include")
+    return asyncio.run(bundle.respond(request(query, **headers), include))
+
+
+def test_parts_are_spliced_with_their_own_etags(tmp_path):
+    calls, bundle = make_bundle(tmp_path)
+    response = respond(bundle, "include=weather.current,alerts&alerts.severity=red")
+    body = json.loads(response.body)
+    assert body["parts"]["weather.current"]["data"] == {"temperature": 31}
+    assert body["parts"]["alerts"]["data"] == [{"id": 1, "severity": "red"}]
+    assert body["unchanged"] == [] and body["errors"] == {}
+
+    # Same filters on the same data version reuse the encoded part
+    respond(bundle, "include=alerts&alerts.severity=red")
+    assert calls == [("red", 10)]
+
+
+def test_unchanged_parts_are_left_out(tmp_path):
+    calls, bundle = make_bundle(tmp_path)
+    first = respond(bundle, "include=weather.current,alerts")
+    parts = json.loads(first.body)["parts"]
+
+    partial = respond(bundle, "include=weather.current,alerts", if_none_match=parts["weather.current"]["etag"])
+    body = json.loads(partial.body)
+    assert list(body["parts"]) == ["alerts"]
+    assert body["unchanged"] == ["weather.current"]
+
+    every_part = ", ".join(part["etag"] for part in parts.values())
+    assert respond(bundle, "include=weather.current,alerts", if_none_match=every_part).status_code == 304
+    assert respond(bundle, "include=weather.current,alerts", if_none_match=first.headers["etag"]).status_code == 304
+
+
+def test_failing_part_is_reported_without_failing_the_bundle(tmp_path):
+    calls, bundle = make_bundle(tmp_path)
+    body = json.loads(respond(bundle, "include=weather.current,alerts&alerts.severity=black").body)
+    assert list(body["parts"]) == ["weather.current"]
+    assert body["errors"] == {"alerts": {"status": 404, "detail": "No such severity"}}
+
+
+@pytest.mark.parametrize("query", [
+    "include=",
+    "include=alerts,nope",
+    "include=alerts&alerts.colour=red",
+    "include=alerts&alerts.limit=500",
+])
+def test_bad_requests_are_rejected(tmp_path, query):
+    calls, bundle = make_bundle(tmp_path)
+    with pytest.raises(HTTPException) as raised:
+        respond(bundle, query)
+    assert raised.value.status_code == 400
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from community_reports import build_query, find_page, parse_fields
+from cursors import InvalidCursor, decode_cursor, encode_cursor
+
+START = datetime(2026, 7, 1, tzinfo=timezone.utc)
+
+
+def reports():
+    # Groups of three share a timestamp, so pages have to break ties on id
+    return [
+        {
+            "id": f"r{i:03d}",
+            "timestamp": START + timedelta(minutes=i // 3),
+            "status": "verified" if i % 2 else "pending",
+            "report_type": "flood",
+        }
+        for i in range(25)
+    ]
+
+
+def paginate(query_args, limit):
+    collection = AsyncMongoMockClient(tz_aware=True)['t'].community_reports
+
+    async def run():
+        await collection.insert_many(reports())
+        pages, cursor = [], None
+        while True:
+            page, cursor = await find_page(collection, build_query(cursor=cursor, **query_args), None, limit)
+            pages.append([doc["id"] for doc in page])
+            if cursor is None:
+                return pages
+
+    return asyncio.run(run())
+
+
+def test_keyset_pages_cover_every_report_once_newest_first():
+    pages = paginate({}, limit=4)
+    expected = [r["id"] for r in sorted(reports(), key=lambda r: (r["timestamp"], r["id"]), reverse=True)]
+    assert [report_id for page in pages for report_id in page] == expected
+    assert [len(page) for page in pages] == [4] * 6 + [1]
+
+
+def test_keyset_pages_respect_filters_and_ranges():
+    since, until = START + timedelta(minutes=2), START + timedelta(minutes=6)
+    pages = paginate({"status": "verified", "since": since, "until": until}, limit=2)
+    expected = [
+        r["id"] for r in sorted(reports(), key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+        if r["status"] == "verified" and since <= r["timestamp"] < until
+    ]
+    assert [report_id for page in pages for report_id in page] == expected
+
+
+def test_cursor_round_trip_and_invalid_cursor():
+    moment = START + timedelta(seconds=90)
+    assert decode_cursor(encode_cursor(moment, "r007")) == (moment, "r007")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+def test_projection_keeps_cursor_fields_and_rejects_unknown_fields():
+    assert parse_fields("severity,corroboration_count") == {
+        "_id": 0, "id": 1, "timestamp": 1, "severity": 1, "corroboration_count": 1,
+    }
+    with pytest.raises(ValueError):
+        parse_fields("password")
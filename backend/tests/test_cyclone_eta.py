@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+
+from cyclone_eta import RADIUS_OF_MAX_WIND_KM, CycloneTrack, parse_track_time, wind_radius_km
+from spatial import KM_PER_DEGREE
+
+CYCLONE = {
+    "active_cyclone": {
+        "name": "Test",
+        "category": "Severe Cyclonic Storm",
+        "forecast_track": [
+            {"time": "2024-08-15T00:00:00Z", "lat": 18.0, "lon": 87.0, "wind": 150, "category": "Severe Cyclonic Storm"},
+            {"time": "2024-08-15T12:00:00Z", "lat": 21.0, "lon": 87.0, "wind": 150, "category": "Very Severe Cyclonic Storm"},
+        ],
+    }
+}
+
+
+def test_track_labels_and_wind_radii():
+    assert parse_track_time("Aug 15, 6 PM", 2024).isoformat() == "2024-08-15T18:00:00+00:00"
+    assert parse_track_time("tomorrow", 2024) is None
+    radii = wind_radius_km(np.array([118.0, 100.0, 150.0]), 118.0)
+    assert radii[0] == RADIUS_OF_MAX_WIND_KM and radii[1] == 0.0
+    assert math.isclose(radii[2], RADIUS_OF_MAX_WIND_KM * (150 / 118) ** 2)
+
+
+def test_path_is_interpolated_at_fixed_steps():
+    track = CycloneTrack(CYCLONE)
+    assert track.available and len(track.times) == 12 * 4 + 1
+    assert math.isclose(track.lats[0], 18.0) and math.isclose(track.lats[-1], 21.0)
+    # Along a meridian the great circle keeps the longitude and advances latitude evenly
+    assert np.allclose(track.lons, 87.0)
+    assert math.isclose(track.lats[24], 19.5, abs_tol=1e-6)
+    assert track.category_at(track.times[-1]) == "Very Severe Cyclonic Storm"
+    assert track.category_at(track.times[10]) == "Severe Cyclonic Storm"
+
+
+def test_point_beside_the_track_gets_eta_and_wind_windows():
+    track = CycloneTrack(CYCLONE)
+    east = 40.0 / (KM_PER_DEGREE * math.cos(math.radians(19.5)))
+    near, far = track.score(np.array([19.5, 25.0]), np.array([87.0 + east, 95.0]))
+
+    assert near["approaching"] is True
+    assert abs(near["closest_approach"]["distance_km"] - 40.0) < 0.5
+    assert near["closest_approach"]["eta_hours"] == 6.0
+    assert near["peak_wind"]["kmh"] > 149
+    assert near["impact_level"] == "hurricane"
+    window = near["wind_impact"]["hurricane"]
+    assert window["eta_hours"] < 6.0
+    assert window["from"] < near["closest_approach"]["time"] < window["until"]
+
+    assert far["impact_level"] is None
+    assert far["wind_impact"] == {"gale": None, "storm": None, "hurricane": None}
+
+
+def test_no_active_cyclone():
+    assert CycloneTrack({"active_cyclone": None}).available is False
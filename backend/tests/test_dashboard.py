@@ -0,0 +1,62 @@
+import json
+
+from dashboard import DashboardView, RegionalDashboards
+from data_store import DatasetStore
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def make_store(tmp_path, alerts=()):
+    write(tmp_path / "alerts.json", list(alerts))
+    write(tmp_path / "aqi_data.json", {"current": {"aqi": 150}})
+    write(tmp_path / "weather_data.json", {"current": {"temperature": 31}})
+    write(tmp_path / "cyclone_data.json", {"active_cyclone": None})
+    write(tmp_path / "disasters.json", [{"id": "d-1"}])
+    write(tmp_path / "shelters.json", [])
+    store = DatasetStore(tmp_path)
+    store.load_all()
+    return store
+
+
+def test_summary_is_recomputed_only_when_an_input_changes(tmp_path):
+    store = make_store(tmp_path, alerts=[{"severity": "yellow"}])
+    view = DashboardView(store)
+    first = view.summary()
+    assert first["suraksha_score"] == 100 - 5 - 10
+    etag = view.encoded().etag
+    view.summary()
+    assert view.recomputations == 1
+
+    # Datasets the summary does not read leave it alone
+    store.load("shelters.json")
+    assert view.encoded().etag == etag
+    assert view.recomputations == 1
+
+    write(tmp_path / "alerts.json", [{"severity": "yellow"}, {"severity": "red"}])
+    store.load("alerts.json")
+    second = view.summary()
+    assert view.recomputations == 2
+    assert second["suraksha_score"] == first["suraksha_score"] - 15
+    assert second["alerts_by_severity"] == {"red": 1, "orange": 0, "yellow": 1}
+    assert second["versions"]["alerts.json"] == 2
+    assert view.encoded().etag != etag
+
+
+def test_region_reads_its_own_partition(tmp_path):
+    store = make_store(tmp_path)
+    dashboards = RegionalDashboards(store)
+    view = dashboards.view("cuttack")
+    assert view.summary()["aqi"] == {"aqi": 150}
+    assert view.summary()["region"] == "cuttack"
+
+    write(tmp_path / "regions" / "cuttack" / "aqi_data.json", {"current": {"aqi": 320}})
+    store.load("regions/cuttack/aqi_data.json")
+    summary = view.summary()
+    assert summary["aqi"] == {"aqi": 320}
+    assert summary["suraksha_score"] == 100 - 20
+    assert dashboards.recomputations() == {"cuttack": 2}
+    # The global view still reads the global file
+    assert DashboardView(store).summary()["aqi"] == {"aqi": 150}
@@ -0,0 +1,85 @@
+import asyncio
+import itertools
+import json
+import os
+
+from starlette.requests import Request
+
+from data_plane import DataPlanePublisher, MappedDatasetStore
+from data_store import DatasetStore
+from indexes import RecordIndex
+from response_cache import ResponseCache, encode_json
+
+# Distinct mtimes, so the loader's watcher sees every rewrite
+_mtimes = itertools.count(1_700_000_000 * 10**9, 10**9)
+
+
+def write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    stamp = next(_mtimes)
+    os.utime(path, ns=(stamp, stamp))
+
+
+def make_plane(tmp_path):
+    source, plane = tmp_path / "mock_data", tmp_path / "plane"
+    source.mkdir()
+    write(source / "alerts.json", [{"id": "a-1", "severity": "red"}])
+    write(source / "weather_data.json", {"current": {"temperature": 31}})
+    loader = DatasetStore(source)
+    loader.register("alerts.json", "index", lambda data: RecordIndex(data, fields=("severity",)))
+    loader.load_all()
+    publisher = DataPlanePublisher(loader, plane)
+    publisher.publish()
+
+    worker = MappedDatasetStore(plane)
+    worker.register("alerts.json", "index", lambda data: RecordIndex(data, fields=("severity",)))
+    worker.load_all()
+    return source, loader, publisher, worker
+
+
+def test_worker_maps_data_indexes_and_encoded_bodies(tmp_path):
+    source, loader, publisher, worker = make_plane(tmp_path)
+    assert worker.generation == 1
+    assert worker.data("alerts.json") == loader.data("alerts.json")
+    # The index arrives unpickled with the data it points at, not rebuilt
+    index = worker.derived("alerts.json", "index")
+    assert index.get("a-1") is worker.data("alerts.json")[0]
+
+    cache = ResponseCache(worker)
+    encoded = cache.get("weather_data.json", "current")
+    assert isinstance(encoded.body, memoryview)
+    assert bytes(encoded.body) == encode_json({"temperature": 31})
+    response = cache.respond(Request({"type": "http", "headers": []}), "weather_data.json", "current")
+    assert json.loads(bytes(response.body)) == {"temperature": 31}
+
+
+def test_new_generation_replaces_only_changed_datasets(tmp_path):
+    source, loader, publisher, worker = make_plane(tmp_path)
+    weather = worker.get("weather_data.json")
+
+    write(source / "alerts.json", [{"id": "a-1", "severity": "red"}, {"id": "a-2", "severity": "yellow"}])
+    assert asyncio.run(loader.check_for_changes()) == ["alerts.json"]
+    publisher.publish()
+
+    assert asyncio.run(worker.check_for_changes()) == ["alerts.json"]
+    assert worker.generation == 2
+    assert worker.get("alerts.json").version == 2
+    assert worker.derived("alerts.json", "index").count("severity", "yellow") == 1
+    # Unchanged datasets keep their snapshot but are served from the new mapping
+    assert worker.get("weather_data.json") is weather
+    assert worker._parts["weather_data.json"][1].generation == 2
+
+    # Nothing new published: nothing to do
+    assert asyncio.run(worker.check_for_changes()) == []
+
+
+def test_dataset_removed_at_the_source_disappears_from_workers(tmp_path):
+    source, loader, publisher, worker = make_plane(tmp_path)
+    os.remove(source / "weather_data.json")
+    assert asyncio.run(loader.check_for_changes()) == ["weather_data.json"]
+    publisher.publish()
+
+    assert asyncio.run(worker.check_for_changes()) == ["weather_data.json"]
+    assert worker.get("weather_data.json") is None
+    assert worker.encoded_part("weather_data.json", "", 1) is None
+    assert [s.name for s in worker.snapshots()] == ["alerts.json"]
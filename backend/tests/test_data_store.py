@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+
+from data_store import DatasetStore
+
+
+def write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_get_never_reads_the_disk(tmp_path):
+    store = DatasetStore(tmp_path)
+    store.load_all()
+    parses = []
+    store.observe_loads(lambda name, seconds, ok: parses.append((name, ok)))
+
+    write(tmp_path / "late.json", [1])
+    for _ in range(3):
+        assert store.get("late.json") is None
+        assert store.get("missing.json") is None
+    assert parses == []
+
+    assert asyncio.run(store.check_for_changes()) == ["late.json"]
+    assert store.data("late.json") == (1,)
+
+
+def test_broken_file_is_parsed_once_per_change(tmp_path):
+    (tmp_path / "alerts.json").write_text("{not json", encoding="utf-8")
+    store = DatasetStore(tmp_path)
+    parses = []
+    store.observe_loads(lambda name, seconds, ok: parses.append(ok))
+    store.load_all()
+    for _ in range(3):
+        assert asyncio.run(store.check_for_changes()) == []
+        assert store.get("alerts.json") is None
+    assert parses == [False]
+
+    write(tmp_path / "alerts.json", [{"id": "a-1"}])
+    assert asyncio.run(store.check_for_changes()) == ["alerts.json"]
+    assert parses == [False, True]
+    assert store.get("alerts.json").version == 1
+
+
+def test_deleted_dataset_is_dropped(tmp_path):
+    region = tmp_path / "regions" / "cuttack"
+    region.mkdir(parents=True)
+    write(tmp_path / "alerts.json", [])
+    write(region / "alerts.json", [{"id": "c-1"}])
+    store = DatasetStore(tmp_path)
+    store.load_all()
+    assert store.has_region("cuttack")
+    assert store.resolve("alerts.json", "cuttack") == "regions/cuttack/alerts.json"
+
+    os.remove(region / "alerts.json")
+    assert asyncio.run(store.check_for_changes()) == ["regions/cuttack/alerts.json"]
+    assert store.get("regions/cuttack/alerts.json") is None
+    assert not store.has_region("cuttack")
+    assert store.resolve("alerts.json", "cuttack") == "alerts.json"
+    assert [s.name for s in store.snapshots()] == ["alerts.json"]
+
+
+def test_reload_swaps_snapshot_with_rebuilt_derived_data(tmp_path):
+    write(tmp_path / "alerts.json", [{"id": "a-1"}])
+    store = DatasetStore(tmp_path)
+    store.register("alerts.json", "ids", lambda data: {alert["id"] for alert in data})
+    reloads = []
+    store.subscribe(lambda new, previous: reloads.append((new.version, previous.version if previous else None)))
+    store.load_all()
+    first = store.get("alerts.json")
+    assert store.derived("alerts.json", "ids") == {"a-1"}
+
+    # Unchanged files are not re-parsed
+    assert asyncio.run(store.check_for_changes()) == []
+
+    write(tmp_path / "alerts.json", [{"id": "a-1"}, {"id": "a-2"}])
+    os.utime(tmp_path / "alerts.json", ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    assert asyncio.run(store.check_for_changes()) == ["alerts.json"]
+    assert store.get("alerts.json").version == 2
+    assert store.derived("alerts.json", "ids") == {"a-1", "a-2"}
+    assert reloads == [(1, None), (2, 1)]
+    # The old snapshot is untouched for requests still holding it
+    assert first.data == ({"id": "a-1"},)
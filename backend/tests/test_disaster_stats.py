@@ -0,0 +1,62 @@
+import json
+import math
+
+from data_store import DatasetStore
+from disaster_stats import DisasterStatsEngine, parse_money
+
+DISASTERS = [
+    {"type": "Cyclone", "severity": "Severe", "location": "Puri", "date": "2019-05-03",
+     "casualties": 64, "affected_population": 1000000, "economic_loss": "$8.1 billion USD"},
+    {"type": "Cyclone", "severity": "High", "location": "Ganjam", "date": "2019-10-12",
+     "casualties": 10, "affected_population": 50000, "economic_loss": "Rs 500 crore"},
+    {"type": "Flood", "severity": "High", "location": "Cuttack", "date": "2020-08-20",
+     "casualties": 20, "affected_population": 200000, "economic_loss": None},
+    {"type": "Flood", "location": "Cuttack", "date": "not a date", "casualties": "n/a"},
+]
+
+
+def make_engine(tmp_path, disasters=DISASTERS):
+    (tmp_path / "disasters.json").write_text(json.dumps(disasters), encoding="utf-8")
+    store = DatasetStore(tmp_path)
+    engine = DisasterStatsEngine(store)
+    store.load_all()
+    return store, engine
+
+
+def test_parse_money():
+    assert parse_money("$8.1 billion USD") == 8.1e9
+    assert parse_money("Rs 1,200 crore") == 1.2e10
+    assert parse_money(42) == 42.0
+    assert math.isnan(parse_money("unknown"))
+
+
+def test_group_by_type_and_year(tmp_path):
+    store, engine = make_engine(tmp_path)
+    result = engine.aggregate(group_by=["type"], bucket="year", metrics=["casualties", "economic_loss"], aggregations=["sum", "max"])
+    assert result["totals"]["count"] == 4
+    assert result["totals"]["casualties"] == {"sum": 94, "max": 64}
+    assert result["groups"] == [
+        {"type": "Cyclone", "year": 2019, "count": 2,
+         "casualties": {"sum": 74, "max": 64}, "economic_loss": {"sum": int(8.1e9 + 5e9), "max": int(8.1e9)}},
+        {"type": "Flood", "year": 2020, "count": 1,
+         "casualties": {"sum": 20, "max": 20}, "economic_loss": {"sum": 0, "max": None}},
+    ]
+
+
+def test_date_filter_and_missing_fields(tmp_path):
+    store, engine = make_engine(tmp_path)
+    result = engine.aggregate(group_by=["severity"], metrics=["casualties"], aggregations=["mean"], date_from="2019-06-01")
+    assert result["totals"]["count"] == 2
+    assert [(g["severity"], g["casualties"]["mean"]) for g in result["groups"]] == [("High", 15)]
+
+
+def test_results_are_cached_per_dataset_version(tmp_path):
+    store, engine = make_engine(tmp_path)
+    first = engine.aggregate()
+    assert engine.aggregate() is first
+    assert (engine.misses, engine.hits) == (1, 1)
+
+    (tmp_path / "disasters.json").write_text(json.dumps(DISASTERS[:1]), encoding="utf-8")
+    store.load("disasters.json")
+    assert engine.aggregate()["totals"]["count"] == 1
+    assert engine.misses == 2
@@ -0,0 +1,77 @@
+import random
+from datetime import datetime, timezone
+
+import numpy as np
+
+from earthquake_feed import COLUMNS, EarthquakeFeed
+
+
+def event(i, seconds):
+    return {
+        "id": f"eq-{i}",
+        "time": datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat(),
+        "magnitude": 2 + i % 5,
+        "depth": 10.0,
+        "coordinates": {"lat": 20.0 + i % 3, "lon": 85.0},
+        "region": "Odisha",
+    }
+
+
+def test_late_batch_merges_into_time_order():
+    rng = random.Random(7)
+    events = [event(i, 1_700_000_000 + rng.randrange(10**6)) for i in range(500)]
+    feed = EarthquakeFeed(late_buffer=100)
+    assert feed.add_many(events[:300]) == 300
+    # Back-fill older and newer events in one batch, with a repeat that must be skipped
+    assert feed.add_many(events[300:] + events[:5]) == 200
+    assert not feed._late
+
+    expected = sorted(events, key=lambda e: (datetime.fromisoformat(e["time"]).timestamp(), e["id"]))
+    assert [e["id"] for e in feed._events] == [e["id"] for e in expected]
+    assert feed._keys == sorted(feed._keys)
+    times = feed._columns["time"][:len(feed)]
+    assert np.array_equal(times, [k[0] for k in feed._keys])
+    for name in COLUMNS:
+        assert len(feed._columns[name]) >= len(feed)
+
+
+def test_batch_matches_one_by_one_inserts():
+    rng = random.Random(11)
+    events = [event(i, 1_700_000_000 + rng.randrange(10**5)) for i in range(200)]
+    one_by_one, batched = EarthquakeFeed(), EarthquakeFeed()
+    for e in events:
+        one_by_one.add(e)
+    batched.add_many(events[:50])
+    batched.add_many(events[50:])
+    assert one_by_one.query(limit=500) == batched.query(limit=500)
+    assert one_by_one.rolling("hour", None, None, None) == batched.rolling("hour", None, None, None)
+
+
+def test_late_events_are_buffered_and_queried_until_merged():
+    rng = random.Random(3)
+    events = [event(i, 1_700_000_000 + rng.randrange(10**5)) for i in range(400)]
+    events.sort(key=lambda e: e["time"])
+    late = events[::4]
+    buffered = EarthquakeFeed(late_buffer=1000)
+    buffered.add_many([e for e in events if e not in late])
+    for e in late:
+        assert buffered.add(e)
+    # The main arrays are left alone; the late events wait in the side buffer
+    assert len(buffered._keys) == 300 and len(buffered._late) == 100
+    assert len(buffered) == 400
+
+    merged = EarthquakeFeed(late_buffer=1000)
+    merged.add_many(events)
+    assert buffered.stats() == merged.stats()
+    for kwargs in ({}, {"min_magnitude": 4}, {"near": (21.0, 85.0, 50.0)}):
+        pages, cursor = [], None
+        while True:
+            page, cursor = buffered.query(cursor=cursor, limit=7, **kwargs)
+            pages.extend(page)
+            if cursor is None:
+                break
+        assert pages == merged.query(limit=500, **kwargs)[0]
+
+    buffered.merge_late()
+    assert not buffered._late and len(buffered._keys) == 400
+    assert buffered.query(limit=500) == merged.query(limit=500)
@@ -0,0 +1,60 @@
+import random
+
+import numpy as np
+
+from flood_risk import FloodZoneIndex, ZoneGeometry
+
+# A closed square around Cuttack and an open river reach to the east
+SQUARE = [[20.40, 85.80], [20.40, 85.90], [20.50, 85.90], [20.50, 85.80], [20.40, 85.80]]
+RIVER = [[20.30, 86.00], [20.50, 86.00], [20.60, 86.10]]
+
+
+def zones():
+    return (
+        {"id": "fz-1", "location": "Cuttack", "risk_level": "High", "coordinates": SQUARE,
+         "current_water_level": 24.0, "danger_level": 25.5, "warning_level": 24.5},
+        {"id": "fz-2", "location": "Mahanadi reach", "risk_level": "Moderate", "coordinates": RIVER,
+         "current_water_level": 10.0, "danger_level": 13.0},
+        {"id": "fz-3", "location": "No geometry", "risk_level": "Severe"},
+    )
+
+
+def test_point_inside_polygon_is_covered():
+    index = FloodZoneIndex(zones())
+    hits = index.at(20.45, 85.85, near_km=0.5)
+    assert [h["id"] for h in hits] == ["fz-1"]
+    assert hits[0]["covering"] is True and hits[0]["distance_km"] == 0.0
+    assert hits[0]["margin_to_danger"] == 1.5
+    assert hits[0]["margin_to_warning"] == 0.5
+
+
+def test_polyline_is_a_reach_not_an_area():
+    index = FloodZoneIndex(zones())
+    # ~1 km west of the river line, well inside the triangle its points would enclose
+    hits = index.at(20.40, 85.99, near_km=2.0)
+    assert [h["id"] for h in hits] == ["fz-2"]
+    assert hits[0]["covering"] is False
+    assert 0.9 < hits[0]["distance_km"] < 1.2
+    assert index.at(20.40, 85.99, near_km=0.5) == []
+
+
+def test_batch_score_matches_brute_force():
+    rng = random.Random(5)
+    many = []
+    for i in range(60):
+        lat, lon = 19 + rng.random() * 3, 84 + rng.random() * 3
+        ring = [[lat, lon], [lat, lon + 0.05], [lat + 0.05, lon + 0.05], [lat + 0.05, lon], [lat, lon]]
+        many.append({"id": f"z-{i}", "risk_level": rng.choice(["Low", "High"]), "coordinates": ring if i % 2 else ring[:3]})
+    index = FloodZoneIndex(many, node_size=4)
+    lats = np.array([19 + rng.random() * 3 for _ in range(500)])
+    lons = np.array([84 + rng.random() * 3 for _ in range(500)])
+
+    results = {r["index"]: r for r in index.score(lats, lons, near_km=5.0)}
+    distances = {zone["id"]: ZoneGeometry(zone["coordinates"]).distance_km(lats, lons) for zone in many}
+    for point in range(len(lats)):
+        expected = [(round(float(d[point]), 3), zone_id) for zone_id, d in distances.items() if d[point] <= 5.0]
+        found = sorted((h["distance_km"], h["id"]) for h in results[point]["zones"]) if point in results else []
+        assert found == sorted(expected)
+        if point in results:
+            levels = {h["risk_level"] for h in results[point]["zones"]}
+            assert results[point]["max_risk_level"] == ("High" if "High" in levels else "Low")
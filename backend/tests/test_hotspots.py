@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from hotspots import HotspotIndex
+
+
+class ScanCollection:
+    """Yields stored reports; `during_scan` runs after the scan has started, like a live request"""
+
+    def __init__(self, docs, during_scan):
+        self.docs = docs
+        self.during_scan = during_scan
+
+    def find(self, query, projection):
+        return self._scan()
+
+    async def _scan(self):
+        self.during_scan()
+        for doc in self.docs:
+            yield doc
+
+
+def report(report_id, **extra):
+    return {
+        "id": report_id,
+        "coordinates": {"lat": 20.46, "lon": 85.88},
+        "timestamp": datetime.now(timezone.utc) - timedelta(minutes=5),
+        "report_type": "flood",
+        "severity": "high",
+        **extra,
+    }
+
+
+def total(index):
+    now = datetime.now(timezone.utc)
+    return sum(h["count"] for h in index.query(10, now - timedelta(hours=1), now))
+
+
+def test_bootstrap_counts_each_corroboration_once():
+    index = HotspotIndex()
+    stored = [report("r-1", corroborated_by=["d-1", "d-2"]), report("r-2", corroborated_by=[])]
+    # d-2 was accepted live, and its flush reached Mongo before the scan read r-1
+    collection = ScanCollection(stored, lambda: index.add(report("d-2")))
+    asyncio.run(index.bootstrap(collection))
+    assert total(index) == 4  # r-1, d-1, d-2, r-2
+
+    # After the bootstrap, live reports and corroborations are simply added
+    index.add(report("d-3"))
+    assert total(index) == 5
+
+
+def test_bootstrap_skips_reports_added_live():
+    index = HotspotIndex()
+    live = report("r-3", corroborated_by=["d-4"])
+    collection = ScanCollection([live], lambda: (index.add(live), index.add(report("d-4"))))
+    asyncio.run(index.bootstrap(collection))
+    assert total(index) == 2
+    assert index.stats()["reports"] == 2
@@ -0,0 +1,49 @@
+import pytest
+
+from indexes import RecordIndex
+
+DISASTERS = (
+    {"id": "d-1", "type": "Flood", "status": "active", "severity": "high"},
+    {"id": "d-2", "type": "cyclone", "status": "Active", "severity": "severe"},
+    {"id": "d-3", "type": "flood", "status": "resolved", "severity": "high"},
+    {"id": "d-1", "type": "fire", "status": "active"},
+    {"type": "flood", "status": "active", "severity": None},
+)
+
+
+def scan(records, **criteria):
+    """What the handlers did before the index: a linear, case-insensitive scan"""
+    return [
+        r for r in records
+        if all(value is None or str(r.get(name)).lower() == str(value).lower() for name, value in criteria.items())
+    ]
+
+
+def test_id_lookup_keeps_the_first_record():
+    index = RecordIndex(DISASTERS, fields=("type", "status"))
+    assert index.get("d-1") is DISASTERS[0]
+    assert index.get("d-2") is DISASTERS[1]
+    assert index.get("missing") is None
+
+
+def test_filters_match_a_linear_scan_in_dataset_order():
+    index = RecordIndex(DISASTERS, fields=("type", "status", "severity"))
+    for criteria in (
+        {"type": "flood"},
+        {"status": "ACTIVE"},
+        {"type": "Flood", "status": "active"},
+        {"type": "flood", "severity": "high", "status": "resolved"},
+        {"type": "earthquake"},
+        {"type": None, "status": "active"},
+    ):
+        assert index.filter(**criteria) == scan(DISASTERS, **criteria), criteria
+    assert index.filter() == list(DISASTERS)
+    assert index.filter(type="") == list(DISASTERS)
+    assert index.count("type", "FLOOD") == 3
+    assert index.values("status") == ["active", "resolved"]
+
+
+def test_unindexed_field_is_rejected():
+    index = RecordIndex(DISASTERS, fields=("type",))
+    with pytest.raises(KeyError):
+        index.filter(status="active")
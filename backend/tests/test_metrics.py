@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from metrics import HttpMetrics, MetricsMiddleware, MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(("/a",), value)
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"]
+    assert lines[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_labels_are_escaped_and_names_unique():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors", ("detail",)).inc(('say "hi"\n',))
+    assert 'errors_total{detail="say \\"hi\\"\\n"} 1' in registry.render()
+    with pytest.raises(ValueError):
+        registry.counter("errors_total", "Again")
+
+
+def test_middleware_labels_requests_by_route_template():
+    registry = MetricsRegistry()
+    metrics = HttpMetrics(registry)
+    app = FastAPI()
+
+    @app.get("/api/alerts/{alert_id}")
+    async def get_alert(alert_id: str):
+        if alert_id == "missing":
+            raise HTTPException(status_code=404, detail="Alert not found")
+        return {"id": alert_id}
+
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            for path in ("/api/alerts/1", "/api/alerts/2", "/api/alerts/missing", "/nowhere"):
+                await client.get(path)
+
+    asyncio.run(scenario())
+    text = registry.render()
+    assert 'http_requests_total{method="GET",route="/api/alerts/{alert_id}",status="200"} 2' in text
+    assert 'http_requests_total{method="GET",route="/api/alerts/{alert_id}",status="404"} 1' in text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/alerts/{alert_id}"} 3' in text
+    assert "http_requests_in_progress 0" in text
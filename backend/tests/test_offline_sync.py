@@ -0,0 +1,65 @@
+import json
+import shutil
+from pathlib import Path
+
+from data_store import DatasetStore
+from offline_sync import OfflineSync, SYNC_COLLECTIONS
+
+MOCK_DATA = Path(__file__).resolve().parent.parent / "mock_data"
+
+
+def make_store(data_dir):
+    store = DatasetStore(data_dir)
+    store.load_all()
+    return store
+
+
+def write_alerts(data_dir, alerts):
+    (data_dir / "alerts.json").write_text(json.dumps(alerts), encoding="utf-8")
+    return alerts
+
+
+def test_workers_agree_on_tokens_and_deltas(tmp_path):
+    for name in {c.dataset for c in SYNC_COLLECTIONS.values()}:
+        shutil.copy(MOCK_DATA / name, tmp_path / name)
+    alerts = json.loads((tmp_path / "alerts.json").read_text(encoding="utf-8"))
+    first = OfflineSync(make_store(tmp_path))
+    initial = first.current()
+
+    # Another worker, started later, sees the same data and must hand out the same token
+    second_store = make_store(tmp_path)
+    second = OfflineSync(second_store)
+    assert second.current() == initial
+
+    # Only the second worker reloads twice, so its internal counters move ahead
+    write_alerts(tmp_path, alerts + [{"id": "extra-1", "title": "Test"}])
+    second_store.load("alerts.json")
+    second.current()
+    write_alerts(tmp_path, alerts + [{"id": "extra-1", "title": "Test"}, {"id": "extra-2", "title": "Test"}])
+    second_store.load("alerts.json")
+    latest = second.current()
+
+    delta = json.loads(second.sync(initial).body)
+    assert delta["type"] == "delta"
+    assert delta["version"] == latest
+    assert [a["id"] for a in delta["collections"]["alerts"]["added"]] == ["extra-1", "extra-2"]
+    # The first worker never saw `latest`, so it answers with a full snapshot, not a wrong delta
+    assert json.loads(first.sync(latest).body)["type"] == "snapshot"
+
+
+def test_unchanged_content_keeps_its_token(tmp_path):
+    for name in {c.dataset for c in SYNC_COLLECTIONS.values()}:
+        shutil.copy(MOCK_DATA / name, tmp_path / name)
+    store = make_store(tmp_path)
+    sync = OfflineSync(store)
+    token = sync.current()
+    store.load("alerts.json")
+    assert sync.current() == token
+    assert json.loads(sync.sync(token).body) == {"type": "delta", "since": token, "version": token, "collections": {}}
+
+
+def test_legacy_tokens_get_a_snapshot(tmp_path):
+    for name in {c.dataset for c in SYNC_COLLECTIONS.values()}:
+        shutil.copy(MOCK_DATA / name, tmp_path / name)
+    sync = OfflineSync(make_store(tmp_path))
+    assert json.loads(sync.sync("6710a3c2-4").body)["type"] == "snapshot"
@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:1")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("DATA_RELOAD_INTERVAL", "0")
+
+import server  # noqa: E402
+from data_store import DatasetStore  # noqa: E402
+
+
+@pytest.fixture(scope="module", autouse=True)
+def loaded():
+    server.dataset_store.load_all()
+
+
+def get(path):
+    async def fetch():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+            return await client.get(path)
+    return asyncio.run(fetch())
+
+
+def test_region_partition_overrides_the_global_file():
+    assert get("/api/weather/current").json()["location"] == "Bhubaneswar, Odisha"
+    regional = get("/api/weather/current?region=Cuttack")
+    assert regional.status_code == 200
+    assert regional.json()["location"] == "Cuttack, Odisha"
+    # Files a region does not override come from the global dataset
+    assert get("/api/disasters?region=cuttack").status_code == 200
+
+
+def test_unknown_region_is_404_and_foreign_region_is_421(monkeypatch):
+    assert get("/api/weather/current?region=atlantis").status_code == 404
+    monkeypatch.setattr(server.dataset_store, "pinned_regions", frozenset({"cuttack"}))
+    misdirected = get("/api/aqi/current?region=puri")
+    assert misdirected.status_code == 421
+    assert "not served by this worker" in misdirected.json()["detail"]
+    assert get("/api/aqi/current?region=cuttack").status_code == 200
+
+
+def test_pinned_store_never_loads_other_regions():
+    store = DatasetStore(server.MOCK_DATA_DIR, regions=["puri"])
+    store.load_all()
+    assert list(store.regions()) == ["puri"]
+    assert store.load("regions/cuttack/alerts.json") is None
+    assert store.resolve("alerts.json", "cuttack") == "alerts.json"
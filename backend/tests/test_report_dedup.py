@@ -0,0 +1,146 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from report_dedup import DuplicateIndex, hamming, simhash
+
+# Paraphrases of one incident that should merge into a single report
+DUPLICATES = [
+    ("Water entering houses near the bus stand, about two feet deep", "Water is entering houses near bus stand, two feet deep"),
+    ("Large tree fallen across the main road near the hospital, traffic blocked", "Big tree has fallen across main road near hospital and traffic is blocked"),
+    ("Electric pole fell on the road after strong winds, wires lying on the ground", "Strong winds knocked an electric pole onto the road, live wires on the ground"),
+    ("Flood water rising fast in the market area, shops submerged", "Flood water is rising fast in market area and shops are submerged"),
+    ("Embankment breached near the village, water flowing into fields", "The embankment has breached near village and water is flowing into the fields"),
+    ("Landslide blocking the highway near the bridge", "Landslide has blocked the highway near bridge"),
+    ("Family of five stranded on the roof, need boat rescue urgently", "Five family members stranded on roof, urgently need rescue boat"),
+    ("No drinking water supply in our colony since yesterday morning", "Our colony has had no drinking water supply since yesterday morning"),
+    ("Fire in the warehouse behind the railway station, heavy smoke", "Heavy smoke, fire in warehouse behind railway station"),
+    ("Cyclone shelter is overcrowded, no food or water available", "The cyclone shelter is overcrowded and there is no food or water"),
+    ("Road washed away near block 12, vehicles cannot pass", "Road near block 12 washed away and vehicles cannot pass"),
+    ("Severe waterlogging on NH 16 near the toll plaza", "Severe waterlogging near toll plaza on NH 16"),
+    ("Mobile network down in the whole area after the storm", "After the storm mobile network is down in whole area"),
+    ("Heavy rain flooding the underpass, two cars stuck", "Underpass flooded by heavy rain, two cars are stuck"),
+    ("Sewage overflowing into streets after heavy rain", "After heavy rain sewage is overflowing into the streets"),
+    ("Roof of the school collapsed due to heavy rain, no injuries", "School roof collapsed in heavy rain, no one injured"),
+]
+
+# Same place and type, but a different incident or location: both must be kept
+DISTINCT = [
+    ("Road washed away near block 12, vehicles cannot pass", "Road washed away near block 15, vehicles cannot pass"),
+    ("Water entering houses in ward 3", "Water entering houses in ward 8"),
+    ("Tree fallen on the road near the hospital", "Electric pole fallen on the road near the hospital"),
+    ("Flood water rising in the market area", "Fire spreading in the market area"),
+    ("Family stranded on the roof, need boat rescue", "Family stranded on the roof, need food and water"),
+    ("Landslide blocking the highway near the bridge", "Bridge collapsed on the highway near the landslide zone"),
+    ("No drinking water supply in our colony", "No electricity supply in our colony"),
+    ("Two cars stuck in the flooded underpass", "Two buses stuck in the flooded underpass"),
+    ("Heavy smoke from the warehouse behind the railway station", "Heavy smoke from the chemical factory behind the railway station"),
+    ("Embankment breached near the village", "Embankment cracking near the village, not yet breached"),
+    ("Severe waterlogging on NH 16 near the toll plaza", "Severe waterlogging on NH 5 near the toll plaza"),
+    ("Cyclone shelter overcrowded, no food available", "Cyclone shelter closed, people waiting outside"),
+]
+
+NOW = datetime.now(timezone.utc)
+
+
+def report(report_id, description, minutes=0, **extra):
+    return {
+        "id": report_id,
+        "location": "Cuttack",
+        "report_type": "flood",
+        "description": description,
+        "coordinates": {"lat": 20.4625, "lon": 85.8830},
+        "timestamp": NOW + timedelta(minutes=minutes),
+        **extra,
+    }
+
+
+def first_match(first, second):
+    index = DuplicateIndex()
+    index.add(report("r1", first))
+    return index.match(report("r2", second, minutes=5))
+
+
+@pytest.mark.parametrize("first, second", DUPLICATES)
+def test_paraphrases_merge(first, second):
+    assert first_match(first, second) is not None
+
+
+@pytest.mark.parametrize("first, second", DISTINCT)
+def test_different_incidents_are_kept(first, second):
+    assert first_match(first, second) is None
+
+
+def test_default_threshold_separates_the_labelled_pairs():
+    max_duplicate = max(hamming(simhash(a), simhash(b)) for a, b in DUPLICATES)
+    assert max_duplicate <= DuplicateIndex().max_distance
+
+
+def test_other_type_place_or_window_is_not_a_duplicate():
+    text = DUPLICATES[0][0]
+    index = DuplicateIndex(window=timedelta(hours=1))
+    index.add(report("r1", text))
+    assert index.match(report("r2", text, report_type="fire")) is None
+    assert index.match(report("r3", text, coordinates={"lat": 20.60, "lon": 85.88})) is None
+    assert index.match(report("r4", text, minutes=90)) is None
+
+
+def test_neighbouring_cell_still_matches():
+    index = DuplicateIndex()
+    index.add(report("r1", DUPLICATES[0][0], coordinates={"lat": 20.4599, "lon": 85.8830}))
+    assert index.match(report("r2", DUPLICATES[0][1], coordinates={"lat": 20.4601, "lon": 85.8830})) is not None
+
+
+def test_corroborations_are_counted_on_the_canonical_report():
+    index = DuplicateIndex()
+    index.add(report("r1", DUPLICATES[0][0], corroboration_count=2))
+    entry = index.match(report("r2", DUPLICATES[0][1]))
+    assert index.corroborate(entry)["corroboration_count"] == 3
+    assert index.stats()["suppressed"] == 1
+
+
+def test_multi_probe_finds_every_pair_within_max_distance(monkeypatch):
+    import report_dedup
+
+    rng = random.Random(5)
+    fingerprints = {}
+    monkeypatch.setattr(report_dedup, "simhash", lambda text: fingerprints[text])
+    index = DuplicateIndex()
+    for i in range(300):
+        base = rng.getrandbits(64)
+        distance = i % 20
+        flipped = base
+        for bit in rng.sample(range(64), distance):
+            flipped ^= 1 << bit
+        fingerprints[f"held {i}"], fingerprints[f"new {i}"] = base, flipped
+        index.add(report(f"held-{i}", f"held {i}"))
+        found = index.match(report(f"new-{i}", f"new {i}", minutes=1))
+        assert (found is not None) == (distance <= index.max_distance), distance
+
+
+def test_lookup_compares_only_a_fraction_of_held_reports(monkeypatch):
+    import report_dedup
+
+    rng = random.Random(9)
+    fingerprints = {f"d{i}": rng.getrandbits(64) for i in range(3000)}
+    monkeypatch.setattr(report_dedup, "simhash", lambda text: fingerprints[text])
+    index = DuplicateIndex()
+    for i in range(2000):
+        index.add(report(f"r{i}", f"d{i}"))
+    compared = []
+    monkeypatch.setattr(report_dedup, "hamming", lambda a, b: compared.append(1) or (a ^ b).bit_count())
+    for i in range(2000, 2100):
+        index.match(report(f"q{i}", f"d{i}"))
+    assert len(compared) / 100 < 0.1 * 2000
+
+
+def test_report_added_after_newer_ones_still_expires_on_time():
+    index = DuplicateIndex(window=timedelta(hours=6))
+    index.add(report("live", DUPLICATES[1][0]))
+    # Bootstrap reaches an older report after live ones are held
+    index.add(report("old", DUPLICATES[0][0], minutes=-350))
+    assert index.match(report("r1", DUPLICATES[0][1], minutes=-5)) is not None
+    assert index.match(report("r2", DUPLICATES[0][1], minutes=15)) is None
+    assert index.match(report("r3", DUPLICATES[1][1], minutes=15)) is not None
+    assert index.stats()["held"] == 1
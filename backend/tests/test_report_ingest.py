@@ -0,0 +1,242 @@
+import asyncio
+import json
+import shutil
+from datetime import datetime, timezone
+
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import WriteError
+
+from community_reports import ensure_indexes
+from report_ingest import DEAD_LETTER, IngestQueueFull, ReportIngestQueue, _encode
+
+REPORT = {
+    "id": "r1",
+    "reporter_name": "Asha",
+    "location": "Cuttack",
+    "report_type": "flood",
+    "description": "Water entering houses near the bus stand",
+    "severity": "high",
+    "coordinates": {"lat": 20.46, "lon": 85.88},
+    "timestamp": datetime(2026, 7, 1, 9, 0, tzinfo=timezone.utc),
+    "status": "pending",
+    "corroboration_count": 0,
+}
+
+
+def corroboration(corroboration_id, minute):
+    at = datetime(2026, 7, 1, 9, minute, tzinfo=timezone.utc)
+    return {"_op": "corroborate", "id": "r1", "corroboration_id": corroboration_id, "timestamp": at}
+
+
+async def drain(collection, spool_dir):
+    queue = ReportIngestQueue(collection, spool_dir, flush_interval=0.01)
+    await queue.start()
+    await queue.stop()
+    return queue
+
+
+def test_replaying_a_segment_twice_counts_each_corroboration_once(tmp_path):
+    collection = AsyncMongoMockClient(tz_aware=True)['t'].community_reports
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    segment = spool / "reports-0000000001.jsonl"
+    lines = [REPORT, corroboration("c1", 5), corroboration("c2", 7)]
+    segment.write_text("".join(_encode(doc) + "\n" for doc in lines), encoding="utf-8")
+    kept = tmp_path / "segment.jsonl"
+    shutil.copy(segment, kept)
+
+    async def run():
+        await ensure_indexes(collection)
+        await drain(collection, spool)
+        first = await collection.find_one({"id": "r1"})
+        # A crash before the segment was deleted replays it against the stored report
+        shutil.copy(kept, spool / "reports-0000000001.jsonl")
+        queue = await drain(collection, spool)
+        second = await collection.find_one({"id": "r1"})
+        return first, second, queue, await collection.count_documents({})
+
+    first, second, queue, stored = asyncio.run(run())
+    assert first["corroboration_count"] == 2
+    assert second["corroboration_count"] == 2
+    assert sorted(second["corroborated_by"]) == ["c1", "c2"]
+    assert second["last_corroborated_at"] == datetime(2026, 7, 1, 9, 7, tzinfo=timezone.utc)
+    assert queue.duplicates_skipped == 1
+    assert stored == 1
+    assert list(spool.glob("reports-*.jsonl")) == []
+
+
+def test_retried_batch_does_not_count_corroborations_twice(tmp_path):
+    collection = AsyncMongoMockClient(tz_aware=True)['t'].community_reports
+    queue = ReportIngestQueue(collection, tmp_path)
+    batch = [dict(REPORT), corroboration("c1", 5), corroboration("c1", 5), corroboration("c2", 6)]
+
+    async def run():
+        # The flusher retries the whole batch after a failure that may have been partly applied
+        await queue._write(batch)
+        await queue._write(batch)
+        return await collection.find_one({"id": "r1"})
+
+    stored = asyncio.run(run())
+    assert stored["corroboration_count"] == 2
+
+
+def test_corroborations_spooled_without_ids_replay_idempotently(tmp_path):
+    collection = AsyncMongoMockClient(tz_aware=True)['t'].community_reports
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    legacy = {"_op": "corroborate", "id": "r1", "timestamp": datetime(2026, 7, 1, 9, 5, tzinfo=timezone.utc)}
+    content = "".join(_encode(doc) + "\n" for doc in (REPORT, legacy))
+
+    async def run():
+        for _ in range(2):
+            (spool / "reports-0000000001.jsonl").write_text(content, encoding="utf-8")
+            await drain(collection, spool)
+        return await collection.find_one({"id": "r1"})
+
+    assert asyncio.run(run())["corroboration_count"] == 1
+
+
+class FlakyCollection:
+    """Applies the first corroboration bulk_write, then fails it, as a lost acknowledgement would"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.failures = 1
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def bulk_write(self, requests, **kwargs):
+        result = await self.collection.bulk_write(requests, **kwargs)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        return result
+
+
+def test_flusher_retries_a_failed_batch_without_double_counting(tmp_path):
+    collection = AsyncMongoMockClient(tz_aware=True)['t'].community_reports
+    queue = ReportIngestQueue(FlakyCollection(collection), tmp_path, flush_interval=0.01)
+
+    async def run():
+        await ensure_indexes(collection)
+        await queue.start()
+        await queue.submit(dict(REPORT))
+        await queue.corroborate("r1", "c1", datetime(2026, 7, 1, 9, 5, tzinfo=timezone.utc))
+        await queue.corroborate("r1", "c2", datetime(2026, 7, 1, 9, 6, tzinfo=timezone.utc))
+        # stop() only waits for the queue to empty; the batch is already out, retrying after a backoff
+        for _ in range(100):
+            if queue.flushed:
+                break
+            await asyncio.sleep(0.05)
+        await queue.stop()
+        return await collection.find_one({"id": "r1"})
+
+    stored = asyncio.run(run())
+    assert queue.flush_errors == 1
+    assert queue.flushed == 3
+    assert stored["corroboration_count"] == 2
+    assert queue.pending("r1") is None
+
+
+class RejectingCollection:
+    """Refuses any write that touches a report described as POISON, like a document Mongo cannot store"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def insert_many(self, documents, **kwargs):
+        if any(doc.get("description") == "POISON" for doc in documents):
+            raise WriteError("document failed validation", code=121)
+        return await self.collection.insert_many(documents, **kwargs)
+
+
+def test_rejected_document_is_dead_lettered_and_the_queue_keeps_flowing(tmp_path):
+    collection = AsyncMongoMockClient(tz_aware=True)['t'].community_reports
+    queue = ReportIngestQueue(RejectingCollection(collection), tmp_path, flush_interval=0.01, max_attempts=2, retry_delay=0.01)
+    poison = {**REPORT, "id": "bad", "description": "POISON"}
+
+    async def run():
+        await queue.start()
+        await queue.submit(dict(REPORT))
+        await queue.submit(poison)
+        for _ in range(100):
+            if queue.flushed:
+                break
+            await asyncio.sleep(0.02)
+        await queue.submit({**REPORT, "id": "r2"})
+        for _ in range(100):
+            if queue.flushed == 3:
+                break
+            await asyncio.sleep(0.02)
+        await queue.stop()
+        return sorted(doc["id"] for doc in await collection.find().to_list(None))
+
+    assert asyncio.run(run()) == ["r1", "r2"]
+    assert queue.dead_lettered == 1
+    assert queue.flush_errors == 2
+    assert queue.flushed == 3
+    dead = [json.loads(line) for line in (tmp_path / DEAD_LETTER).read_text(encoding="utf-8").splitlines()]
+    assert [entry["doc"]["id"] for entry in dead] == ["bad"]
+    assert queue.pending("bad") is None
+    assert list(tmp_path.glob("reports-*.jsonl")) == []
+
+
+def test_concurrent_reports_share_spool_writes_and_are_on_disk_when_accepted(tmp_path):
+    collection = AsyncMongoMockClient(tz_aware=True)['t'].community_reports
+    queue = ReportIngestQueue(collection, tmp_path, flush_interval=5)
+    writes = []
+    append = queue._append
+    queue._append = lambda lines: (writes.append(lines.count("\n")), append(lines))
+
+    async def run():
+        await queue.start()
+        await asyncio.gather(*(queue.submit({**REPORT, "id": f"r{i}"}) for i in range(50)))
+        spooled = (tmp_path / "reports-0000000001.jsonl").read_text(encoding="utf-8").count("\n")
+        await queue.stop(timeout=0)
+        return spooled
+
+    assert asyncio.run(run()) == 50
+    assert sum(writes) == 50
+    assert len(writes) < 50
+    assert queue.accepted == 50
+
+
+def test_full_queue_rejects_reports(tmp_path):
+    collection = AsyncMongoMockClient(tz_aware=True)['t'].community_reports
+    queue = ReportIngestQueue(collection, tmp_path, max_pending=3, flush_interval=5)
+
+    async def run():
+        await queue.start()
+        results = await asyncio.gather(
+            *(queue.submit({**REPORT, "id": f"r{i}"}) for i in range(5)), return_exceptions=True
+        )
+        await queue.stop(timeout=0)
+        return results
+
+    results = asyncio.run(run())
+    assert sum(isinstance(r, IngestQueueFull) for r in results) == 2
+    assert queue.rejected == 2
+    assert queue.pending("r4") is None
+
+
+def test_replayed_reports_are_readable_until_flushed(tmp_path):
+    collection = AsyncMongoMockClient(tz_aware=True)['t'].community_reports
+    (tmp_path / "reports-0000000001.jsonl").write_text(
+        "".join(_encode(doc) + "\n" for doc in (REPORT, corroboration("c1", 5))), encoding="utf-8"
+    )
+    queue = ReportIngestQueue(collection, tmp_path, flush_interval=0.01)
+
+    async def run():
+        await queue.start()
+        replayed = queue.pending("r1")
+        await queue.stop()
+        return replayed, await collection.find_one({"id": "r1"})
+
+    replayed, stored = asyncio.run(run())
+    assert replayed["description"] == REPORT["description"]
+    assert stored["corroboration_count"] == 1
+    assert queue.pending("r1") is None
@@ -0,0 +1,100 @@
+import gzip
+import json
+import os
+
+import pytest
+from starlette.requests import Request
+
+from data_store import DatasetStore
+from response_cache import ResponseCache
+
+
+def request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def make_cache(tmp_path, data):
+    (tmp_path / "weather_data.json").write_text(json.dumps(data), encoding="utf-8")
+    store = DatasetStore(tmp_path)
+    store.load_all()
+    return store, ResponseCache(store)
+
+
+def test_sub_path_is_encoded_once_and_revalidated_with_304(tmp_path):
+    store, cache = make_cache(tmp_path, {"current": {"temperature": 31}, "hourly": []})
+    response = cache.respond(request(), "weather_data.json", "current", {})
+    assert response.status_code == 200
+    assert json.loads(response.body) == {"temperature": 31}
+    etag = response.headers["etag"]
+
+    assert cache.respond(request(), "weather_data.json", "current", {}).headers["etag"] == etag
+    assert (cache.misses, cache.hits) == (1, 1)
+
+    not_modified = cache.respond(request(if_none_match=etag), "weather_data.json", "current", {})
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    assert not_modified.headers["etag"] == etag
+    assert cache.respond(request(if_none_match=f'"other", W/{etag}'), "weather_data.json", "current", {}).status_code == 304
+    assert cache.respond(request(if_none_match='"other"'), "weather_data.json", "current", {}).status_code == 200
+
+    # Missing sub-paths get the default; missing datasets get None so the handler can 404
+    assert json.loads(cache.respond(request(), "weather_data.json", "daily", []).body) == []
+    assert cache.respond(request(), "absent.json") is None
+
+
+def test_reload_changes_the_etag(tmp_path):
+    store, cache = make_cache(tmp_path, {"current": {"temperature": 31}})
+    etag = cache.respond(request(), "weather_data.json", "current", {}).headers["etag"]
+
+    path = tmp_path / "weather_data.json"
+    mtime = store.get("weather_data.json").mtime_ns + 10**9
+    path.write_text(json.dumps({"current": {"temperature": 33}}), encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+    store.load("weather_data.json")
+
+    response = cache.respond(request(if_none_match=etag), "weather_data.json", "current", {})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert json.loads(response.body) == {"temperature": 33}
+
+
+def test_binary_formats_and_compression_are_negotiated(tmp_path):
+    # Optional dependencies; negotiation falls back to JSON without them
+    msgpack = pytest.importorskip("msgpack")
+    cbor2 = pytest.importorskip("cbor2")
+    data = {"hourly": [{"hour": h, "temperature": 25 + h % 7, "condition": "Partly cloudy"} for h in range(48)]}
+    store, cache = make_cache(tmp_path, data)
+    plain = cache.respond(request(), "weather_data.json")
+    assert plain.media_type == "application/json"
+
+    packed = cache.respond(request(accept="application/msgpack"), "weather_data.json")
+    assert packed.media_type == "application/msgpack"
+    assert msgpack.unpackb(packed.body) == data
+    assert packed.headers["etag"] != plain.headers["etag"]
+    assert packed.headers["vary"] == "Accept, Accept-Encoding"
+
+    cbor = cache.respond(request(accept="application/cbor;q=0.9, application/json;q=0.5"), "weather_data.json")
+    assert cbor2.loads(cbor.body) == data
+
+    zipped = cache.respond(request(accept_encoding="gzip"), "weather_data.json")
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(zipped.body)) == data
+
+    # Each variant revalidates against its own ETag
+    assert cache.respond(request(accept="application/msgpack", if_none_match=packed.headers["etag"]), "weather_data.json").status_code == 304
+    assert cache.respond(request(if_none_match=packed.headers["etag"]), "weather_data.json").status_code == 200
+    # Unknown or refused formats fall back to JSON
+    assert cache.respond(request(accept="text/csv, */*"), "weather_data.json").media_type == "application/json"
+    assert cache.respond(request(accept="application/msgpack;q=0, application/json"), "weather_data.json").media_type == "application/json"
+
+
+def test_small_bodies_are_not_compressed(tmp_path):
+    store, cache = make_cache(tmp_path, {"current": {"temperature": 31}})
+    response = cache.respond(request(accept_encoding="br, gzip"), "weather_data.json", "current", {})
+    assert "content-encoding" not in response.headers
+    assert json.loads(response.body) == {"temperature": 31}
@@ -0,0 +1,34 @@
+import pytest
+
+from search import fold, tokenize
+
+# (Latin spelling, native spelling) pairs that must index to the same term
+SAME_TERM = [
+    ("Bhubaneswar", "ଭୁବନେଶ୍ୱର"),
+    ("Bhubaneshwar", "भुवनेश्वर"),
+    ("Cuttack", "କଟକ"),
+    ("Cuttack", "कटक"),
+    ("Kataka", "Cuttack"),
+    ("chakravat", "चक्रवात"),
+    ("Puri", "ପୁରୀ"),
+]
+
+DIFFERENT_TERMS = [
+    ("chakravat", "kakravat"),  # ch and k stay apart
+    ("cyclone", "kyklone"),     # soft c is not folded
+    ("Uttar", "attar"),         # a leading u is a real u
+]
+
+
+@pytest.mark.parametrize("latin, native", SAME_TERM)
+def test_spelling_and_script_variants_meet(latin, native):
+    assert fold(latin) == fold(native)
+
+
+@pytest.mark.parametrize("first, second", DIFFERENT_TERMS)
+def test_distinct_words_stay_apart(first, second):
+    assert fold(first) != fold(second)
+
+
+def test_tokenize_folds_mixed_script_text():
+    assert tokenize("Flood alert: Cuttack / କଟକ") == ["flud", "alert", "katak", "katak"]
@@ -0,0 +1,50 @@
+from spatial import ShelterIndex
+
+
+def shelter(i, lat, capacity, occupancy, status="Active"):
+    return {
+        "id": f"center-{i}",
+        "coordinates": {"lat": lat, "lon": 85.0},
+        "capacity": capacity,
+        "current_occupancy": occupancy,
+        "status": status,
+    }
+
+
+SHELTERS = [
+    shelter(1, 20.026, 100, 99),     # ~2.9 km, 1 free place
+    shelter(2, 20.027, 600, 100),    # ~3.0 km, 500 free
+    shelter(3, 20.001, 500, 0, status="Closed"),
+    shelter(4, 20.002, 500, 0, status="Full"),
+    shelter(5, 20.050, 300, 0),      # ~5.6 km, 300 free
+]
+
+
+def ids(index, hits):
+    return [index.records[position]["id"] for position, _, _ in hits]
+
+
+def test_distance_rank_puts_nearest_first_and_skips_closed_or_full():
+    index = ShelterIndex(SHELTERS)
+    assert ids(index, index.nearest_shelters(20.0, 85.0, k=3)) == ["center-1", "center-2", "center-5"]
+    assert ids(index, index.nearest_shelters(20.0, 85.0, k=5, min_free_capacity=0)) == ["center-1", "center-2", "center-5"]
+
+
+def test_capacity_rank_puts_roomiest_first_within_radius():
+    index = ShelterIndex(SHELTERS)
+    assert ids(index, index.nearest_shelters(20.0, 85.0, k=3, rank="capacity")) == ["center-2", "center-5", "center-1"]
+    assert ids(index, index.nearest_shelters(20.0, 85.0, k=3, max_km=4, rank="capacity")) == ["center-2", "center-1"]
+
+
+def test_capacity_rank_without_radius_stays_local():
+    far = shelter(6, 23.0, 10000, 0)  # ~330 km away
+    index = ShelterIndex(SHELTERS + [far])
+    assert "center-6" not in ids(index, index.nearest_shelters(20.0, 85.0, k=5, rank="capacity"))
+    assert ids(index, index.nearest_shelters(20.0, 85.0, k=1, max_km=500, rank="capacity")) == ["center-6"]
+
+
+def test_distance_tie_at_the_cut_goes_to_the_roomier_shelter():
+    tied = [shelter(i, 20.01, 500, 500 - free) for i, free in enumerate((1, 2, 3, 400))]
+    index = ShelterIndex(tied)
+    assert ids(index, index.nearest_shelters(20.0, 85.0, k=1)) == ["center-3"]
+    assert ids(index, index.nearest_shelters(20.0, 85.0, k=2)) == ["center-3", "center-2"]
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from dashboard import DashboardView, SUMMARY_INPUTS
+from data_store import DatasetStore
+from stream import RESYNC, DatasetEventPublisher, StreamBroker, diff_alerts
+
+
+def drain(subscriber):
+    events = []
+    while not subscriber.queue.empty():
+        events.append(subscriber.queue.get_nowait())
+    return events
+
+
+def test_slow_subscriber_gets_one_resync_instead_of_a_backlog():
+    async def scenario():
+        broker = StreamBroker(max_queue=4)
+        slow = broker.subscribe(["alerts"])
+        other = broker.subscribe(["cyclone"])
+        for i in range(6):
+            broker.publish("alerts", {"n": i})
+        events = drain(slow)
+        # Four queued, the fifth overflowed: backlog dropped, then resync, then the sixth event
+        assert events[0] is RESYNC
+        assert [json.loads(e.payload)["n"] for e in events[1:]] == [5]
+        assert slow.dropped == 5
+        assert drain(other) == []
+        assert b"id:" not in RESYNC.sse
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_replays_missed_events_or_asks_for_resync():
+    async def scenario():
+        broker = StreamBroker(replay=3)
+        ids = [broker.publish("alerts" if i % 2 else "cyclone", {"n": i}).id for i in range(5)]
+
+        caught_up = broker.subscribe(["alerts"], last_event_id=ids[2])
+        assert [e.id for e in drain(caught_up)] == [ids[3]]
+
+        # Event ids[1] is no longer buffered, so the client cannot be caught up
+        too_old = broker.subscribe(["alerts", "cyclone"], last_event_id=ids[0])
+        assert drain(too_old) == [RESYNC]
+
+    asyncio.run(scenario())
+
+
+def test_alert_diff():
+    before = [{"id": 1, "severity": "yellow"}, {"id": 2, "severity": "red"}, {"id": 3, "severity": "orange"}]
+    after = [{"id": 1, "severity": "red"}, {"id": 3, "severity": "yellow"}, {"id": 4, "severity": "orange"}]
+    delta = diff_alerts(before, after)
+    assert delta["added"] == [{"id": 4, "severity": "orange"}]
+    assert delta["removed"] == [2]
+    assert delta["escalated"] == [{"id": 1, "from": "yellow", "to": "red", "alert": after[0]}]
+    assert delta["changed"] == [{"id": 3, "severity": "yellow"}]
+
+
+def test_reload_publishes_alert_and_score_deltas(tmp_path):
+    data = {
+        "alerts.json": [{"id": 1, "severity": "yellow"}],
+        "aqi_data.json": {"current": {"aqi": 50}},
+        "weather_data.json": {"current": {}},
+        "cyclone_data.json": {"active_cyclone": None},
+        "disasters.json": [],
+    }
+    for name, value in data.items():
+        (tmp_path / name).write_text(json.dumps(value), encoding="utf-8")
+    store = DatasetStore(tmp_path)
+    store.load_all()
+    broker = StreamBroker()
+    publisher = DatasetEventPublisher(store, broker, DashboardView(store), SUMMARY_INPUTS)
+    publisher.prime()
+
+    async def scenario():
+        subscriber = broker.subscribe(["alerts", "dashboard"])
+        store.load("weather_data.json")  # a reload that changes nothing
+        assert drain(subscriber) == []
+
+        (tmp_path / "alerts.json").write_text(json.dumps([{"id": 1, "severity": "red"}]), encoding="utf-8")
+        store.load("alerts.json")
+        alerts, dashboard = [json.loads(e.payload) for e in drain(subscriber)]
+        assert alerts["topic"] == "alerts" and alerts["escalated"][0]["to"] == "red"
+        assert dashboard["previous_score"] == 95 and dashboard["suraksha_score"] == 85
+
+    asyncio.run(scenario())
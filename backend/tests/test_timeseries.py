@@ -0,0 +1,77 @@
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from data_store import DatasetStore
+from timeseries import TimeSeriesStore, lttb, parse_duration, resample, resolve_time
+
+REFERENCE = datetime(2024, 8, 15, 14, 0, tzinfo=timezone.utc)
+
+
+def test_loose_labels_resolve_against_the_reference_time():
+    assert resolve_time("Aug 08", REFERENCE, None) == datetime(2024, 8, 8, tzinfo=timezone.utc)
+    three_pm = resolve_time("03:00 PM", REFERENCE, None)
+    assert three_pm == datetime(2024, 8, 15, 15, 0, tzinfo=timezone.utc)
+    # Hourly labels keep moving forward past midnight
+    assert resolve_time("01:00 AM", REFERENCE, three_pm) == datetime(2024, 8, 16, 1, 0, tzinfo=timezone.utc)
+    assert resolve_time("2024-08-01T06:30:00Z", REFERENCE, None) == datetime(2024, 8, 1, 6, 30, tzinfo=timezone.utc)
+    assert resolve_time("soon", REFERENCE, None) is None
+
+
+def test_parse_duration():
+    assert [parse_duration(v) for v in ("900", "15m", "1h", "2d")] == [900, 900, 3600, 172800]
+    for bad in ("0", "1w", "h"):
+        with pytest.raises(ValueError):
+            parse_duration(bad)
+
+
+def test_resample_buckets_are_epoch_aligned():
+    times = np.array([0, 600, 1800, 3600, 4000, 9000], dtype=np.int64)
+    values = np.array([1.0, 3.0, 2.0, 10.0, 20.0, 5.0])
+    result = resample(times, values, 3600, ("mean", "min", "max"))
+    assert result["times"].tolist() == [0, 3600, 7200]
+    assert result["mean"].tolist() == [2.0, 15.0, 5.0]
+    assert result["min"].tolist() == [1.0, 10.0, 5.0]
+    assert result["max"].tolist() == [3.0, 20.0, 5.0]
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    times = np.arange(1000, dtype=np.int64) * 60
+    values = np.sin(np.arange(1000) / 50.0)
+    values[437] = 25.0
+    kept_times, kept_values = lttb(times, values, 50)
+    assert len(kept_times) == 50
+    assert kept_times[0] == 0 and kept_times[-1] == 999 * 60
+    assert np.all(np.diff(kept_times) > 0)
+    assert 25.0 in kept_values
+    # Series already below the threshold are returned as they are
+    short_times, short_values = lttb(times[:10], values[:10], 50)
+    assert short_times.tolist() == times[:10].tolist()
+
+
+def test_store_queries_ranges_per_station(tmp_path):
+    data = {
+        "current": {"location": "Bhubaneswar", "last_updated": "2024-08-15T14:00:00Z"},
+        "historical": [
+            {"date": "Aug 08", "aqi": 135},
+            {"date": "Aug 09", "aqi": 148},
+            {"date": "Aug 10", "aqi": 160},
+            {"date": "Aug 09", "aqi": 90, "station": "Cuttack"},
+        ],
+        "forecast": [],
+    }
+    (tmp_path / "aqi_data.json").write_text(json.dumps(data), encoding="utf-8")
+    store = DatasetStore(tmp_path)
+    series = TimeSeriesStore(store)
+    store.load_all()
+
+    result = series.query("aqi-historical", "aqi", station="bhubaneswar", start=datetime(2024, 8, 9, tzinfo=timezone.utc))
+    assert result == [{
+        "station": "Bhubaneswar", "metric": "aqi", "raw_points": 2, "resolution": "raw",
+        "timestamps": ["2024-08-09T00:00:00+00:00", "2024-08-10T00:00:00+00:00"], "values": [148.0, 160.0],
+    }]
+    daily = series.query("aqi-historical", "aqi", bucket=2 * 86400, aggregations=("max",))
+    assert {r["station"]: r["max"] for r in daily} == {"Bhubaneswar": [135.0, 160.0], "Cuttack": [90.0]}
+    assert sorted((e["station"], e["points"]) for e in series.catalog()) == [("Bhubaneswar", 3), ("Cuttack", 1)]
@@ -0,0 +1,249 @@
+"""Time-series store for AQI history/forecast and hourly weather.
+
+Each (source, station, metric) series is held as two contiguous NumPy
+arrays, sorted epoch seconds and float values, built once per dataset
+version. Supported queries:
+- A range query is a pair of searchsorted calls and returns views of the
+  arrays, not copies.
+- Bucketed mean/min/max uses ufunc.reduceat over bucket boundaries.
+- LTTB (largest-triangle-three-buckets) downsamples a series for charts.
+
+The mock files carry loose labels ("Aug 08", "03:00 PM"). They are resolved
+against the dataset's last_updated time, and hourly labels roll over
+midnight. Records may also carry ISO timestamps and a 'station' field,
+which is the shape real sensor feeds would have.
+"""
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+AGGREGATIONS = ('mean', 'min', 'max')
+
+_DURATION = re.compile(r'^(\d+)\s*([smhd]?)$')
+_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@dataclass(frozen=True)
+class SeriesSource:
+    dataset: str
+    path: str               # list of records inside the dataset
+    time_field: str
+    station_path: str       # dotted path of the default station name
+    reference_path: str     # dotted path of the timestamp loose labels are resolved against
+
+
+SERIES_SOURCES: Dict[str, SeriesSource] = {
+    'aqi-historical': SeriesSource('aqi_data.json', 'historical', 'date', 'current.location', 'current.last_updated'),
+    'aqi-forecast': SeriesSource('aqi_data.json', 'forecast', 'date', 'current.location', 'current.last_updated'),
+    'weather-hourly': SeriesSource('weather_data.json', 'hourly', 'time', 'current.location', 'current.last_updated'),
+}
+
+
+def parse_duration(value: str) -> int:
+    """'900', '15m', '1h', '1d' -> seconds"""
+    match = _DURATION.match(value.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid duration '{value}'")
+    return int(match.group(1)) * _UNITS[match.group(2)]
+
+
+def _path(data: Any, path: str) -> Any:
+    for key in path.split('.'):
+        data = data.get(key) if isinstance(data, dict) else None
+    return data
+
+
+def _parse_iso(value: str) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def resolve_time(label: Any, reference: datetime, previous: Optional[datetime]) -> Optional[datetime]:
+    """ISO timestamp, 'Aug 08' (year of reference) or '03:00 PM' (after previous / on reference day)"""
+    if not isinstance(label, str):
+        return None
+    parsed = _parse_iso(label)
+    if parsed is not None:
+        return parsed
+    for fmt in ('%b %d', '%d %b'):
+        try:
+            day = datetime.strptime(f"{label} {reference.year}", f"{fmt} %Y")
+            return day.replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    for fmt in ('%I:%M %p', '%H:%M'):
+        try:
+            clock = datetime.strptime(label, fmt)
+        except ValueError:
+            continue
+        base = previous or reference
+        moment = base.replace(hour=clock.hour, minute=clock.minute, second=0, microsecond=0)
+        # Hourly labels run forward from the reference time and wrap past midnight
+        if moment < base or (previous is not None and moment == previous):
+            moment += timedelta(days=1)
+        return moment
+    return None
+
+
+@dataclass(frozen=True)
+class Series:
+    source: str
+    station: str
+    metric: str
+    times: np.ndarray   # int64 epoch seconds, ascending
+    values: np.ndarray  # float64
+
+    def window(self, start: Optional[datetime], end: Optional[datetime]) -> Tuple[np.ndarray, np.ndarray]:
+        """Views of the points in [start, end]"""
+        lo = 0 if start is None else int(np.searchsorted(self.times, start.timestamp(), side='left'))
+        hi = len(self.times) if end is None else int(np.searchsorted(self.times, end.timestamp(), side='right'))
+        return self.times[lo:hi], self.values[lo:hi]
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "station": self.station,
+            "metric": self.metric,
+            "points": int(len(self.times)),
+            "from": _iso(self.times[0]) if len(self.times) else None,
+            "to": _iso(self.times[-1]) if len(self.times) else None,
+        }
+
+
+def _iso(seconds: float) -> str:
+    return datetime.fromtimestamp(float(seconds), tz=timezone.utc).isoformat()
+
+
+def build_series(data: Any, name: str, source: SeriesSource) -> Dict[Tuple[str, str], Series]:
+    """All (station, metric) series of one source; numeric fields become metrics"""
+    records = _path(data, source.path) or ()
+    default_station = str(_path(data, source.station_path) or 'default')
+    reference = _parse_iso(str(_path(data, source.reference_path) or '')) or datetime.now(timezone.utc)
+
+    columns: Dict[Tuple[str, str], Tuple[List[float], List[float]]] = {}
+    previous: Dict[str, datetime] = {}
+    for record in records:
+        station = str(record.get('station') or default_station)
+        moment = resolve_time(record.get(source.time_field), reference, previous.get(station))
+        if moment is None:
+            continue
+        previous[station] = moment
+        for metric, value in record.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+                continue
+            times, values = columns.setdefault((station, metric), ([], []))
+            times.append(moment.timestamp())
+            values.append(float(value))
+
+    series = {}
+    for (station, metric), (times, values) in columns.items():
+        order = np.argsort(np.asarray(times), kind='stable')
+        series[(station, metric)] = Series(
+            source=name,
+            station=station,
+            metric=metric,
+            times=np.ascontiguousarray(np.asarray(times, dtype=np.int64)[order]),
+            values=np.ascontiguousarray(np.asarray(values, dtype=np.float64)[order]),
+        )
+    return series
+
+
+def resample(times: np.ndarray, values: np.ndarray, bucket: int, aggregations: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Aggregate points into fixed buckets aligned to the epoch; empty buckets are omitted"""
+    if not len(times):
+        return {"times": times, **{agg: values for agg in aggregations}}
+    ids = times // bucket
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    result = {"times": ids[starts] * bucket}
+    if 'mean' in aggregations:
+        counts = np.diff(np.r_[starts, len(values)])
+        result['mean'] = np.add.reduceat(values, starts) / counts
+    if 'min' in aggregations:
+        result['min'] = np.minimum.reduceat(values, starts)
+    if 'max' in aggregations:
+        result['max'] = np.maximum.reduceat(values, starts)
+    return result
+
+
+def lttb(times: np.ndarray, values: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Largest-Triangle-Three-Buckets: keep the points that best preserve the chart's shape"""
+    n = len(times)
+    if threshold >= n or threshold < 3:
+        return times, values
+    x = times.astype(np.float64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)  # threshold-2 inner buckets
+    selected = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Average of the next bucket (or the last point)
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            avg_x, avg_y = x[nlo:nhi].mean(), values[nlo:nhi].mean()
+        else:
+            avg_x, avg_y = x[-1], values[-1]
+        ax, ay = x[selected], values[selected]
+        area = np.abs((ax - avg_x) * (values[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y - ay))
+        selected = lo + int(np.argmax(area))
+        keep[i + 1] = selected
+    return times[keep], values[keep]
+
+
+class TimeSeriesStore:
+    def __init__(self, store, sources: Dict[str, SeriesSource] = SERIES_SOURCES):
+        self.store = store
+        self.sources = sources
+        for name, source in sources.items():
+            store.register(source.dataset, f"series:{name}", lambda data, name=name, source=source: build_series(data, name, source))
+
+    def series(self, source: str) -> Optional[Dict[Tuple[str, str], Series]]:
+        return self.store.derived(self.sources[source].dataset, f"series:{source}")
+
+    def catalog(self) -> List[Dict[str, Any]]:
+        entries = []
+        for name in self.sources:
+            entries.extend(series.info() for series in (self.series(name) or {}).values())
+        return entries
+
+    def query(
+        self,
+        source: str,
+        metric: str,
+        station: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        bucket: Optional[int] = None,
+        aggregations: Sequence[str] = ('mean',),
+        points: Optional[int] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """One entry per matching station; None when the source is unavailable"""
+        available = self.series(source)
+        if available is None:
+            return None
+        results = []
+        for (series_station, series_metric), series in available.items():
+            if series_metric != metric or (station and series_station.lower() != station.lower()):
+                continue
+            times, values = series.window(start, end)
+            result: Dict[str, Any] = {"station": series_station, "metric": metric, "raw_points": int(len(times))}
+            if bucket:
+                columns = resample(times, values, bucket, aggregations)
+                result["resolution"] = f"{bucket}s"
+                result["timestamps"] = [_iso(t) for t in columns.pop("times")]
+                result.update({agg: np.round(column, 4).tolist() for agg, column in columns.items()})
+            else:
+                if points:
+                    times, values = lttb(times, values, points)
+                result["resolution"] = "lttb" if points and len(times) < result["raw_points"] else "raw"
+                result["timestamps"] = [_iso(t) for t in times]
+                result["values"] = values.tolist()
+            results.append(result)
+        return results
@@ -9,22 +9,29 @@ const api = axios.create({
   },
 });
 
+// Regions: weather, AQI, alerts, flood zones and the dashboard take an optional region key (e.g. 'cuttack')
+export const getRegions = () => api.get('/api/regions');
+
 // Weather APIs
-export const getWeather = () => api.get('/api/weather');
-export const getCurrentWeather = () => api.get('/api/weather/current');
-export const getHourlyForecast = () => api.get('/api/weather/hourly');
-export const getDailyForecast = () => api.get('/api/weather/daily');
+export const getWeather = (region) => api.get('/api/weather', { params: { region } });
+export const getCurrentWeather = (region) => api.get('/api/weather/current', { params: { region } });
+export const getHourlyForecast = (region) => api.get('/api/weather/hourly', { params: { region } });
+export const getDailyForecast = (region) => api.get('/api/weather/daily', { params: { region } });
 
 // AQI APIs
-export const getAQI = () => api.get('/api/aqi');
-export const getCurrentAQI = () => api.get('/api/aqi/current');
-export const getAQIStations = () => api.get('/api/aqi/stations');
-export const getAQIHistorical = () => api.get('/api/aqi/historical');
-export const getAQIForecast = () => api.get('/api/aqi/forecast');
+export const getAQI = (region) => api.get('/api/aqi', { params: { region } });
+export const getCurrentAQI = (region) => api.get('/api/aqi/current', { params: { region } });
+export const getAQIStations = (region) => api.get('/api/aqi/stations', { params: { region } });
+export const getAQIHistorical = (region) => api.get('/api/aqi/historical', { params: { region } });
+export const getAQIForecast = (region) => api.get('/api/aqi/forecast', { params: { region } });
+
+// Time series, e.g. getTimeSeries('aqi-historical', 'aqi', { bucket: '1d', aggs: 'mean,max' }) or { points: 200 }
+export const getTimeSeriesCatalog = () => api.get('/api/timeseries');
+export const getTimeSeries = (source, metric, options = {}) => api.get(`/api/timeseries/${source}`, { params: { metric, ...options } });
 
 // Alerts APIs
-export const getAlerts = (severity) => api.get('/api/alerts', { params: { severity } });
-export const getAlertById = (id) => api.get(`/api/alerts/${id}`);
+export const getAlerts = (severity, region) => api.get('/api/alerts', { params: { severity, region } });
+export const getAlertById = (id, region) => api.get(`/api/alerts/${id}`, { params: { region } });
 
 // Disasters APIs
 export const getDisasters = (type, limit = 50) => api.get('/api/disasters', { params: { disaster_type: type, limit } });
@@ -36,12 +43,18 @@ export const getCycloneData = () => api.get('/api/cyclone');
 export const getActiveCyclone = () => api.get('/api/cyclone/active');
 export const getCycloneTrack = () => api.get('/api/cyclone/track');
 export const getHistoricalCyclones = () => api.get('/api/cyclone/historical');
+export const getCycloneEta = (lat, lon) => api.get('/api/cyclone/eta', { params: { lat, lon } });
+export const getCycloneEtaBatch = (points) => api.post('/api/cyclone/eta/batch', { points });
+export const getCycloneEtaForLayer = (layer, minImpact) => api.get(`/api/cyclone/eta/${layer}`, { params: { min_impact: minImpact } });
 
 // Flood APIs
-export const getFloodZones = (riskLevel) => api.get('/api/flood-zones', { params: { risk_level: riskLevel } });
+export const getFloodZones = (riskLevel, region) => api.get('/api/flood-zones', { params: { risk_level: riskLevel, region } });
 
 // Earthquake APIs
 export const getEarthquakes = (minMagnitude, limit = 50) => api.get('/api/earthquakes', { params: { min_magnitude: minMagnitude, limit } });
+// filters: max_magnitude, min_depth, max_depth, since, until, min_lat/min_lon/max_lat/max_lon, lat/lon/radius_km, cursor (X-Next-Cursor)
+export const queryEarthquakes = (filters = {}) => api.get('/api/earthquakes', { params: filters });
+export const getEarthquakeAggregates = (bucket = 'day', region, since, until) => api.get('/api/earthquakes/aggregates', { params: { bucket, region, since, until } });
 
 // Agriculture APIs
 export const getAgricultureData = () => api.get('/api/agriculture');
@@ -52,9 +65,17 @@ export const getMarketPrices = () => api.get('/api/agriculture/prices');
 export const getKnowledgeCards = (category) => api.get('/api/knowledge-cards', { params: { category } });
 export const getKnowledgeCardById = (id) => api.get(`/api/knowledge-cards/${id}`);
 
+// Search across knowledge cards, alerts and disasters (types: 'knowledge_card', 'alert', 'disaster')
+export const search = (q, types, limit = 10) => api.get('/api/search', { params: { q, types: types?.join(','), limit } });
+
 // Evacuation Centers APIs
 export const getEvacuationCenters = (shelterType, status) => api.get('/api/evacuation-centers', { params: { shelter_type: shelterType, status } });
 export const getEvacuationCenterById = (id) => api.get(`/api/evacuation-centers/${id}`);
+export const getNearestEvacuationCenters = (lat, lon, k = 5, minFreeCapacity = 1, rank = 'distance') => api.get('/api/evacuation-centers/nearest', { params: { lat, lon, k, min_free_capacity: minFreeCapacity, rank } });
+
+// Geo query APIs
+export const getGeoWithinRadius = (layer, lat, lon, radiusKm, limit = 100) => api.get(`/api/geo/${layer}/within`, { params: { lat, lon, radius_km: radiusKm, limit } });
+export const getGeoBoundingBox = (layer, minLat, minLon, maxLat, maxLon, limit = 100) => api.get(`/api/geo/${layer}/bbox`, { params: { min_lat: minLat, min_lon: minLon, max_lat: maxLat, max_lon: maxLon, limit } });
 
 // AI Assistant APIs
 export const askAIAssistant = (query, context) => api.post('/api/ai-assistant', { query, context });
@@ -62,10 +83,32 @@ export const getAIRecommendations = () => api.get('/api/ai-assistant/recommendat
 
 // Community Reports APIs
 export const createCommunityReport = (data) => api.post('/api/community-reports', data);
-export const getCommunityReports = (status, reportType, limit = 50) => api.get('/api/community-reports', { params: { status, report_type: reportType, limit } });
+// Pass the previous response's x-next-cursor header as `cursor` to fetch the next page
+export const getCommunityReports = (status, reportType, limit = 50, cursor) => api.get('/api/community-reports', { params: { status, report_type: reportType, limit, cursor } });
 export const getCommunityReportById = (id) => api.get(`/api/community-reports/${id}`);
+export const getCommunityReportHotspots = (zoom = 10, hours = 24, bbox) => api.get('/api/community-reports/hotspots', { params: { zoom, hours, ...bbox } });
+
+// Offline sync: pass the previous response's version as `since` to receive only added/changed/removed records
+export const getOfflineSync = (since) => api.get('/api/sync', { params: { since } });
 
 // Dashboard Summary
-export const getDashboardSummary = () => api.get('/api/dashboard/summary');
+export const getDashboardSummary = (region) => api.get('/api/dashboard/summary', { params: { region } });
+
+// Several resources in one round trip, e.g. getBundle(['weather.current', 'alerts'], { 'alerts.severity': 'red' }, heldEtags)
+export const getBundle = (include, filters = {}, etags = []) => api.get('/api/bundle', {
+  params: { include: include.join(','), ...filters },
+  headers: etags.length ? { 'If-None-Match': etags.join(', ') } : {},
+  validateStatus: (status) => status === 200 || status === 304,
+});
+
+// Live updates (Server-Sent Events): topics is any of 'alerts', 'cyclone', 'dashboard'.
+// On a 'resync' event the client fell behind and should refetch the full resources.
+export const subscribeToStream = (topics, onEvent) => {
+  const source = new EventSource(`${API_BASE_URL}/api/stream?topics=${topics.join(',')}`);
+  [...topics, 'resync'].forEach((topic) => {
+    source.addEventListener(topic, (event) => onEvent(topic, JSON.parse(event.data)));
+  });
+  return () => source.close();
+};
 
 export default api;